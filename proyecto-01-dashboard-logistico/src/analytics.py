@@ -0,0 +1,221 @@
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from dashboard_data import add_otif_flags, dataset_version, load_dataset
+from frame_dtypes import optimize_dtypes
+from instrumentation import METRICS, log_event
+from kpi_cube import CUBE_KEYS, build_cube
+
+# Caché en disco de los análisis (notebook y dashboard), una carpeta por versión de datos
+ANALYTICS_CACHE_DIR = os.getenv('ANALYTICS_CACHE_DIR', os.path.join('..', 'data', 'processed', 'analytics_cache'))
+# ANALYTICS_CACHE=0 recalcula siempre (sin leer ni escribir la caché)
+ANALYTICS_CACHE = os.getenv('ANALYTICS_CACHE', '1') != '0'
+# Subir al cambiar los cálculos: las carpetas de la versión anterior dejan de usarse
+ANALYTICS_SCHEMA = 2
+# Versiones que se conservan (la vigente y la anterior)
+KEEP_VERSIONS = 2
+
+FRAME_FILE = 'frame.parquet'
+# KPIs y opciones de filtro en JSON; cada tabla de resultados en su propio
+# Parquet (results_<nombre>.parquet). El JSON se escribe al final: si existe,
+# las tablas ya están completas
+RESULTS_FILE = 'results.json'
+RESULT_FRAMES = ['by_category', 'by_carrier', 'by_transport', 'correlation', 'cube']
+
+CORRELATION_COLUMNS = ['price', 'products_sold', 'revenue_generated', 'shipping_costs',
+                       'shipping_times', 'defect_rates', 'manufacturing_costs', 'stock_levels']
+
+
+def is_cacheable(version):
+    # Sin corridas del ETL la versión no identifica los datos: no se cachea
+    return ANALYTICS_CACHE and version not in ('sin-etl-runs', 'sin-cargas')
+
+
+def version_dir(version, cache_dir=ANALYTICS_CACHE_DIR):
+    safe_version = re.sub(r'[^\w.-]', '_', version)
+    return os.path.join(cache_dir, f"v{ANALYTICS_SCHEMA}_{safe_version}")
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def remove_old_versions(cache_dir, current, keep=KEEP_VERSIONS):
+    dirs = sorted((os.path.join(cache_dir, name) for name in os.listdir(cache_dir)),
+                  key=os.path.getmtime, reverse=True)
+    for path in [d for d in dirs if d != current][max(keep - 1, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def save_cached(version, frame=None, results=None, cache_dir=ANALYTICS_CACHE_DIR):
+    path = version_dir(version, cache_dir)
+    os.makedirs(path, exist_ok=True)
+    if frame is not None:
+        _write_atomic(os.path.join(path, FRAME_FILE), lambda tmp: frame.to_parquet(tmp, index=False))
+    if results is not None:
+        for name in RESULT_FRAMES:
+            _write_atomic(result_frame_path(path, name), lambda tmp, name=name: results[name].to_parquet(tmp))
+
+        def write_results(tmp):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({key: value for key, value in results.items() if key not in RESULT_FRAMES},
+                          f, default=_json_default)
+        _write_atomic(os.path.join(path, RESULTS_FILE), write_results)
+    remove_old_versions(cache_dir, path)
+
+
+def result_frame_path(path, name):
+    return os.path.join(path, f"results_{name}.parquet")
+
+
+def _json_default(value):
+    # Escalares de numpy (np.int64, np.bool_) que json no serializa solo
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} no es serializable a JSON")
+
+
+def read_results(path):
+    """Resultados guardados por save_cached: el JSON más sus tablas en Parquet."""
+    with open(path, encoding='utf-8') as f:
+        results = json.load(f)
+    for name in RESULT_FRAMES:
+        results[name] = pd.read_parquet(result_frame_path(os.path.dirname(path), name))
+    return results
+
+
+def _cached_file(version, name, cache_dir):
+    path = os.path.join(version_dir(version, cache_dir), name)
+    hit = is_cacheable(version) and os.path.exists(path)
+    METRICS.inc('analytics_cache', result='hit' if hit else 'miss', item=name.split('.')[0])
+    return path if hit else None
+
+
+def prepare_analysis_frame(df):
+    """Tabla de hechos completa con tipos compactos y flags OTIF (misma lógica que el dashboard)."""
+    return add_otif_flags(optimize_dtypes(df))
+
+
+def load_analysis_frame(pool=None, version=None, cache_dir=ANALYTICS_CACHE_DIR):
+    """Tabla de hechos de la versión vigente: desde la caché en disco si los datos no cambiaron.
+
+    Devuelve (df, versión); `version` evita volver a consultarla. Sin caché
+    se lee todo desde MySQL (o el staging), se prepara y se guarda en Parquet
+    para la próxima vez.
+    """
+    version = version or dataset_version(pool)
+    path = _cached_file(version, FRAME_FILE, cache_dir)
+    if path is not None:
+        return pd.read_parquet(path), version
+
+    df, version = load_dataset(pool, columns=None)
+    df = prepare_analysis_frame(df)
+    if is_cacheable(version):
+        save_cached(version, frame=df, cache_dir=cache_dir)
+    log_event('analytics_frame', rows=len(df), data_version=version)
+    return df, version
+
+
+def get_analytics(pool=None, version=None, frame=None, cache_dir=ANALYTICS_CACHE_DIR):
+    """Resultados de compute_analytics para la versión vigente (o `version`).
+
+    Si ya están en la caché se leen de disco sin tocar los datos; si no, se
+    calculan sobre `frame` (o la tabla de load_analysis_frame) y se guardan.
+    """
+    version = version or dataset_version(pool)
+    path = _cached_file(version, RESULTS_FILE, cache_dir)
+    if path is not None:
+        return read_results(path)
+
+    if frame is None:
+        frame, version = load_analysis_frame(pool, version, cache_dir)
+    results = {'version': version, **compute_analytics(frame)}
+    if is_cacheable(version):
+        save_cached(version, results=results, cache_dir=cache_dir)
+    log_event('analytics_results', rows=len(frame), data_version=version)
+    return results
+
+
+def compute_analytics(df):
+    """KPIs, tablas por categoría, carrier y modo de transporte, correlaciones y cubo del dashboard.
+
+    `df` es la tabla de hechos con flags OTIF (prepare_analysis_frame). Cada
+    dimensión se agrupa una sola vez con todas sus métricas.
+    """
+    df = df.assign(cost_per_day=df['shipping_costs'] / df['shipping_times'])
+
+    by_category = df.groupby('product_type', observed=True).agg(
+        revenue_generated=('revenue_generated', 'sum'),
+        products_sold=('products_sold', 'sum'),
+        price=('price', 'mean'),
+        stock_levels=('stock_levels', 'mean'),
+        defect_rates=('defect_rates', 'mean'),
+        shipping_costs=('shipping_costs', 'sum'),
+        otif_count=('otif', 'sum'),
+        rows=('otif', 'size'),
+    )
+    by_category['otif_pct'] = by_category['otif_count'] / by_category['rows'] * 100
+    by_category['revenue_pct'] = by_category['revenue_generated'] / by_category['revenue_generated'].sum() * 100
+
+    by_carrier = df.groupby('shipping_carrier', observed=True).agg(
+        shipping_costs_sum=('shipping_costs', 'sum'),
+        shipping_costs_mean=('shipping_costs', 'mean'),
+        shipping_times=('shipping_times', 'mean'),
+        shipments=('sku', 'count'),
+        cost_per_day=('cost_per_day', 'mean'),
+        otif_count=('otif', 'sum'),
+        rows=('otif', 'size'),
+    )
+    by_carrier['otif_pct'] = by_carrier['otif_count'] / by_carrier['rows'] * 100
+
+    by_transport = df.groupby('transportation_mode', observed=True).agg(
+        total_costs_sum=('total_costs', 'sum'),
+        total_costs_mean=('total_costs', 'mean'),
+        shipping_times=('shipping_times', 'mean'),
+        shipments=('sku', 'count'),
+        expected_shipping_time=('expected_shipping_time', 'first'),
+    )
+
+    correlation_columns = [col for col in CORRELATION_COLUMNS if col in df.columns]
+    revenue = df['revenue_generated'].sum()
+    rows = len(df)
+    kpis = {
+        'rows': rows,
+        'skus': df['sku'].nunique(),
+        'total_revenue': revenue,
+        'total_products_sold': int(df['products_sold'].sum()),
+        'total_shipping_costs': df['shipping_costs'].sum(),
+        'total_manufacturing_costs': df['manufacturing_costs'].sum() if 'manufacturing_costs' in df else None,
+        'avg_shipping_time': df['shipping_times'].mean(),
+        'avg_defect_rate': df['defect_rates'].mean(),
+        'avg_stock_levels': df['stock_levels'].mean(),
+        'otif_pct': df['otif'].mean() * 100 if rows else 0.0,
+        'on_time_pct': df['on_time'].mean() * 100 if rows else 0.0,
+        'in_full_pct': df['in_full'].mean() * 100 if rows else 0.0,
+    }
+
+    return {
+        'kpis': kpis,
+        'by_category': by_category,
+        'by_carrier': by_carrier,
+        'by_transport': by_transport,
+        'correlation': df[correlation_columns].astype('float64').corr(),
+        # Lo que el dashboard necesita al iniciar (ver dashboard_app.py)
+        'cube': build_cube(df),
+        'filter_options': {col: df[col].dropna().unique().tolist() for col in CUBE_KEYS},
+    }
+
+
+if __name__ == '__main__':
+    print("📊 Calculando analytics (o leyéndolos de la caché)...")
+    results = get_analytics()
+    kpis = results['kpis']
+    print(f"✅ Versión {results['version']}: {kpis['rows']:,} filas, OTIF {kpis['otif_pct']:.1f}%, "
+          f"revenue ${kpis['total_revenue']:,.0f}")
@@ -0,0 +1,78 @@
+// Modo 'clientside' de dashboard_app.py: el cubo de KPIs (pocas celdas) ya está
+// en el navegador, así que cada cambio de filtro se resuelve aquí, sin pedirle
+// nada al servidor. Replica kpi_cube.rollup y solo redibuja los gráficos cuyos
+// datos cambian.
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dashboard: {
+        updateView: function (category, carrier, transport, cube, otifStyle,
+                              revenueFig, otifFig, carrierFig, defectsFig) {
+            const noUpdate = window.dash_clientside.no_update;
+            const cols = cube.columns;
+
+            // Celdas que cumplen los filtros
+            const filters = [['product_type', category], ['shipping_carrier', carrier],
+                             ['transportation_mode', transport]];
+            const rows = [];
+            for (let i = 0; i < cols.row_count.length; i++) {
+                if (filters.every(([key, value]) => value === 'ALL' || cols[key][i] === value)) {
+                    rows.push(i);
+                }
+            }
+
+            const sum = (col, idx) => idx.reduce((acc, i) => acc + cols[col][i], 0);
+            const ratio = (num, den, scale) => (den ? num / den * scale : NaN);
+            // Grupos ordenados por clave, como groupby de pandas
+            const groupBy = (key) => {
+                const groups = {};
+                rows.forEach((i) => { (groups[cols[key][i]] = groups[cols[key][i]] || []).push(i); });
+                return Object.keys(groups).sort().map((k) => [k, groups[k]]);
+            };
+            const series = (groups, num, den) => ({
+                x: groups.map(([k]) => k),
+                y: groups.map(([, idx]) => (den ? ratio(sum(num, idx), sum(den, idx), 1) : sum(num, idx))),
+            });
+
+            const byCategory = groupBy('product_type');
+            const byCarrier = groupBy('shipping_carrier');
+            const otif = series(byCategory, 'otif_count', 'row_count');
+            otif.y = otif.y.map((v) => v * 100);
+
+            // KPIs (mismo formato que kpi_texts en Python)
+            const rowCount = sum('row_count', rows);
+            const otifPct = rowCount ? sum('otif_count', rows) / rowCount * 100 : 0;
+            const avgDefects = ratio(sum('defect_sum', rows), sum('defect_count', rows), 1);
+            const fmt = (value, digits) => value.toLocaleString('en-US', {
+                minimumFractionDigits: digits, maximumFractionDigits: digits, useGrouping: digits === 0,
+            });
+            // Sin filas que cumplan los filtros el promedio no existe (NaN): una raya
+            const fmtPct = (value, digits) => (isNaN(value) ? '—' : fmt(value, digits) + '%');
+            const color = otifPct >= cube.otif_target ? cube.colors.success : cube.colors.danger;
+
+            // Figura con x/y nuevos, o no_update si el gráfico ya muestra esos datos
+            const sameArray = (a, b) => Array.isArray(a) && a.length === b.length
+                && a.every((v, i) => v === b[i]);
+            const withData = (fig, data) => {
+                const trace = fig.data[0];
+                if (sameArray(trace.x, data.x) && sameArray(trace.y, data.y)) {
+                    return noUpdate;
+                }
+                const marker = Object.assign({}, trace.marker, {color: data.y});
+                return Object.assign({}, fig, {
+                    data: [Object.assign({}, trace, {x: data.x, y: data.y, marker: marker})],
+                });
+            };
+
+            return [
+                '$' + fmt(sum('revenue_sum', rows), 0),
+                fmt(sum('products_sold_sum', rows), 0),
+                fmtPct(otifPct, 1),
+                fmtPct(avgDefects, 2),
+                Object.assign({}, otifStyle, {color: color}),
+                withData(revenueFig, series(byCategory, 'revenue_sum')),
+                withData(otifFig, otif),
+                withData(carrierFig, series(byCarrier, 'shipping_cost_sum', 'shipping_cost_count')),
+                withData(defectsFig, series(byCategory, 'defect_sum', 'defect_count')),
+            ];
+        },
+    },
+});
@@ -0,0 +1,174 @@
+import argparse
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from instrumentation import peak_rss_bytes
+
+MODES = ['memory', 'sql']
+UPDATE_MODES = ['full', 'patch', 'clientside']
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def callback_body(callback_id, spec, values, state_values):
+    """Cuerpo del POST que el navegador envía a /_dash-update-component."""
+    return {
+        'output': callback_id,
+        'outputs': [{'id': out.component_id, 'property': out.component_property} for out in spec['output']],
+        'inputs': [{**dep, 'value': value} for dep, value in zip(spec['inputs'], values)],
+        'state': [{**dep, 'value': value} for dep, value in zip(spec['state'], state_values)],
+        'changedPropIds': [f"{dep['id']}.{dep['property']}" for dep in spec['inputs']],
+    }
+
+
+def measure_interactions(app, combos, repeat):
+    """Bytes de respuesta y CPU del servidor por cambio de filtro, vía el cliente de pruebas de Flask.
+
+    En modo clientside no hay callback en el servidor: cada interacción cuesta
+    0 bytes y el cubo viaja una vez con el layout.
+    """
+    client = app.server.test_client()
+    layout_bytes = len(client.get('/_dash-layout').data)
+    sizes, cpu_ms = [], []
+    for callback_id, spec in app.callback_map.items():
+        if 'callback' not in spec or spec['inputs'][0]['id'] != 'category-filter':
+            continue  # callback clientside (corre en el navegador) o de refresco
+        # Inputs que no son filtros (versión de datos) y estado inicial: los que trae el layout
+        extra_ids = [f"{dep['id']}.{dep['property']}" for dep in spec['inputs'][len(combos[0]):]]
+        state_ids = [f"{dep['id']}.{dep['property']}" for dep in spec['state']]
+        layout = json.loads(client.get('/_dash-layout').data)
+        state = {key: find_prop(layout, *key.split('.', 1)) for key in extra_ids + state_ids}
+        for _ in range(repeat):
+            for combo in combos:
+                values = list(combo) + [state[key] for key in extra_ids]
+                body = callback_body(callback_id, spec, values, [state[key] for key in state_ids])
+                t0 = time.process_time()
+                response = client.post('/_dash-update-component', json=body)
+                cpu_ms.append((time.process_time() - t0) * 1000)
+                sizes.append(len(response.data))
+                if response.status_code == 204:
+                    continue  # nada que actualizar (PreventUpdate)
+                if response.status_code != 200:
+                    raise RuntimeError(f"Callback {combo} respondió {response.status_code}")
+                # El navegador actualiza su estado con lo que devuelve el callback
+                for component_id, props in json.loads(response.data)['response'].items():
+                    for prop, value in props.items():
+                        if f"{component_id}.{prop}" in state:
+                            state[f"{component_id}.{prop}"] = value
+    return {
+        'layout_kb': layout_bytes / 1024,
+        'interaction_kb_mean': statistics.mean(sizes) / 1024 if sizes else 0.0,
+        'interaction_cpu_ms_mean': statistics.mean(cpu_ms) if cpu_ms else 0.0,
+    }
+
+
+def find_prop(node, component_id, prop):
+    """Valor de una propiedad de un componente dentro del JSON del layout."""
+    if isinstance(node, dict):
+        props = node.get('props', {})
+        if props.get('id') == component_id:
+            return props.get(prop)
+        children = [props.get('children')] if 'props' in node else list(node.values())
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = find_prop(child, component_id, prop)
+        if found is not None:
+            return found
+    return None
+
+
+def run_worker(mode, repeat, updates=None):
+    """Mide un modo en este proceso: arranque (import) y latencia de callbacks sin caché."""
+    os.environ['DASHBOARD_MODE'] = mode
+    if updates:
+        os.environ['DASHBOARD_UPDATES'] = updates
+
+    start = time.perf_counter()
+    import dashboard_app
+    startup = time.perf_counter() - start
+
+    options = dashboard_app.filter_options
+    combos = list(itertools.product(['ALL'] + options['product_type'],
+                                    ['ALL'] + options['shipping_carrier'],
+                                    ['ALL'] + options['transportation_mode']))
+    version = dashboard_app.current_data_version()
+
+    aggregate_ms, callback_ms = [], []
+    for _ in range(repeat):
+        for combo in combos:
+            t0 = time.perf_counter()
+            dashboard_app.current_view(*combo, version)
+            t1 = time.perf_counter()
+            dashboard_app.build_view(*combo, version)
+            t2 = time.perf_counter()
+            aggregate_ms.append((t1 - t0) * 1000)
+            callback_ms.append((t2 - t1) * 1000)
+
+    # Tráfico y CPU por interacción a través de Dash (con la caché de vistas vacía)
+    dashboard_app.view_cache.clear()
+    interactions = measure_interactions(dashboard_app.app, combos, repeat)
+
+    return {
+        'mode': mode,
+        'updates': dashboard_app.UPDATE_MODE,
+        **interactions,
+        'startup_seconds': startup,
+        'filter_combinations': len(combos),
+        'aggregate_mean_ms': statistics.mean(aggregate_ms),
+        'aggregate_p95_ms': percentile(aggregate_ms, 95),
+        'callback_mean_ms': statistics.mean(callback_ms),
+        'callback_p95_ms': percentile(callback_ms, 95),
+        'peak_rss_mb': peak_rss_bytes() / 2**20,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara el dashboard en modo memoria vs SQL')
+    parser.add_argument('--modes', nargs='+', default=MODES, choices=MODES)
+    parser.add_argument('--updates', nargs='+', default=UPDATE_MODES, choices=UPDATE_MODES,
+                        help='cómo se actualizan los gráficos (ver DASHBOARD_UPDATES)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--worker', nargs=2, metavar=('MODE', 'UPDATES'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        mode, updates = args.worker
+        print(json.dumps(run_worker(mode, args.repeat, updates)))
+        sys.exit(0)
+
+    # Cada combinación corre en su propio proceso para medir arranque y memoria por separado
+    results = []
+    for mode in args.modes:
+        for updates in args.updates:
+            if mode == 'sql' and updates == 'clientside':
+                continue
+            print(f"⏱️  Midiendo modo '{mode}' con actualizaciones '{updates}'...")
+            output = subprocess.run([sys.executable, __file__, '--worker', mode, updates,
+                                     '--repeat', str(args.repeat)],
+                                    capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"\n{'Modo':<8} {'Gráficos':<11} {'Arranque (s)':>13} {'Agregado ms (media/p95)':>25} "
+          f"{'Callback ms (media/p95)':>25} {'RSS pico (MB)':>14}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['updates']:<11} {r['startup_seconds']:>13.2f} "
+              f"{r['aggregate_mean_ms']:>12.2f} / {r['aggregate_p95_ms']:<10.2f} "
+              f"{r['callback_mean_ms']:>12.2f} / {r['callback_p95_ms']:<10.2f} "
+              f"{r['peak_rss_mb']:>14.1f}")
+
+    print(f"\n{'Modo':<8} {'Gráficos':<11} {'Layout (KB)':>12} {'KB por interacción':>19} "
+          f"{'CPU servidor ms':>16}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['updates']:<11} {r['layout_kb']:>12.1f} "
+              f"{r['interaction_kb_mean']:>19.2f} {r['interaction_cpu_ms_mean']:>16.2f}")
@@ -0,0 +1,67 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from etl_transform import COLUMN_MAP
+from ingest import FLOAT_COLUMNS, parse_decimal, read_raw
+from synthetic_data import generate_file
+
+# Columnas decimales con su nombre en el CSV original
+RAW_FLOAT_COLUMNS = {db: original for original, db in COLUMN_MAP.items() if db in FLOAT_COLUMNS}
+
+
+def naive_parse(values, limit):
+    """Referencia: el mismo arreglo, pero con `apply` celda por celda."""
+    def parse_cell(cell):
+        if cell.count('.') < 2:
+            return float(cell)
+        value = float(cell.replace('.', ''))
+        while value >= limit:
+            value /= 10
+        return value
+    return values.apply(parse_cell)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark del parser numérico del CSV crudo')
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--path', default=os.path.join('..', 'data', 'raw', 'synthetic_ingest.csv'))
+    parser.add_argument('--naive-sample', type=int, default=200_000,
+                        help='filas usadas para medir el parser con apply')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"🛠️  Generando archivo sintético de {args.rows:,} filas...")
+        generate_file(args.path, args.rows)
+
+    size_mb = os.path.getsize(args.path) / 1e6
+
+    start = time.perf_counter()
+    df = read_raw(args.path)
+    elapsed = time.perf_counter() - start
+    print(f"\n⚡ read_raw vectorizado: {len(df):,} filas en {elapsed:.2f}s "
+          f"({len(df) / elapsed:,.0f} filas/s, {size_mb / elapsed:,.1f} MB/s)")
+    print(df.dtypes.to_string())
+
+    # Comparar solo el parseo de las columnas decimales, sobre una muestra
+    sample = pd.read_csv(args.path, sep=';', dtype=str, nrows=args.naive_sample)
+    total_vectorized = total_naive = 0.0
+    for col, limit in FLOAT_COLUMNS.items():
+        raw_col = RAW_FLOAT_COLUMNS[col]
+        start = time.perf_counter()
+        parse_decimal(sample[raw_col], limit)
+        vectorized = time.perf_counter() - start
+
+        start = time.perf_counter()
+        naive_parse(sample[raw_col], limit)
+        naive = time.perf_counter() - start
+
+        total_vectorized += vectorized
+        total_naive += naive
+        print(f"   Columna '{raw_col}': vectorizado {vectorized:.3f}s, apply {naive:.3f}s "
+              f"({naive / vectorized:.1f}x)")
+
+    print(f"\n📊 {len(FLOAT_COLUMNS)} columnas decimales ({len(sample):,} filas): vectorizado "
+          f"{total_vectorized:.3f}s, apply {total_naive:.3f}s ({total_naive / total_vectorized:.1f}x)")
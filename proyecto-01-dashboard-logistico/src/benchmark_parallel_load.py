@@ -0,0 +1,112 @@
+import argparse
+import os
+import time
+
+from bulk_loader import DEFAULT_CHUNK_SIZE, LOAD_MODES, LOAD_STEPS, accumulate_stats, load_table
+from db import connect, get_pool
+from etl_state import add_row_hash
+from etl_transform import split_tables
+from parallel_load import DEFAULT_QUEUE_SIZE, ParallelLoader
+from staging import read_staged, stage_raw
+
+CHILD_TABLES = ['sales', 'logistics', 'production']
+
+
+def prepare_database(cursor, source_db, bench_db):
+    """Crea la base de benchmark con el mismo esquema (LIKE no copia las FK)."""
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {bench_db}")
+    for _, table, _ in LOAD_STEPS:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {bench_db}.{table} LIKE {source_db}.{table}")
+    for table in CHILD_TABLES:
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.referential_constraints
+            WHERE constraint_schema = %s AND table_name = %s
+        """, (bench_db, table))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"ALTER TABLE {bench_db}.{table} "
+                           f"ADD FOREIGN KEY (sku) REFERENCES {bench_db}.products(sku)")
+
+
+def truncate_tables(cursor):
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for _, table, _ in LOAD_STEPS:
+        cursor.execute(f"TRUNCATE TABLE {table}")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+
+def run_load(pool, base, copies, parallel, mode, chunk_size, queue_size):
+    """Transforma y carga `copies` chunks (SKU renombrados) y devuelve (segundos, filas)."""
+    connection = pool.acquire()
+    try:
+        with connection.cursor() as cursor:
+            truncate_tables(cursor)
+
+        start = time.perf_counter()
+        loader = None
+        if parallel:
+            loader = ParallelLoader(connection, pool, LOAD_STEPS,
+                                    mode=mode, chunk_size=chunk_size, queue_size=queue_size)
+        stats = {}
+        try:
+            for copy in range(copies):
+                # Cada copia con sus propias posiciones: si no, reemplazaría a la anterior
+                tables = split_tables(base.assign(sku=base['sku'] + f"-{copy}",
+                                                  source_row=base['source_row'] + copy * len(base)))
+                if loader is not None:
+                    loader.submit(tables)
+                    continue
+                with connection.cursor() as cursor:
+                    for _, table, update_columns in LOAD_STEPS:
+                        accumulate_stats(stats, load_table(cursor, table, add_row_hash(tables[table]),
+                                                           mode=mode, chunk_size=chunk_size,
+                                                           update_columns=update_columns))
+            if loader is not None:
+                stats = loader.finish()
+            connection.commit()
+        except Exception:
+            if loader is not None:
+                loader.abort()
+            connection.rollback()
+            raise
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.release(connection)
+    return elapsed, sum(s['rows'] for s in stats.values())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara la carga serial vs paralela del ETL')
+    parser.add_argument('--copies', type=int, default=200,
+                        help='chunks a cargar (copias del CSV con SKU distintos)')
+    parser.add_argument('--mode', default='bulk', choices=LOAD_MODES)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument('--bench-db', default=f"{os.getenv('DB_NAME')}_bench")
+    args = parser.parse_args()
+
+    stage_raw(os.path.join('..', 'data', 'raw', 'supply_chain_data.csv'))
+    base = read_staged()
+
+    admin = connect()
+    try:
+        with admin.cursor() as cursor:
+            prepare_database(cursor, os.getenv('DB_NAME'), args.bench_db)
+        admin.commit()
+    finally:
+        admin.close()
+
+    # Mismo pool para ambas corridas: la paralela no paga la apertura de conexiones
+    pool = get_pool(maxsize=len(LOAD_STEPS), database=args.bench_db,
+                    **({'local_infile': True} if args.mode == 'infile' else {}))
+
+    print(f"⏱️  Cargando {args.copies} chunks de {len(base):,} filas en '{args.bench_db}' "
+          f"(modo {args.mode})...")
+    results = {}
+    for label, parallel in [('serial', False), ('paralela', True)]:
+        results[label] = run_load(pool, base, args.copies, parallel,
+                                  args.mode, args.chunk_size, args.queue_size)
+        seconds, rows = results[label]
+        print(f"   {label:<9} {seconds:>8.2f} s {rows:>12,} filas {rows / seconds:>12,.0f} filas/s")
+
+    speedup = results['serial'][0] / results['paralela'][0]
+    print(f"\n🚀 Speedup de la carga paralela: {speedup:.2f}x")
@@ -0,0 +1,220 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from instrumentation import peak_rss_bytes
+
+STAGES = ['extract', 'transform', 'load', 'dashboard']
+RESULTS_DIR = os.path.join('..', 'outputs', 'benchmarks')
+
+
+def bench_staging_dir(label):
+    return os.path.join('..', 'data', 'processed', f"bench_{label}")
+
+
+def bench_db_name():
+    return f"{os.getenv('DB_NAME')}_bench"
+
+
+def peak_rss_mb():
+    return peak_rss_bytes() / 2**20
+
+
+def has_staging(label):
+    from staging import read_manifest
+
+    return read_manifest(bench_staging_dir(label)) is not None
+
+
+def stage_synthetic(label):
+    from staging import stage_raw
+    from synthetic_data import synthetic_path
+
+    return stage_raw(synthetic_path(label), staging_dir=bench_staging_dir(label), force=True)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_extract(label):
+    from synthetic_data import synthetic_path
+
+    path = synthetic_path(label)
+    start = time.perf_counter()
+    manifest = stage_synthetic(label)
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'rows': manifest['rows'],
+            'input_mb': os.path.getsize(path) / 1e6}
+
+
+def run_transform(label):
+    from etl_transform import split_tables
+    from staging import read_staged
+
+    start = time.perf_counter()
+    tables = split_tables(read_staged(staging_dir=bench_staging_dir(label)))
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'rows': {table: len(df) for table, df in tables.items()}}
+
+
+def run_load(label):
+    """Carga serial por tabla en la base <DB_NAME>_bench (MySQL/MariaDB local), con el RSS pico de cada una."""
+    import pymysql
+
+    from benchmark_parallel_load import prepare_database, truncate_tables
+    from bulk_loader import LOAD_STEPS, load_table
+    from db import connect, get_pool
+    from etl_state import add_row_hash
+    from etl_transform import split_tables
+    from staging import read_staged
+
+    tables = split_tables(read_staged(staging_dir=bench_staging_dir(label)))
+    try:
+        admin = connect()
+        try:
+            with admin.cursor() as cursor:
+                prepare_database(cursor, os.getenv('DB_NAME'), bench_db_name())
+            admin.commit()
+        finally:
+            admin.close()
+    except pymysql.err.MySQLError as e:
+        return {'status': 'skipped', 'reason': str(e)}
+
+    pool = get_pool(database=bench_db_name())
+    results = []
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            truncate_tables(cursor)
+            start = time.perf_counter()
+            for _, table, update_columns in LOAD_STEPS:
+                stats = load_table(cursor, table, add_row_hash(tables[table]),
+                                   update_columns=update_columns, sample_memory=True)
+                stats['peak_rss_mb'] = stats.pop('peak_memory') / 2**20
+                results.append(stats)
+            connection.commit()
+            seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'rows': sum(r['rows'] for r in results), 'tables': results}
+
+
+def run_dashboard(label, repeat):
+    """Arranque y latencia por filtro del dashboard sobre los datos del benchmark."""
+    # Sin MySQL (o sin la base de benchmark) el dashboard cae al staging de este tamaño
+    # (STAGING_DIR ya apunta a él, ver run_stage)
+    os.environ['DB_NAME'] = bench_db_name()
+    from benchmark_dashboard import run_worker
+
+    result = run_worker('memory', repeat)
+    result['seconds'] = result.pop('startup_seconds')
+    return result
+
+
+def run_stage(stage, label, repeat):
+    # Antes de importar staging, que fija STAGING_DIR al importarse
+    os.environ['STAGING_DIR'] = bench_staging_dir(label)
+    if stage != 'extract' and not has_staging(label):
+        result = {'status': 'skipped',
+                  'reason': f"sin staging de {label} en {bench_staging_dir(label)}: corre antes la etapa extract"}
+    elif stage == 'extract':
+        result = run_extract(label)
+    elif stage == 'transform':
+        result = run_transform(label)
+    elif stage == 'load':
+        result = run_load(label)
+    else:
+        result = run_dashboard(label, repeat)
+    result.setdefault('status', 'ok')
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def compare(results, baseline_path):
+    """Imprime la variación de tiempo y memoria contra un JSON anterior."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['size'], r['stage']): r for r in json.load(f)['results']}
+    print(f"\n📈 Comparación con {os.path.basename(baseline_path)}:")
+    print(f"   {'Tamaño':<7} {'Etapa':<10} {'Tiempo':>10} {'Memoria':>10}")
+    for r in results:
+        base = baseline.get((r['size'], r['stage']))
+        if base is None or r['status'] != 'ok' or base['status'] != 'ok':
+            continue
+        print(f"   {r['size']:<7} {r['stage']:<10} {r['seconds'] / base['seconds'] - 1:>+10.1%} "
+              f"{r['peak_rss_mb'] / base['peak_rss_mb'] - 1:>+10.1%}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de punta a punta: ETL y dashboard')
+    parser.add_argument('--sizes', nargs='+', default=['10k'], help='10k, 1m, 10m o filas')
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES)
+    parser.add_argument('--repeat', type=int, default=1, help='repeticiones de cada filtro del dashboard')
+    parser.add_argument('--output', default=RESULTS_DIR)
+    parser.add_argument('--compare', help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--worker', nargs=2, metavar=('STAGE', 'SIZE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        stage, label = args.worker
+        print(json.dumps(run_stage(stage, label, args.repeat)))
+        sys.exit(0)
+
+    from synthetic_data import generate_file, parse_size, synthetic_path
+
+    results = []
+    for label in args.sizes:
+        path = synthetic_path(label)
+        if not os.path.exists(path):
+            print(f"🛠️  Generando {parse_size(label):,} filas en {path}...")
+            generate_file(path, parse_size(label))
+
+        # Las demás etapas leen el staging de este tamaño: se genera si no se mide extract
+        if 'extract' not in args.stages and not has_staging(label):
+            print(f"🛠️  Pasando {path} a staging ({bench_staging_dir(label)})...")
+            stage_synthetic(label)
+
+        # Cada etapa corre en su propio proceso para medir su memoria pico por separado
+        for stage in [stage for stage in STAGES if stage in args.stages]:
+            print(f"⏱️  {label}: {stage}...")
+            output = subprocess.run([sys.executable, __file__, '--worker', stage, label,
+                                     '--repeat', str(args.repeat)],
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append({'size': label, 'rows': parse_size(label), 'stage': stage, **result})
+
+    print(f"\n{'Tamaño':<7} {'Etapa':<10} {'Estado':<8} {'Segundos':>10} {'RSS pico (MB)':>14}")
+    for r in results:
+        seconds = f"{r['seconds']:.2f}" if r['status'] == 'ok' else '-'
+        print(f"{r['size']:<7} {r['stage']:<10} {r['status']:<8} {seconds:>10} {r['peak_rss_mb']:>14.1f}")
+        if 'reason' in r:
+            print(f"{'':<7} ⚠️  {r['reason']}")
+        for table in r.get('tables', []):
+            print(f"{'':<7} {'  ' + table['table']:<10} {'':<8} {table['seconds']:>10.2f} "
+                  f"{table['peak_rss_mb']:>14.1f} ({table['rows_per_sec']:,.0f} filas/s)")
+        if r['stage'] == 'dashboard':
+            print(f"{'':<7} {'  callback':<10} {'':<8} media {r['callback_mean_ms']:.1f} ms, "
+                  f"p95 {r['callback_p95_ms']:.1f} ms ({r['filter_combinations']} filtros)")
+
+    os.makedirs(args.output, exist_ok=True)
+    commit = git_commit()
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    out_path = os.path.join(args.output, f"suite_{datetime.now():%Y%m%d_%H%M%S}_{commit}.json")
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Resultados guardados en {out_path}")
+
+    if args.compare:
+        compare(results, args.compare)
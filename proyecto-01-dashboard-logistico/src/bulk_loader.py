@@ -0,0 +1,169 @@
+import csv
+import os
+import tempfile
+import time
+
+from instrumentation import track_stage
+
+# Tamaño de lote por defecto para los INSERT multi-fila
+DEFAULT_CHUNK_SIZE = 5000
+
+# Modos de carga soportados
+LOAD_MODES = ('row', 'bulk', 'infile')
+
+# Orden de carga: (etiqueta, tabla, columnas de upsert). Productos primero
+# porque las otras tablas tienen FK a products.sku; las dimensiones usan
+# upsert sobre su clave única (products.sku, suppliers.supplier_name)
+LOAD_STEPS = [
+    ('productos', 'products', ['product_type', 'price', 'availability', 'stock_levels', 'row_hash']),
+    ('proveedores', 'suppliers', ['location', 'lead_time', 'row_hash']),
+    ('ventas', 'sales', None),
+    ('logística', 'logistics', None),
+    ('producción', 'production', None),
+]
+
+
+# Clave natural de las tablas de hechos (ver etl_transform.SOURCE_ROW): al
+# cargar una fila se borra antes la que tenga la misma clave
+REPLACE_KEY = 'source_row'
+
+
+def build_insert(table, columns, update_columns=None):
+    """Arma el INSERT parametrizado para una tabla (con upsert opcional)."""
+    column_list = ', '.join(columns)
+    placeholders = ', '.join(['%s'] * len(columns))
+    sql = f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})"
+    if update_columns:
+        updates = ', '.join(f"{col} = VALUES({col})" for col in update_columns)
+        sql += f" ON DUPLICATE KEY UPDATE {updates}"
+    return sql
+
+
+def iter_row_chunks(df, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Entrega el DataFrame en listas de tuplas de a `chunk_size` filas (NaN -> NULL)."""
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield list(chunk.itertuples(index=False, name=None))
+
+
+def load_rows(cursor, table, df, update_columns=None):
+    """Carga fila por fila (un round-trip por fila). Se mantiene como referencia."""
+    sql = build_insert(table, list(df.columns), update_columns)
+    for rows in iter_row_chunks(df):
+        for row in rows:
+            cursor.execute(sql, row)
+
+
+def load_bulk(cursor, table, df, chunk_size=DEFAULT_CHUNK_SIZE, update_columns=None):
+    """Carga por lotes con executemany.
+
+    PyMySQL reescribe `executemany` sobre un INSERT ... VALUES como un único
+    INSERT multi-fila (VALUES (...), (...)), por lo que cada lote es un solo
+    round-trip al servidor.
+    """
+    sql = build_insert(table, list(df.columns), update_columns)
+    for rows in iter_row_chunks(df, chunk_size):
+        cursor.executemany(sql, rows)
+
+
+def load_infile(cursor, table, df, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Carga con LOAD DATA LOCAL INFILE a partir de un CSV temporal.
+
+    Requiere conectar con `local_infile=True` y que el servidor tenga
+    habilitado `local_infile`. No soporta upsert (ON DUPLICATE KEY UPDATE).
+    Sin carácter de escape, MySQL interpreta la palabra NULL sin comillas como NULL.
+    """
+    columns = ', '.join(df.columns)
+    fd, tmp_path = tempfile.mkstemp(suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            for rows in iter_row_chunks(df, chunk_size):
+                writer.writerows(
+                    tuple('NULL' if value is None else value for value in row) for row in rows
+                )
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+            LINES TERMINATED BY '\\n'
+            ({columns})
+        """, (tmp_path,))
+    finally:
+        os.remove(tmp_path)
+
+
+def delete_replaced(cursor, table, df, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Borra las filas de `table` con la misma clave natural que las de `df`.
+
+    Sin índice único posible (las tablas particionadas solo admiten claves
+    que incluyan created_at), recargar una fila es borrar y volver a insertar
+    en la misma transacción; el DELETE usa el índice idx_<tabla>_source_row.
+    """
+    keys = df[REPLACE_KEY].dropna().astype('int64').tolist()
+    for start in range(0, len(keys), chunk_size):
+        batch = keys[start:start + chunk_size]
+        cursor.execute(f"DELETE FROM {table} WHERE {REPLACE_KEY} IN ({', '.join(['%s'] * len(batch))})",
+                       batch)
+
+
+def load_table(cursor, table, df, mode='bulk', chunk_size=DEFAULT_CHUNK_SIZE, update_columns=None,
+               sample_memory=False):
+    """Carga un DataFrame en `table` con el modo indicado y devuelve métricas de carga.
+
+    Si trae la columna source_row (tablas de hechos), antes se borran las
+    filas con la misma clave: recargar el CSV reemplaza en vez de duplicar.
+    `sample_memory` mide el RSS pico de la carga (solo tiene sentido en serie).
+    """
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Modo de carga desconocido: {mode!r} (opciones: {', '.join(LOAD_MODES)})")
+
+    # LOAD DATA no permite upsert: las tablas con ON DUPLICATE KEY usan lotes
+    if mode == 'infile' and update_columns:
+        mode = 'bulk'
+
+    start = time.perf_counter()
+    with track_stage('load_table', sample_memory=sample_memory, table=table, mode=mode) as info:
+        info['rows'] = len(df)
+        info['bytes'] = int(df.memory_usage(index=False).sum())
+        if REPLACE_KEY in df.columns and len(df):
+            delete_replaced(cursor, table, df, chunk_size)
+        if mode == 'row':
+            load_rows(cursor, table, df, update_columns)
+        elif mode == 'bulk':
+            load_bulk(cursor, table, df, chunk_size, update_columns)
+        else:
+            load_infile(cursor, table, df, chunk_size)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'table': table,
+        'mode': mode,
+        'rows': len(df),
+        'seconds': elapsed,
+        'rows_per_sec': len(df) / elapsed if elapsed > 0 else float('inf'),
+        'peak_memory': info['peak_memory'],
+    }
+
+
+def accumulate_stats(totals, stats):
+    """Suma las métricas de una carga parcial (p. ej. un chunk) al total por tabla."""
+    total = totals.setdefault(stats['table'], {
+        'table': stats['table'], 'mode': stats['mode'], 'rows': 0, 'seconds': 0.0,
+    })
+    total['rows'] += stats['rows']
+    total['seconds'] += stats['seconds']
+    total['rows_per_sec'] = total['rows'] / total['seconds'] if total['seconds'] > 0 else float('inf')
+    if stats.get('peak_memory') is not None:
+        total['peak_memory'] = max(total.get('peak_memory') or 0, stats['peak_memory'])
+    return totals
+
+
+def print_load_summary(stats_list):
+    """Imprime la tabla comparativa de filas/segundo por tabla."""
+    print(f"\n   {'Tabla':<12} {'Modo':<8} {'Filas':>10} {'Segundos':>10} {'Filas/s':>12}")
+    for stats in stats_list:
+        print(f"   {stats['table']:<12} {stats['mode']:<8} {stats['rows']:>10,} "
+              f"{stats['seconds']:>10.3f} {stats['rows_per_sec']:>12,.0f}")
+
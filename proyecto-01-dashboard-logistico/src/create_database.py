@@ -1,22 +1,17 @@
-import pymysql
-from dotenv import load_dotenv
 import os
 
-# Cargar variables de entorno
-load_dotenv()
+from db import connect, db_config
+from migrations import PARTITIONED_TABLES, add_month_partitions, apply_migrations, partition_by_load_date
 
-# Configuración de conexión
-config = {
-    'host': os.getenv('DB_HOST'),
-    'port': int(os.getenv('DB_PORT')),
-    'user': os.getenv('DB_USER'),
-    'password': os.getenv('DB_PASSWORD')
-}
+db_name = db_config()['database']
 
-db_name = os.getenv('DB_NAME')
+# Particionar sales/logistics por mes de carga (elimina sus FK, ver migrations.py)
+PARTITION_BY_LOAD_DATE = os.getenv('DB_PARTITION_BY_LOAD_DATE', '0') == '1'
 
-# Crear conexión
-connection = pymysql.connect(**config)
+
+# Crear conexión (sin base de datos: puede no existir todavía; sin pool,
+# porque es una única conexión de corta duración)
+connection = connect(with_database=False)
 
 try:
     with connection.cursor() as cursor:
@@ -36,7 +31,11 @@ try:
             price DECIMAL(10,2),
             availability INT,
             stock_levels INT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            row_hash BIGINT UNSIGNED,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_products_updated_at (updated_at),
+            INDEX idx_products_row_hash (row_hash)
         )
         """)
         print("✅ Tabla 'products' creada")
@@ -45,10 +44,12 @@ try:
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS suppliers (
             id INT AUTO_INCREMENT PRIMARY KEY,
-            supplier_name VARCHAR(100),
+            supplier_name VARCHAR(100) UNIQUE,
             location VARCHAR(100),
             lead_time INT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            row_hash BIGINT UNSIGNED,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_suppliers_row_hash (row_hash)
         )
         """)
         print("✅ Tabla 'suppliers' creada")
@@ -57,11 +58,17 @@ try:
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS sales (
             id INT AUTO_INCREMENT PRIMARY KEY,
+            source_row INT,
             sku VARCHAR(50),
             products_sold INT,
             revenue_generated DECIMAL(12,2),
             customer_demographics VARCHAR(50),
+            row_hash BIGINT UNSIGNED,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_sales_updated_at (updated_at),
+            INDEX idx_sales_row_hash (row_hash),
+            INDEX idx_sales_source_row (source_row),
             FOREIGN KEY (sku) REFERENCES products(sku)
         )
         """)
@@ -71,6 +78,7 @@ try:
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS logistics (
             id INT AUTO_INCREMENT PRIMARY KEY,
+            source_row INT,
             sku VARCHAR(50),
             shipping_times INT,
             shipping_carrier VARCHAR(100),
@@ -78,7 +86,12 @@ try:
             transportation_mode VARCHAR(50),
             route VARCHAR(50),
             total_costs DECIMAL(10,2),
+            row_hash BIGINT UNSIGNED,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_logistics_updated_at (updated_at),
+            INDEX idx_logistics_row_hash (row_hash),
+            INDEX idx_logistics_source_row (source_row),
             FOREIGN KEY (sku) REFERENCES products(sku)
         )
         """)
@@ -88,18 +101,55 @@ try:
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS production (
             id INT AUTO_INCREMENT PRIMARY KEY,
+            source_row INT,
             sku VARCHAR(50),
             production_volumes INT,
             manufacturing_lead_time INT,
             manufacturing_costs DECIMAL(10,2),
             inspection_results VARCHAR(50),
             defect_rates DECIMAL(5,2),
+            row_hash BIGINT UNSIGNED,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_production_updated_at (updated_at),
+            INDEX idx_production_row_hash (row_hash),
+            INDEX idx_production_source_row (source_row),
             FOREIGN KEY (sku) REFERENCES products(sku)
         )
         """)
         print("✅ Tabla 'production' creada")
         
+        # Crear tabla de control de corridas del ETL (carga incremental)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS etl_runs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            source_file VARCHAR(255),
+            file_checksum CHAR(64),
+            mode VARCHAR(20),
+            status VARCHAR(20),
+            rows_read BIGINT DEFAULT 0,
+            rows_loaded BIGINT DEFAULT 0,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            finished_at TIMESTAMP NULL,
+            INDEX idx_etl_runs_source (source_file, status)
+        )
+        """)
+        print("✅ Tabla 'etl_runs' creada")
+        
+        # Migraciones de esquema pendientes (row_hash, índices del dashboard)
+        for migration_id in apply_migrations(cursor):
+            print(f"✅ Migración '{migration_id}' aplicada")
+
+        if PARTITION_BY_LOAD_DATE:
+            for table in PARTITIONED_TABLES:
+                cursor.execute("SELECT create_options FROM information_schema.tables "
+                               "WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+                if 'partitioned' not in (cursor.fetchone()[0] or ''):
+                    partition_by_load_date(cursor, table)
+                    print(f"✅ Tabla '{table}' particionada por mes de carga")
+                elif add_month_partitions(cursor, table):
+                    print(f"✅ Particiones mensuales de '{table}' extendidas")
+        
     connection.commit()
     print("\n🎉 Base de datos y tablas creadas exitosamente!")
     
@@ -1,56 +1,181 @@
 import dash
-from dash import dcc, html, Input, Output
+from dash import dcc, html, ClientsideFunction, Input, Output, Patch, State, no_update
+from dash.exceptions import PreventUpdate
+from flask import Response, jsonify
 import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-import pymysql
-from dotenv import load_dotenv
+from plotly.utils import PlotlyJSONEncoder
 import os
+import json
+import hashlib
+import math
+from kpi_cube import CUBE_KEYS, CUBE_SOURCE_COLUMNS, build_cube, rollup, select_cells
+from callback_cache import LRUTTLCache
+from dashboard_queries import SQLDashboardSource
+from dashboard_data import add_otif_flags, dataset_version, is_staging_version, load_dataset
+from analytics import get_analytics, load_analysis_frame
+from db import get_pool
+from etl_state import version_run_id
+from frame_dtypes import frame_memory_mb
+from instrumentation import METRICS, PhaseTimer, profile
+from live_refresh import REFRESH_SECONDS, LiveDataset, LiveRefresher
+from snapshot import SnapshotReader, publish_snapshot, snapshot_to_pandas
 
-# Cargar variables de entorno
-load_dotenv(os.path.join('..', '.env'))
+# Modo de datos: 'memory' carga y cruza las tablas al iniciar; 'sql' no carga
+# nada y cada callback agrega en MySQL (GROUP BY + WHERE) con un pool de conexiones;
+# 'snapshot' mapea en memoria el snapshot Arrow publicado (uno para todos los workers)
+DASHBOARD_MODE = os.getenv('DASHBOARD_MODE', 'memory')
 
-# Conectar a MySQL
-config = {
-    'host': os.getenv('DB_HOST'),
-    'port': int(os.getenv('DB_PORT')),
-    'user': os.getenv('DB_USER'),
-    'password': os.getenv('DB_PASSWORD'),
-    'database': os.getenv('DB_NAME')
-}
 
-print("📊 Cargando datos desde MySQL...")
-connection = pymysql.connect(**config)
+def attach_snapshot():
+    """Construye el cubo desde el snapshot vigente, sin copiar el dataset completo."""
+    global cube, filter_options, data_version
+    table = snapshot_reader.table
+    cells = build_cube(snapshot_to_pandas(table, CUBE_KEYS + CUBE_SOURCE_COLUMNS))
+    options = {col: table.column(col).unique().drop_null().to_pylist() for col in CUBE_KEYS}
+    # El cubo se asigna antes que la versión: la caché nunca guarda una versión nueva con datos viejos
+    cube, filter_options = cells, options
+    data_version = snapshot_reader.version
+
+
+def apply_live_update(live):
+    """Publica el dataset actualizado por el refresco en vivo (hilo LiveRefresher)."""
+    global df, cube, filter_options, data_version
+    options = {col: live.df[col].dropna().unique().tolist() for col in CUBE_KEYS}
+    # Igual que en attach_snapshot: primero los datos, al final la versión
+    df, cube, filter_options = live.df, live.cube, options
+    data_version = live.data_version
+
+
+live_refresher = None
+if DASHBOARD_MODE == 'sql':
+    print("📊 Modo SQL: los KPIs se agregan en MySQL en cada callback")
+    sql_source = SQLDashboardSource(get_pool())
+    filter_options = sql_source.filter_options()
+    print(f"✅ Conectado: {len(filter_options['product_type'])} categorías disponibles")
+elif DASHBOARD_MODE == 'snapshot':
+    # Cada worker abre el mismo archivo mapeado en memoria; ni SELECT * ni merge por worker
+    snapshot_reader = SnapshotReader()
+    if not snapshot_reader.refresh():
+        # Con varios workers solo uno lo genera; el resto espera el lock y usa ese
+        print("📸 No hay snapshot publicado; generándolo (mejor: python snapshot.py antes de iniciar)")
+        publish_snapshot(if_missing=True)
+        snapshot_reader.refresh()
+    attach_snapshot()
+    print(f"✅ Snapshot {data_version} mapeado: {snapshot_reader.pointer['rows']} registros "
+          f"({len(cube)} celdas en el cubo de KPIs)")
+else:
+    data_version = dataset_version()
+    if REFRESH_SECONDS <= 0 or is_staging_version(data_version):
+        # Sin refresco en vivo basta el cubo: sale de la caché en disco de analytics.py
+        # (la misma que usa el notebook) si la versión de datos no cambió
+        print("📊 Cargando KPIs (caché de analytics por versión de datos)...")
+        results = get_analytics(version=data_version)
+        cube, filter_options, data_version = results['cube'], results['filter_options'], results['version']
+        print(f"✅ Datos cargados: {results['kpis']['rows']} registros ({len(cube)} celdas en el cubo de KPIs, "
+              f"versión {data_version})")
+    else:
+        print("📊 Cargando datos (caché de analytics por versión de datos)...")
+        # Tipos compactos: categóricas, enteros chicos y Decimal -> float. La tabla
+        # de hechos sale de la caché de analytics.py, sin SELECT * si la versión no
+        # cambió (DASHBOARD_COMPACT=0 lee de MySQL con los tipos originales para comparar)
+        compact = os.getenv('DASHBOARD_COMPACT', '1') != '0'
+        if compact:
+            df, data_version = load_analysis_frame(version=data_version)
+            results = get_analytics(version=data_version, frame=df)
+            cube, filter_options = results['cube'], results['filter_options']
+        else:
+            df, data_version = load_dataset()
+            df = add_otif_flags(df)
+            # Cubo de KPIs: los callbacks agregan sobre sus celdas, no sobre todas las filas
+            cube = build_cube(df)
+            filter_options = {col: df[col].dropna().unique().tolist() for col in CUBE_KEYS}
+        memory = frame_memory_mb(df)
+        METRICS.set('dashboard_frame_bytes', int(memory * 2**20))
+
+        # Refresco en vivo: cada DASHBOARD_REFRESH_SECONDS se buscan corridas nuevas
+        # del ETL y se releen solo los SKU que cambiaron (sin etl_runs no hay refresco)
+        run_id = version_run_id(data_version)
+        if run_id is not None:
+            live = LiveDataset(df, data_version, run_id, compact)
+            df, cube = live.df, live.cube
+            live_refresher = LiveRefresher(live, get_pool(), REFRESH_SECONDS, on_update=apply_live_update).start()
 
-# Cargar datos
-products_df = pd.read_sql("SELECT * FROM products", connection)
-sales_df = pd.read_sql("SELECT * FROM sales", connection)
-logistics_df = pd.read_sql("SELECT * FROM logistics", connection)
-production_df = pd.read_sql("SELECT * FROM production", connection)
+        print(f"✅ Datos cargados: {len(df)} registros ({len(cube)} celdas en el cubo de KPIs, "
+              f"versión {data_version})")
+        print(f"🗜️  Memoria del DataFrame: {memory:.2f} MB")
+        if live_refresher is not None:
+            print(f"🔄 Refresco en vivo cada {REFRESH_SECONDS:g} s (solo los SKU que cambiaron)")
 
-connection.close()
+# Caché de resultados de callbacks (KPIs y figuras ya serializados)
+view_cache = LRUTTLCache(maxsize=int(os.getenv('DASHBOARD_CACHE_SIZE', 128)),
+                         ttl=int(os.getenv('DASHBOARD_CACHE_TTL', 600)))
 
-# Consolidar datos
-products_clean = products_df.drop(columns=['id', 'created_at'])
-logistics_clean = logistics_df.drop(columns=['id', 'created_at'])
-production_clean = production_df.drop(columns=['id', 'created_at'])
-sales_clean = sales_df.drop(columns=['id', 'created_at'])
 
-df = sales_clean.merge(products_clean, on='sku', how='left') \
-                .merge(logistics_clean, on='sku', how='left') \
-                .merge(production_clean, on='sku', how='left')
+def current_data_version():
+    # En modo SQL los datos cambian sin reiniciar: se consulta la última corrida del ETL
+    if DASHBOARD_MODE == 'sql':
+        return sql_source.data_version()
+    # En modo snapshot se cambia al snapshot nuevo en cuanto el ETL lo publica
+    if DASHBOARD_MODE == 'snapshot' and snapshot_reader.refresh():
+        attach_snapshot()
+    return data_version
 
-# Calcular OTIF (lógica corregida)
-expected_time = df.groupby('transportation_mode')['shipping_times'].median()
-df['expected_shipping_time'] = df['transportation_mode'].map(expected_time)
-df['on_time'] = (df['shipping_times'] <= df['expected_shipping_time']).astype(int)
-df['in_full'] = (df['stock_levels'] >= df['products_sold']).astype(int)  # CORREGIDO
-df['otif'] = (df['on_time'] & df['in_full']).astype(int)
 
-print(f"✅ Datos cargados: {len(df)} registros")
+def current_view(category, carrier, transport, version, timer=None):
+    timer = timer or PhaseTimer()
+    if DASHBOARD_MODE == 'sql':
+        # MySQL filtra y agrupa: el rollup solo suma las celdas devueltas
+        cells = sql_source.fetch_cube(category, carrier, transport, version)
+    else:
+        cells = select_cells(cube, category, carrier, transport)
+    timer.phase('filter')
+    view = rollup(cells)
+    timer.phase('aggregate')
+    return view
+
+
+# Actualización de KPIs y gráficos en cada cambio de filtro:
+# 'clientside': el cubo (pocas celdas) viaja al navegador y el filtro y el rollup
+#               corren en JS, sin ida y vuelta al servidor (assets/dashboard_clientside.js)
+# 'patch': el servidor agrega y envía solo los arreglos x/y de los gráficos que cambiaron
+# 'full': reconstruye y envía las cuatro figuras completas (el modo original, para comparar)
+# 'auto' (defecto): 'clientside' si el cubo tiene hasta DASHBOARD_CLIENTSIDE_MAX_CELLS celdas
+UPDATE_MODES = ['clientside', 'patch', 'full']
+CLIENTSIDE_MAX_CELLS = int(os.getenv('DASHBOARD_CLIENTSIDE_MAX_CELLS', 5000))
+
+# Gráfico -> (serie del rollup, columna del eje x, columna del eje y)
+FIGURE_SERIES = {
+    'revenue-chart': ('revenue_by_cat', 'product_type', 'revenue_generated'),
+    'otif-chart': ('otif_by_cat', 'product_type', 'otif'),
+    'carrier-efficiency': ('carrier_eff', 'shipping_carrier', 'shipping_costs'),
+    'defects-chart': ('defects_by_cat', 'product_type', 'defect_rates'),
+}
+KPI_IDS = ['kpi-revenue', 'kpi-products', 'kpi-otif', 'kpi-defects']
+OTIF_TARGET = 95
+
+
+def resolve_update_mode():
+    mode = os.getenv('DASHBOARD_UPDATES', 'auto')
+    if mode == 'auto':
+        small_cube = DASHBOARD_MODE != 'sql' and len(cube) <= CLIENTSIDE_MAX_CELLS
+        return 'clientside' if small_cube else 'patch'
+    if mode == 'clientside' and DASHBOARD_MODE == 'sql':
+        # En modo SQL no hay un cubo en memoria que enviar al navegador
+        return 'patch'
+    return mode
+
+
+UPDATE_MODE = resolve_update_mode()
+
+# Las sesiones abiertas revisan la versión de datos cada DASHBOARD_REFRESH_SECONDS;
+# en modo memoria solo si hay refresco en vivo (el staging no cambia sin reiniciar)
+LIVE_UPDATES = REFRESH_SECONDS > 0 and (DASHBOARD_MODE != 'memory' or live_refresher is not None)
+
 
 # Crear aplicación Dash
 app = dash.Dash(__name__)
+# Aplicación Flask para servidores WSGI con varios workers (gunicorn dashboard_app:server)
+server = app.server
 
 # Colores
 colors = {
@@ -63,141 +188,278 @@ colors = {
 }
 
 # Layout del dashboard
-app.layout = html.Div(style={'backgroundColor': colors['background'], 'padding': '20px'}, children=[
+def serve_layout():
+    """Layout por carga de página: opciones y figuras de la versión vigente (y el cubo, en modo clientside)."""
+    version = current_data_version()
+    initial = initial_outputs(version)
+    return html.Div(style={'backgroundColor': colors['background'], 'padding': '20px'}, children=[
     
-    # Header
-    html.Div([
-        html.H1('🚚 Supply Chain Dashboard', 
-                style={'textAlign': 'center', 'color': colors['text'], 'marginBottom': '10px'}),
-        html.H3('Análisis en Tiempo Real con KPI OTIF', 
-                style={'textAlign': 'center', 'color': colors['primary'], 'marginBottom': '30px'})
-    ]),
+        # Header
+        html.Div([
+            html.H1('🚚 Supply Chain Dashboard', 
+                    style={'textAlign': 'center', 'color': colors['text'], 'marginBottom': '10px'}),
+            html.H3('Análisis en Tiempo Real con KPI OTIF', 
+                    style={'textAlign': 'center', 'color': colors['primary'], 'marginBottom': '30px'})
+        ]),
     
-    # Filtros
-    html.Div([
+        # Filtros
         html.Div([
-            html.Label('Categoría de Producto:', style={'fontWeight': 'bold'}),
-            dcc.Dropdown(
-                id='category-filter',
-                options=[{'label': 'Todas', 'value': 'ALL'}] + 
-                        [{'label': cat, 'value': cat} for cat in df['product_type'].unique()],
-                value='ALL',
-                style={'width': '100%'}
-            )
-        ], style={'width': '30%', 'display': 'inline-block', 'marginRight': '3%'}),
+            html.Div([
+                html.Label('Categoría de Producto:', style={'fontWeight': 'bold'}),
+                dcc.Dropdown(
+                    id='category-filter',
+                    options=dropdown_options('product_type'),
+                    value='ALL',
+                    style={'width': '100%'}
+                )
+            ], style={'width': '30%', 'display': 'inline-block', 'marginRight': '3%'}),
         
-        html.Div([
-            html.Label('Carrier:', style={'fontWeight': 'bold'}),
-            dcc.Dropdown(
-                id='carrier-filter',
-                options=[{'label': 'Todos', 'value': 'ALL'}] + 
-                        [{'label': car, 'value': car} for car in df['shipping_carrier'].unique()],
-                value='ALL',
-                style={'width': '100%'}
-            )
-        ], style={'width': '30%', 'display': 'inline-block', 'marginRight': '3%'}),
+            html.Div([
+                html.Label('Carrier:', style={'fontWeight': 'bold'}),
+                dcc.Dropdown(
+                    id='carrier-filter',
+                    options=dropdown_options('shipping_carrier'),
+                    value='ALL',
+                    style={'width': '100%'}
+                )
+            ], style={'width': '30%', 'display': 'inline-block', 'marginRight': '3%'}),
         
-        html.Div([
-            html.Label('Modo de Transporte:', style={'fontWeight': 'bold'}),
-            dcc.Dropdown(
-                id='transport-filter',
-                options=[{'label': 'Todos', 'value': 'ALL'}] + 
-                        [{'label': mode, 'value': mode} for mode in df['transportation_mode'].unique()],
-                value='ALL',
-                style={'width': '100%'}
-            )
-        ], style={'width': '30%', 'display': 'inline-block'})
-    ], style={'marginBottom': '30px'}),
+            html.Div([
+                html.Label('Modo de Transporte:', style={'fontWeight': 'bold'}),
+                dcc.Dropdown(
+                    id='transport-filter',
+                    options=dropdown_options('transportation_mode'),
+                    value='ALL',
+                    style={'width': '100%'}
+                )
+            ], style={'width': '30%', 'display': 'inline-block'})
+        ], style={'marginBottom': '30px'}),
     
-    # KPI Cards
-    html.Div(id='kpi-cards', style={'marginBottom': '30px'}),
+        # KPI Cards
+        html.Div(id='kpi-cards', children=initial['kpis'], style={'marginBottom': '30px'}),
+
+        # Cubo para el filtrado en el navegador y digests de los datos que ya tiene cada gráfico
+        dcc.Store(id='cube-store', data=cube_payload() if UPDATE_MODE == 'clientside' else None),
+        dcc.Store(id='figure-digests', data=initial['digests']),
+
+        # Versión de datos que muestra la página; el intervalo la compara con la del servidor
+        dcc.Store(id='data-version', data=version),
+        dcc.Interval(id='refresh-interval', interval=max(REFRESH_SECONDS, 1) * 1000,
+                     disabled=not LIVE_UPDATES),
     
-    # Gráficos
-    html.Div([
+        # Gráficos
         html.Div([
-            dcc.Graph(id='revenue-chart')
-        ], style={'width': '48%', 'display': 'inline-block', 'marginRight': '2%'}),
+            html.Div([
+                dcc.Graph(id='revenue-chart', figure=initial['figures']['revenue-chart'])
+            ], style={'width': '48%', 'display': 'inline-block', 'marginRight': '2%'}),
         
-        html.Div([
-            dcc.Graph(id='otif-chart')
-        ], style={'width': '48%', 'display': 'inline-block'})
-    ], style={'marginBottom': '20px'}),
+            html.Div([
+                dcc.Graph(id='otif-chart', figure=initial['figures']['otif-chart'])
+            ], style={'width': '48%', 'display': 'inline-block'})
+        ], style={'marginBottom': '20px'}),
     
-    html.Div([
         html.Div([
-            dcc.Graph(id='carrier-efficiency')
-        ], style={'width': '48%', 'display': 'inline-block', 'marginRight': '2%'}),
+            html.Div([
+                dcc.Graph(id='carrier-efficiency', figure=initial['figures']['carrier-efficiency'])
+            ], style={'width': '48%', 'display': 'inline-block', 'marginRight': '2%'}),
         
-        html.Div([
-            dcc.Graph(id='defects-chart')
-        ], style={'width': '48%', 'display': 'inline-block'})
-    ]),
+            html.Div([
+                dcc.Graph(id='defects-chart', figure=initial['figures']['defects-chart'])
+            ], style={'width': '48%', 'display': 'inline-block'})
+        ]),
     
-    # Footer
-    html.Div([
-        html.Hr(),
-        html.P('© 2025 Gonzalo Ulloa González | Análisis de Supply Chain', 
-               style={'textAlign': 'center', 'color': colors['text'], 'marginTop': '30px'})
+        # Footer
+        html.Div([
+            html.Hr(),
+            html.P('© 2025 Gonzalo Ulloa González | Análisis de Supply Chain', 
+                   style={'textAlign': 'center', 'color': colors['text'], 'marginTop': '30px'})
+        ])
     ])
-])
 
-# Callbacks para interactividad
-@app.callback(
-    [Output('kpi-cards', 'children'),
-     Output('revenue-chart', 'figure'),
-     Output('otif-chart', 'figure'),
-     Output('carrier-efficiency', 'figure'),
-     Output('defects-chart', 'figure')],
-    [Input('category-filter', 'value'),
-     Input('carrier-filter', 'value'),
-     Input('transport-filter', 'value')]
-)
-def update_dashboard(category, carrier, transport):
-    # Filtrar datos
-    filtered_df = df.copy()
-    
-    if category != 'ALL':
-        filtered_df = filtered_df[filtered_df['product_type'] == category]
-    if carrier != 'ALL':
-        filtered_df = filtered_df[filtered_df['shipping_carrier'] == carrier]
-    if transport != 'ALL':
-        filtered_df = filtered_df[filtered_df['transportation_mode'] == transport]
-    
-    # Calcular KPIs
-    total_revenue = filtered_df['revenue_generated'].sum()
-    total_products = filtered_df['products_sold'].sum()
-    otif_pct = (filtered_df['otif'].sum() / len(filtered_df) * 100) if len(filtered_df) > 0 else 0
-    avg_defects = filtered_df['defect_rates'].mean()
-    
-    # KPI Cards
-    kpi_cards = html.Div([
+def dropdown_options(column):
+    all_label = 'Todas' if column == 'product_type' else 'Todos'
+    return [{'label': all_label, 'value': 'ALL'}] + \
+           [{'label': value, 'value': value} for value in filter_options[column]]
+
+
+def refresh_session(n_intervals, shown_version):
+    """Con datos nuevos cambia la versión de la página, lo que vuelve a calcular la vista.
+
+    Si la versión es la misma no se envía nada (respuesta 204). En modo
+    clientside viaja el cubo nuevo y el navegador recalcula la vista solo.
+    """
+    version = current_data_version()
+    if version == shown_version:
+        raise PreventUpdate
+    METRICS.inc('session_refreshes')
+    cube_data = cube_payload() if UPDATE_MODE == 'clientside' else no_update
+    return [version, cube_data] + [dropdown_options(col) for col in CUBE_KEYS]
+
+
+def update_dashboard(category, carrier, transport, shown_version=None):
+    """Modo 'full': KPIs y las cuatro figuras completas en cada cambio de filtro.
+
+    `shown_version` (store data-version) solo dispara el callback al refrescar:
+    la versión vigente se consulta igual en el servidor.
+    """
+    # Tiempos por fase en /metrics y en METRICS_LOG; PROFILE=callback perfila cada cálculo
+    timer = PhaseTimer()
+    version = current_data_version()
+    timer.phase('version')
+
+    # Vistas idénticas (mismos filtros y misma versión de datos) salen de la caché
+    def compute():
+        with profile('callback', verbose=False):
+            outputs = serialize_outputs(build_view(category, carrier, transport, version, timer))
+            timer.phase('serialize')
+        return outputs
+
+    outputs, hit = view_cache.get_or_compute((category, carrier, transport, version), compute)
+    cache = 'hit' if hit else 'miss'
+
+    METRICS.inc('callback_cache', result=cache)
+    timer.record('callback', category=category, carrier=carrier, transport=transport,
+                 cache=cache, data_version=version)
+    return outputs
+
+
+def update_dashboard_patch(category, carrier, transport, shown_version, sent_digests):
+    """Modo 'patch': textos de los KPIs y solo los arreglos de los gráficos que cambiaron.
+
+    Las figuras (layout, escalas de color, línea de meta) ya están en el
+    navegador; cada gráfico recibe un Patch con x/y nuevos, o nada si el
+    digest de sus datos es el mismo que ya tiene.
+    """
+    timer = PhaseTimer()
+    version = current_data_version()
+    timer.phase('version')
+
+    def compute():
+        with profile('callback', verbose=False):
+            return view_payload(current_view(category, carrier, transport, version, timer))
+
+    payload, hit = view_cache.get_or_compute(('patch', category, carrier, transport, version), compute)
+    cache = 'hit' if hit else 'miss'
+
+    sent_digests = sent_digests or {}
+    otif_style = Patch()
+    otif_style['color'] = payload['otif_color']
+    outputs = [payload['kpis'][kpi_id] for kpi_id in KPI_IDS] + [otif_style]
+    updated = 0
+    for fig_id, arrays in payload['figures'].items():
+        if sent_digests.get(fig_id) == payload['digests'][fig_id]:
+            outputs.append(no_update)
+            continue
+        figure = Patch()
+        figure['data'][0]['x'] = arrays['x']
+        figure['data'][0]['y'] = arrays['y']
+        figure['data'][0]['marker']['color'] = arrays['y']
+        outputs.append(figure)
+        updated += 1
+    timer.phase('patch')
+
+    METRICS.inc('callback_cache', result=cache)
+    timer.record('callback', category=category, carrier=carrier, transport=transport,
+                 cache=cache, data_version=version, figures_updated=updated)
+    return outputs + [payload['digests']]
+
+
+def serialize_outputs(outputs):
+    # Componentes y figuras a su forma JSON, lista para reenviar sin recalcular
+    return json.loads(json.dumps(outputs, cls=PlotlyJSONEncoder))
+
+
+def format_pct(value, digits):
+    # Sin filas que cumplan los filtros el promedio no existe (NaN): se muestra una raya
+    if value is None or math.isnan(value):
+        return '—'
+    return f"{value:.{digits}f}%"
+
+
+def kpi_texts(view):
+    return {
+        'kpi-revenue': f"${view['total_revenue']:,.0f}",
+        'kpi-products': f"{view['total_products']:,}",
+        'kpi-otif': format_pct(view['otif_pct'], 1),
+        'kpi-defects': format_pct(view['avg_defects'], 2),
+    }
+
+
+def otif_color(otif_pct):
+    return colors['success'] if otif_pct >= OTIF_TARGET else colors['danger']
+
+
+def view_payload(view):
+    """Lo mínimo que cambia entre filtros: textos de KPIs y arreglos x/y por gráfico."""
+    figures = {}
+    for fig_id, (series, x, y) in FIGURE_SERIES.items():
+        frame = view[series]
+        figures[fig_id] = {'x': frame[x].astype(str).tolist(), 'y': frame[y].astype(float).tolist()}
+    digests = {fig_id: hashlib.md5(json.dumps(arrays).encode()).hexdigest()
+               for fig_id, arrays in figures.items()}
+    return {'kpis': kpi_texts(view), 'otif_color': otif_color(view['otif_pct']),
+            'figures': figures, 'digests': digests}
+
+
+def cube_payload():
+    """Cubo de KPIs en columnas, para filtrarlo y agregarlo en el navegador."""
+    columns = {col: cube[col].astype(str).tolist() if col in CUBE_KEYS else cube[col].astype(float).tolist()
+               for col in cube.columns}
+    return {'version': data_version, 'columns': columns, 'colors': colors, 'otif_target': OTIF_TARGET}
+
+
+def initial_outputs(version):
+    """KPIs y figuras base (sin filtros): se construyen una vez por versión de datos."""
+    def compute():
+        view = current_view('ALL', 'ALL', 'ALL', version)
+        kpis, *figures = render_view(view)
+        return {'kpis': kpis, 'figures': dict(zip(FIGURE_SERIES, figures)),
+                'digests': view_payload(view)['digests']}
+
+    initial, _ = view_cache.get_or_compute(('layout', version), compute)
+    return initial
+
+
+def build_view(category, carrier, transport, version, timer=None):
+    timer = timer or PhaseTimer()
+    # Agregar sobre el cubo de KPIs (solo las celdas que cumplen los filtros)
+    view = current_view(category, carrier, transport, version, timer)
+    outputs = render_view(view)
+    timer.phase('figures')
+    return outputs
+
+
+def kpi_cards(view):
+    texts = kpi_texts(view)
+    card_style = {'width': '23%', 'display': 'inline-block', 'backgroundColor': 'white',
+                  'padding': '20px', 'borderRadius': '10px', 'textAlign': 'center'}
+    return html.Div([
         html.Div([
             html.H4('💰 Revenue Total'),
-            html.H2(f'${total_revenue:,.0f}', style={'color': colors['success']})
-        ], style={'width': '23%', 'display': 'inline-block', 'backgroundColor': 'white', 
-                  'padding': '20px', 'borderRadius': '10px', 'marginRight': '2%', 'textAlign': 'center'}),
-        
+            html.H2(texts['kpi-revenue'], id='kpi-revenue', style={'color': colors['success']})
+        ], style={**card_style, 'marginRight': '2%'}),
+
         html.Div([
             html.H4('📦 Productos Vendidos'),
-            html.H2(f'{total_products:,}', style={'color': colors['primary']})
-        ], style={'width': '23%', 'display': 'inline-block', 'backgroundColor': 'white', 
-                  'padding': '20px', 'borderRadius': '10px', 'marginRight': '2%', 'textAlign': 'center'}),
-        
+            html.H2(texts['kpi-products'], id='kpi-products', style={'color': colors['primary']})
+        ], style={**card_style, 'marginRight': '2%'}),
+
         html.Div([
             html.H4('✅ OTIF %'),
-            html.H2(f'{otif_pct:.1f}%', style={'color': colors['success'] if otif_pct >= 95 else colors['danger']})
-        ], style={'width': '23%', 'display': 'inline-block', 'backgroundColor': 'white', 
-                  'padding': '20px', 'borderRadius': '10px', 'marginRight': '2%', 'textAlign': 'center'}),
-        
+            html.H2(texts['kpi-otif'], id='kpi-otif', style={'color': otif_color(view['otif_pct'])})
+        ], style={**card_style, 'marginRight': '2%'}),
+
         html.Div([
             html.H4('⚠️ Defectos Prom'),
-            html.H2(f'{avg_defects:.2f}%', style={'color': colors['warning']})
-        ], style={'width': '23%', 'display': 'inline-block', 'backgroundColor': 'white', 
-                  'padding': '20px', 'borderRadius': '10px', 'textAlign': 'center'})
+            html.H2(texts['kpi-defects'], id='kpi-defects', style={'color': colors['warning']})
+        ], style=card_style)
     ])
-    
+
+
+def render_view(view):
+    """Tarjetas de KPIs y las cuatro figuras completas de una vista."""
     # Gráfico 1: Revenue por categoría
-    revenue_by_cat = filtered_df.groupby('product_type')['revenue_generated'].sum().reset_index()
+    revenue_by_cat = view['revenue_by_cat']
     fig_revenue = px.bar(revenue_by_cat, x='product_type', y='revenue_generated',
                         title='Revenue por Categoría',
                         labels={'product_type': 'Categoría', 'revenue_generated': 'Revenue ($)'},
@@ -206,18 +468,17 @@ def update_dashboard(category, carrier, transport):
     fig_revenue.update_layout(showlegend=False)
     
     # Gráfico 2: OTIF por categoría
-    otif_by_cat = filtered_df.groupby('product_type')['otif'].mean().reset_index()
-    otif_by_cat['otif'] = otif_by_cat['otif'] * 100
+    otif_by_cat = view['otif_by_cat']
     fig_otif = px.bar(otif_by_cat, x='product_type', y='otif',
                      title='OTIF % por Categoría',
                      labels={'product_type': 'Categoría', 'otif': 'OTIF (%)'},
                      color='otif',
                      color_continuous_scale='Greens')
-    fig_otif.add_hline(y=95, line_dash="dash", line_color="red", annotation_text="Meta 95%")
+    fig_otif.add_hline(y=OTIF_TARGET, line_dash="dash", line_color="red", annotation_text="Meta 95%")
     fig_otif.update_layout(showlegend=False)
     
     # Gráfico 3: Eficiencia por carrier
-    carrier_eff = filtered_df.groupby('shipping_carrier')['shipping_costs'].mean().reset_index()
+    carrier_eff = view['carrier_eff']
     fig_carrier = px.bar(carrier_eff, x='shipping_carrier', y='shipping_costs',
                         title='Costo Promedio por Carrier',
                         labels={'shipping_carrier': 'Carrier', 'shipping_costs': 'Costo ($)'},
@@ -226,15 +487,58 @@ def update_dashboard(category, carrier, transport):
     fig_carrier.update_layout(showlegend=False)
     
     # Gráfico 4: Defectos
-    defects_by_cat = filtered_df.groupby('product_type')['defect_rates'].mean().reset_index()
+    defects_by_cat = view['defects_by_cat']
     fig_defects = px.bar(defects_by_cat, x='product_type', y='defect_rates',
                         title='Tasa de Defectos por Categoría',
                         labels={'product_type': 'Categoría', 'defect_rates': 'Defectos (%)'},
                         color='defect_rates',
                         color_continuous_scale='Oranges')
     fig_defects.update_layout(showlegend=False)
-    
-    return kpi_cards, fig_revenue, fig_otif, fig_carrier, fig_defects
+
+    return [kpi_cards(view), fig_revenue, fig_otif, fig_carrier, fig_defects]
+
+
+# El layout se arma en cada carga de página (Dash lo llama también al registrarlo)
+app.layout = serve_layout
+
+# Callbacks para interactividad
+FILTER_INPUTS = [Input('category-filter', 'value'),
+                 Input('carrier-filter', 'value'),
+                 Input('transport-filter', 'value')]
+KPI_OUTPUTS = [Output(kpi_id, 'children') for kpi_id in KPI_IDS] + [Output('kpi-otif', 'style')]
+FIGURE_OUTPUTS = [Output(fig_id, 'figure') for fig_id in FIGURE_SERIES]
+VERSION_INPUT = Input('data-version', 'data')
+
+if UPDATE_MODE == 'clientside':
+    app.clientside_callback(
+        ClientsideFunction(namespace='dashboard', function_name='updateView'),
+        KPI_OUTPUTS + FIGURE_OUTPUTS,
+        FILTER_INPUTS + [Input('cube-store', 'data')],
+        [State('kpi-otif', 'style')] + [State(fig_id, 'figure') for fig_id in FIGURE_SERIES],
+    )
+elif UPDATE_MODE == 'patch':
+    app.callback(KPI_OUTPUTS + FIGURE_OUTPUTS + [Output('figure-digests', 'data')],
+                 FILTER_INPUTS + [VERSION_INPUT, State('figure-digests', 'data')])(update_dashboard_patch)
+else:
+    app.callback([Output('kpi-cards', 'children')] + FIGURE_OUTPUTS,
+                 FILTER_INPUTS + [VERSION_INPUT])(update_dashboard)
+
+app.callback([Output('data-version', 'data'), Output('cube-store', 'data')] +
+             [Output(filter_id, 'options') for filter_id in ['category-filter', 'carrier-filter', 'transport-filter']],
+             Input('refresh-interval', 'n_intervals'),
+             State('data-version', 'data'))(refresh_session)
+
+# Contadores de la caché (hits/misses) para monitorear despliegues con carga
+@app.server.route('/cache-stats')
+def cache_stats():
+    return jsonify({**view_cache.stats(), 'data_version': current_data_version()})
+
+# Métricas en formato Prometheus: fases de los callbacks y estado de la caché
+@app.server.route('/metrics')
+def metrics():
+    for name, value in view_cache.stats().items():
+        METRICS.set(f'view_cache_{name}', value)
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
 
 # Ejecutar app
 if __name__ == '__main__':
@@ -0,0 +1,123 @@
+import pandas as pd
+import pymysql
+
+from db import get_pool
+from etl_state import get_data_version
+from etl_transform import SOURCE_ROW
+from fact_model import build_fact_table
+from frame_dtypes import optimize_dtypes
+from staging import read_manifest, read_staged
+
+# Columnas que usan los KPIs y gráficos (para leer solo esas desde staging)
+DASHBOARD_COLUMNS = ['sku', 'product_type', 'shipping_carrier', 'transportation_mode',
+                     'revenue_generated', 'products_sold', 'stock_levels', 'shipping_times',
+                     'shipping_costs', 'defect_rates']
+
+
+# Tablas que forman la tabla de hechos del dashboard
+FACT_TABLES = ['products', 'sales', 'logistics', 'production']
+
+
+def read_fact_tables(connection, skus=None, batch_size=5000):
+    """Tablas de origen de la tabla de hechos; con `skus`, solo las filas de esos SKU.
+
+    Los SKU se consultan de a `batch_size` por IN (usa los índices que
+    empiezan por sku), para no armar una consulta gigante.
+    """
+    if skus is None:
+        return {table: pd.read_sql(f"SELECT * FROM {table}", connection) for table in FACT_TABLES}
+    skus = list(skus)
+    tables = {}
+    for table in FACT_TABLES:
+        parts = [
+            pd.read_sql(f"SELECT * FROM {table} WHERE sku IN ({', '.join(['%s'] * len(batch))})",
+                        connection, params=batch)
+            for batch in (skus[start:start + batch_size] for start in range(0, len(skus), batch_size))
+        ]
+        if not parts:
+            parts = [pd.read_sql(f"SELECT * FROM {table} LIMIT 0", connection)]
+        tables[table] = pd.concat(parts, ignore_index=True)
+    return tables
+
+
+def load_from_mysql(pool=None):
+    """Tabla de hechos desde MySQL y su versión (última corrida exitosa del ETL)."""
+    with (pool or get_pool()).connection() as connection:
+        tables = read_fact_tables(connection)
+
+        # Versión de datos = última corrida exitosa del ETL (invalida la caché al recargar)
+        try:
+            with connection.cursor() as cursor:
+                data_version = get_data_version(cursor)
+        except pymysql.err.ProgrammingError:
+            data_version = 'sin-etl-runs'
+
+    # Consolidar datos: todas las ventas con la última versión por SKU de cada
+    # dimensión, join por clave entera y control de cardinalidad
+    fact = build_fact_table(tables['sales'], tables['products'], tables['logistics'], tables['production'])
+    return fact, data_version
+
+
+def staging_version():
+    return f"staging-{read_manifest()['checksum'][:12]}"
+
+
+def is_staging_version(version):
+    return version.startswith('staging-')
+
+
+def load_from_staging(columns=DASHBOARD_COLUMNS):
+    # El staging en Parquet ya tiene una fila por venta con todas las columnas
+    df = read_staged(columns=columns).drop(columns=SOURCE_ROW, errors='ignore')
+    return df, staging_version()
+
+
+def load_dataset(pool=None, columns=DASHBOARD_COLUMNS):
+    """MySQL si está disponible; si no, el staging de data/processed/.
+
+    `columns` solo aplica al staging (None = todas); MySQL entrega la tabla de hechos completa.
+    """
+    try:
+        return load_from_mysql(pool)
+    except pymysql.err.OperationalError as e:
+        print(f"⚠️  MySQL no disponible ({e}); usando el staging de data/processed/")
+        return load_from_staging(columns)
+
+
+def dataset_version(pool=None):
+    """Versión de los datos sin leerlos: última corrida del ETL o checksum del staging."""
+    try:
+        with (pool or get_pool()).connection() as connection:
+            with connection.cursor() as cursor:
+                return get_data_version(cursor)
+    except pymysql.err.ProgrammingError:
+        return 'sin-etl-runs'
+    except pymysql.err.OperationalError as e:
+        print(f"⚠️  MySQL no disponible ({e}); usando el staging de data/processed/")
+        return staging_version()
+
+
+def shipping_time_medians(df):
+    return df.groupby('transportation_mode', observed=True)['shipping_times'].median()
+
+
+def add_otif_flags(df, medians=None):
+    """Calcular OTIF (lógica corregida); los indicadores son bool (1 byte por fila).
+
+    `medians` (tiempo de envío esperado por modo) permite calcular los flags
+    de un bloque de filas nuevas con las medianas de todo el dataset.
+    """
+    if medians is None:
+        medians = shipping_time_medians(df)
+    df['expected_shipping_time'] = df['transportation_mode'].map(medians).astype('float64')
+    df['on_time'] = (df['shipping_times'] <= df['expected_shipping_time']).fillna(False).astype(bool)
+    df['in_full'] = (df['stock_levels'] >= df['products_sold']).fillna(False).astype(bool)  # CORREGIDO
+    df['otif'] = df['on_time'] & df['in_full']
+    return df
+
+
+def prepare_frame(df, compact=True):
+    """Tipos compactos (ver frame_dtypes.py) y flags OTIF: el DataFrame que usa el dashboard."""
+    if compact:
+        df = optimize_dtypes(df)
+    return add_otif_flags(df)
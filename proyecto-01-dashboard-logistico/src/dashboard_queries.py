@@ -0,0 +1,117 @@
+import pandas as pd
+
+from etl_state import get_data_version
+from kpi_cube import CUBE_KEYS, CUBE_MEASURES
+
+# Última versión por SKU de logística y producción, igual que build_fact_table
+# en memoria: son atributos del SKU y el join con sales debe ser muchos-a-uno
+# (products ya tiene sku UNIQUE). Las ventas no se reducen: el ETL reemplaza
+# las filas recargadas por source_row, así que cada fila de sales es una venta.
+# MAX(id) GROUP BY sku se resuelve sobre los índices que empiezan por sku.
+LATEST_ROWS_CTES = ",\n".join(
+    f"""    latest_{table} AS (
+        SELECT t.* FROM {table} t
+        JOIN (SELECT MAX(id) AS id FROM {table} GROUP BY sku) v ON v.id = t.id
+    )"""
+    for table in ['logistics', 'production']
+)
+
+# Mediana de shipping_times por modo de transporte, sobre el mismo cruce
+# ventas x logística que usa el modo en memoria (MySQL 8 no tiene MEDIAN)
+MEDIANS_QUERY = "WITH\n" + LATEST_ROWS_CTES + """,
+    ranked AS (
+        SELECT l.transportation_mode, l.shipping_times,
+               ROW_NUMBER() OVER (PARTITION BY l.transportation_mode ORDER BY l.shipping_times) AS rn,
+               COUNT(*) OVER (PARTITION BY l.transportation_mode) AS cnt
+        FROM sales s
+        JOIN latest_logistics l ON l.sku = s.sku
+        WHERE l.shipping_times IS NOT NULL
+    )
+    SELECT transportation_mode, AVG(shipping_times) AS median_time
+    FROM ranked
+    WHERE rn IN (FLOOR((cnt + 1) / 2), FLOOR((cnt + 2) / 2))
+    GROUP BY transportation_mode
+"""
+
+# Celdas del cubo de KPIs para los filtros elegidos ('ALL' = sin filtro).
+# {expected_time} se reemplaza por un CASE parametrizado con las medianas.
+CUBE_QUERY = "WITH\n" + LATEST_ROWS_CTES + """
+    SELECT p.product_type, l.shipping_carrier, l.transportation_mode,
+           SUM(s.revenue_generated) AS revenue_sum,
+           SUM(s.products_sold) AS products_sold_sum,
+           SUM(CASE WHEN l.shipping_times <= {expected_time}
+                     AND p.stock_levels >= s.products_sold THEN 1 ELSE 0 END) AS otif_count,
+           COUNT(*) AS row_count,
+           SUM(pr.defect_rates) AS defect_sum,
+           COUNT(pr.defect_rates) AS defect_count,
+           SUM(l.shipping_costs) AS shipping_cost_sum,
+           COUNT(l.shipping_costs) AS shipping_cost_count
+    FROM sales s
+    LEFT JOIN products p ON p.sku = s.sku
+    LEFT JOIN latest_logistics l ON l.sku = s.sku
+    LEFT JOIN latest_production pr ON pr.sku = s.sku
+    WHERE (%s = 'ALL' OR p.product_type = %s)
+      AND (%s = 'ALL' OR l.shipping_carrier = %s)
+      AND (%s = 'ALL' OR l.transportation_mode = %s)
+    GROUP BY p.product_type, l.shipping_carrier, l.transportation_mode
+"""
+
+FILTER_OPTIONS_QUERIES = {
+    'product_type': "SELECT DISTINCT product_type FROM products WHERE product_type IS NOT NULL",
+    'shipping_carrier': "SELECT DISTINCT shipping_carrier FROM logistics WHERE shipping_carrier IS NOT NULL",
+    'transportation_mode': "SELECT DISTINCT transportation_mode FROM logistics WHERE transportation_mode IS NOT NULL",
+}
+
+
+class SQLDashboardSource:
+    """Fuente de datos del dashboard que agrega en MySQL en cada callback.
+
+    Las medianas OTIF se calculan en SQL una vez por versión de datos y se
+    reutilizan hasta la siguiente corrida del ETL.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._medians = {}
+
+    def data_version(self):
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                return get_data_version(cursor)
+
+    def filter_options(self):
+        options = {}
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                for col, query in FILTER_OPTIONS_QUERIES.items():
+                    cursor.execute(query)
+                    options[col] = [row[0] for row in cursor.fetchall()]
+        return options
+
+    def medians(self, data_version):
+        if data_version not in self._medians:
+            with self.pool.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(MEDIANS_QUERY)
+                    self._medians = {data_version: {mode: float(median) for mode, median in cursor.fetchall()}}
+        return self._medians[data_version]
+
+    def fetch_cube(self, category, carrier, transport, data_version):
+        medians = self.medians(data_version)
+        if medians:
+            expected_time = ('CASE l.transportation_mode '
+                             + ' '.join(['WHEN %s THEN %s'] * len(medians)) + ' END')
+            case_params = [value for item in medians.items() for value in item]
+        else:
+            expected_time, case_params = 'NULL', []
+
+        params = case_params + [category, category, carrier, carrier, transport, transport]
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(CUBE_QUERY.format(expected_time=expected_time), params)
+                rows = cursor.fetchall()
+
+        cube = pd.DataFrame(list(rows), columns=CUBE_KEYS + list(CUBE_MEASURES))
+        # DECIMAL llega como Decimal: pasar las medidas a float para agregarlas
+        cube[list(CUBE_MEASURES)] = cube[list(CUBE_MEASURES)].astype('float64')
+        return cube
@@ -0,0 +1,170 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join('..', '.env'))
+
+# Segundos que una conexión puede quedar ociosa antes de verificarla con ping
+DEFAULT_CHECK_AFTER = 30
+# Errores que indican una conexión caída o inutilizable (no un error de la consulta)
+CONNECTION_ERRORS = (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+
+
+def db_config(with_database=True, **overrides):
+    """Configuración de conexión MySQL a partir de las variables de entorno."""
+    config = {
+        'host': os.getenv('DB_HOST'),
+        'port': int(os.getenv('DB_PORT', 3306)),
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+    }
+    if with_database:
+        config['database'] = os.getenv('DB_NAME')
+    config.update(overrides)
+    return config
+
+
+def connect(with_database=True, **overrides):
+    """Conexión suelta (sin pool), p. ej. para crear la base de datos."""
+    return pymysql.connect(**db_config(with_database, **overrides))
+
+
+def ping(conn):
+    """Chequeo de salud: ping en MySQL, SELECT 1 en otros drivers (p. ej. sqlite3)."""
+    if hasattr(conn, 'ping'):
+        conn.ping(reconnect=False)
+    else:
+        conn.cursor().execute('SELECT 1')
+
+
+class ConnectionPool:
+    """Pool acotado y thread-safe: las conexiones se crean a demanda y se reutilizan.
+
+    Una conexión ociosa por más de `check_after` segundos se verifica con
+    `health_check` antes de entregarla; si falló, se descarta y se abre otra.
+    `factory` es cualquier función que devuelva una conexión DB-API, así el
+    pool funciona igual con pymysql o con sqlite3 como reemplazo local.
+    `broken_errors` son las excepciones que dejan la conexión inutilizable
+    (ver `connection`).
+    """
+
+    def __init__(self, factory, maxsize=5, timeout=None, check_after=DEFAULT_CHECK_AFTER,
+                 health_check=ping, broken_errors=CONNECTION_ERRORS):
+        self.factory = factory
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.check_after = check_after
+        self.health_check = health_check
+        self.broken_errors = broken_errors
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(maxsize)
+        # Los contadores se actualizan desde varios hilos a la vez
+        self._counter_lock = threading.Lock()
+        self.created = 0
+        self.reconnects = 0
+
+    def _checkout(self):
+        while True:
+            try:
+                conn, idle_since = self._idle.get_nowait()
+            except queue.Empty:
+                with self._counter_lock:
+                    self.created += 1
+                return self.factory()
+            if time.monotonic() - idle_since < self.check_after:
+                return conn
+            try:
+                self.health_check(conn)
+                return conn
+            except Exception:
+                # Conexión caída (timeout del servidor, reinicio): descartar y probar otra
+                with self._counter_lock:
+                    self.reconnects += 1
+                self._discard(conn)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """Toma una conexión del pool; devolverla con `release`."""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No hay conexiones libres en el pool (máximo {self.maxsize})")
+        try:
+            return self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        """Devuelve una conexión al pool (o la descarta si quedó inutilizable)."""
+        try:
+            if not broken:
+                try:
+                    # Cerrar cualquier transacción abierta para que el próximo uso vea datos frescos
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            if broken:
+                self._discard(conn)
+            else:
+                self._idle.put((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Conexión del pool para un bloque `with`.
+
+        Si el bloque falla por la conexión (OperationalError/InterfaceError)
+        se descarta; ante cualquier otro error se revierte la transacción y
+        la conexión vuelve al pool.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except self.broken_errors:
+            self.release(conn, broken=True)
+            raise
+        except Exception:
+            # release hace rollback (y descarta la conexión si eso falla)
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait()[0])
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(maxsize=None, **overrides):
+    """Pool compartido del proceso (uno por configuración y tamaño), creado en el primer uso.
+
+    No abre conexiones al crearse: la primera se abre en el primer `acquire`.
+    `overrides` se agrega a la configuración de db_config (p. ej. local_infile).
+    El tamaño es parte de la clave: get_pool(maxsize=10) nunca devuelve un
+    pool más chico creado antes con la misma configuración.
+    """
+    maxsize = maxsize or int(os.getenv('DB_POOL_SIZE', 5))
+    key = (maxsize, tuple(sorted(overrides.items())))
+    with _pool_lock:
+        if key not in _pools:
+            config = db_config(**overrides)
+            _pools[key] = ConnectionPool(lambda: pymysql.connect(**config), maxsize=maxsize,
+                                         timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)))
+        return _pools[key]
@@ -1,169 +1,262 @@
-import pymysql
-import pandas as pd
 from dotenv import load_dotenv
+import itertools
 import os
-from datetime import datetime
+import time
+from db import get_pool
+from bulk_loader import DEFAULT_CHUNK_SIZE, LOAD_STEPS, accumulate_stats, load_table, print_load_summary
+from etl_transform import split_tables
+from ingest import DEFAULT_READ_CHUNK_SIZE
+from migrations import PARTITIONED_TABLES, add_month_partitions
+from instrumentation import start_profile, stop_profile, track_run, track_stage, write_textfile
+from parallel_load import DEFAULT_QUEUE_SIZE, ParallelLoader
+from snapshot import publish_snapshot
+from staging import read_staged, stage_chunks, stage_raw
+from etl_state import (HASHED_TABLES, KnownHashes, add_row_hash, fetch_row_hashes, file_checksum,
+                       finish_run, last_successful_checksum, start_run)
 
 # Cargar variables de entorno
 load_dotenv()
 
-# Configuración de conexión MySQL
-config = {
-    'host': os.getenv('DB_HOST'),
-    'port': int(os.getenv('DB_PORT')),
-    'user': os.getenv('DB_USER'),
-    'password': os.getenv('DB_PASSWORD'),
-    'database': os.getenv('DB_NAME')
-}
-
-print("=" * 60)
-print("     INICIANDO ETL PIPELINE")
-print("=" * 60)
-
-# ========================================
-# PASO 1: EXTRACCIÓN (Extract)
-# ========================================
-print("\n PASO 1: EXTRAYENDO DATOS DEL CSV...")
-
-# Leer CSV desde data/raw/
-data_path = os.path.join('..', 'data', 'raw', 'supply_chain_data.csv')
-df = pd.read_csv(data_path)
-
-print(f"✅ Datos extraídos: {df.shape[0]} registros, {df.shape[1]} columnas")
-
-# ========================================
-# PASO 2: TRANSFORMACIÓN (Transform)
-# ========================================
-print("\n PASO 2: TRANSFORMANDO DATOS...")
-
-# 2.1 - Limpiar nombres de columnas (quitar espacios)
-df.columns = df.columns.str.strip()
-
-# 2.2 - Crear dataframes separados por tabla
-products_df = df[['Product type', 'SKU', 'Price', 'Availability', 'Stock levels']].copy()
-products_df.columns = ['product_type', 'sku', 'price', 'availability', 'stock_levels']
-
-# Eliminar duplicados por SKU
-products_df = products_df.drop_duplicates(subset=['sku'])
-
-# 2.3 - Tabla de proveedores (Suppliers)
-suppliers_df = df[['Supplier name', 'Location', 'Lead time']].copy()
-suppliers_df.columns = ['supplier_name', 'location', 'lead_time']
-suppliers_df = suppliers_df.drop_duplicates(subset=['supplier_name'])
-
-# 2.4 - Tabla de ventas (Sales)
-sales_df = df[['SKU', 'Number of products sold', 'Revenue generated', 'Customer demographics']].copy()
-sales_df.columns = ['sku', 'products_sold', 'revenue_generated', 'customer_demographics']
-
-# 2.5 - Tabla de logística (Logistics)
-logistics_df = df[['SKU', 'Shipping times', 'Shipping carriers', 'Shipping costs', 
-                    'Transportation modes', 'Routes', 'Costs']].copy()
-logistics_df.columns = ['sku', 'shipping_times', 'shipping_carrier', 'shipping_costs',
-                        'transportation_mode', 'route', 'total_costs']
-
-# 2.6 - Tabla de producción (Production)
-production_df = df[['SKU', 'Production volumes', 'Manufacturing lead time', 
-                     'Manufacturing costs', 'Inspection results', 'Defect rates']].copy()
-production_df.columns = ['sku', 'production_volumes', 'manufacturing_lead_time',
-                         'manufacturing_costs', 'inspection_results', 'defect_rates']
-
-print(f"✅ Datos transformados:")
-print(f"   - Productos: {len(products_df)} registros únicos")
-print(f"   - Proveedores: {len(suppliers_df)} registros únicos")
-print(f"   - Ventas: {len(sales_df)} registros")
-print(f"   - Logística: {len(logistics_df)} registros")
-print(f"   - Producción: {len(production_df)} registros")
-
-# ========================================
-# PASO 3: CARGA (Load)
-# ========================================
-print("\n PASO 3: CARGANDO DATOS A MYSQL...")
-
-try:
+# Modo de carga: 'bulk' (lotes multi-fila), 'infile' (LOAD DATA LOCAL INFILE)
+# o 'row' (fila por fila, solo para comparar)
+load_mode = os.getenv('ETL_LOAD_MODE', 'bulk')
+chunk_size = int(os.getenv('ETL_CHUNK_SIZE', DEFAULT_CHUNK_SIZE))
+
+# Modo streaming: lee, transforma y carga el CSV de a bloques acotados
+streaming = os.getenv('ETL_STREAMING', '0') == '1'
+read_chunk_size = int(os.getenv('ETL_READ_CHUNK_SIZE', DEFAULT_READ_CHUNK_SIZE))
+
+# Modo incremental: solo carga filas nuevas/modificadas y omite archivos sin cambios
+incremental = os.getenv('ETL_INCREMENTAL', '0') == '1'
+
+# Modo paralelo: productos primero y luego una conexión/hilo por tabla, con
+# colas acotadas para solapar la transformación del siguiente chunk
+parallel = os.getenv('ETL_PARALLEL', '0') == '1'
+# El RSS pico por etapa solo se puede atribuir si las etapas no se solapan
+sample_memory = not parallel
+queue_size = int(os.getenv('ETL_QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+
+
+def load_tables(cursor, tables, load_stats, known_hashes=None, verbose=True):
+    for label, table, update_columns in LOAD_STEPS:
+        table_df = add_row_hash(tables[table])
+        if known_hashes is not None:
+            table_df = known_hashes[table].filter_new(table_df)
+        if verbose:
+            print(f"\n   Cargando {label}...")
+        stats = load_table(cursor, table, table_df, mode=load_mode,
+                           chunk_size=chunk_size, update_columns=update_columns,
+                           sample_memory=sample_memory)
+        accumulate_stats(load_stats, stats)
+        if verbose:
+            print(f"   ✅ {stats['rows']} registros de {label} cargados "
+                  f"({stats['rows_per_sec']:,.0f} filas/s)")
+
+
+def run(pool):
+    """Extrae, transforma y carga el CSV; vuelve sin cargar si el archivo no cambió (incremental)."""
+    # Leer CSV desde data/raw/
+    data_path = os.path.join('..', 'data', 'raw', 'supply_chain_data.csv')
+    load_stats = {}
+    checksum = file_checksum(data_path)
+
+    if incremental:
+        # Si el archivo no cambió desde la última carga exitosa, no hay nada que hacer
+        with pool.connection() as check_connection:
+            with check_connection.cursor() as check_cursor:
+                previous_checksum = last_successful_checksum(check_cursor, data_path)
+
+        if previous_checksum == checksum:
+            print("\n⏭️  El archivo no cambió desde la última carga exitosa: nada que cargar")
+            return
+
+    if not streaming:
+        # ========================================
+        # PASO 1: EXTRACCIÓN (Extract)
+        # ========================================
+        print("\n PASO 1: EXTRAYENDO DATOS DEL CSV...")
+
+        # El CSV se parsea a Parquet (data/processed/) solo si cambió desde la última vez
+        with track_stage('extract', sample_memory=sample_memory) as info:
+            manifest = stage_raw(data_path, chunk_size=read_chunk_size)
+            df = read_staged()
+            info['rows'] = len(df)
+            info['bytes'] = os.path.getsize(data_path)
+
+        print(f"✅ Datos extraídos: {df.shape[0]} registros, {df.shape[1]} columnas "
+              f"(staging del {manifest['created_at']})")
+
+        # ========================================
+        # PASO 2: TRANSFORMACIÓN (Transform)
+        # ========================================
+        print("\n PASO 2: TRANSFORMANDO DATOS...")
+
+        # 2.1 - Crear dataframes separados por tabla (productos y proveedores sin duplicados)
+        with track_stage('transform', sample_memory=sample_memory) as info:
+            tables = split_tables(df)
+            info['rows'] = len(df)
+
+        print(f"✅ Datos transformados:")
+        print(f"   - Productos: {len(tables['products'])} registros únicos")
+        print(f"   - Proveedores: {len(tables['suppliers'])} registros únicos")
+        print(f"   - Ventas: {len(tables['sales'])} registros")
+        print(f"   - Logística: {len(tables['logistics'])} registros")
+        print(f"   - Producción: {len(tables['production'])} registros")
+
+    # ========================================
+    # PASO 3: CARGA (Load)
+    # ========================================
+    if streaming:
+        print(f"\n PASOS 1-3: EXTRAYENDO, TRANSFORMANDO Y CARGANDO EN STREAMING "
+              f"(chunks de {read_chunk_size:,} filas, modo: {load_mode})...")
+    else:
+        print(f"\n PASO 3: CARGANDO DATOS A MYSQL (modo: {load_mode})...")
+
+    run_id = None
+    loader = None
     # Conectar a MySQL
-    connection = pymysql.connect(**config)
+    connection = pool.acquire()
     cursor = connection.cursor()
-    
-    # 3.1 - Cargar productos (primero porque otras tablas tienen FK)
-    print("\n   Cargando productos...")
-    for _, row in products_df.iterrows():
-        cursor.execute("""
-            INSERT INTO products (product_type, sku, price, availability, stock_levels)
-            VALUES (%s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-            price = VALUES(price),
-            availability = VALUES(availability),
-            stock_levels = VALUES(stock_levels)
-        """, tuple(row))
-    print(f"   ✅ {len(products_df)} productos cargados")
-    
-    # 3.2 - Cargar proveedores
-    print("\n   Cargando proveedores...")
-    for _, row in suppliers_df.iterrows():
-        cursor.execute("""
-            INSERT INTO suppliers (supplier_name, location, lead_time)
-            VALUES (%s, %s, %s)
-        """, tuple(row))
-    print(f"   ✅ {len(suppliers_df)} proveedores cargados")
-    
-    # 3.3 - Cargar ventas
-    print("\n   Cargando ventas...")
-    for _, row in sales_df.iterrows():
-        cursor.execute("""
-            INSERT INTO sales (sku, products_sold, revenue_generated, customer_demographics)
-            VALUES (%s, %s, %s, %s)
-        """, tuple(row))
-    print(f"   ✅ {len(sales_df)} registros de ventas cargados")
-    
-    # 3.4 - Cargar logística
-    print("\n   Cargando logística...")
-    for _, row in logistics_df.iterrows():
-        cursor.execute("""
-            INSERT INTO logistics (sku, shipping_times, shipping_carrier, shipping_costs,
-                                 transportation_mode, route, total_costs)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, tuple(row))
-    print(f"   ✅ {len(logistics_df)} registros de logística cargados")
-    
-    # 3.5 - Cargar producción
-    print("\n   Cargando producción...")
-    for _, row in production_df.iterrows():
-        cursor.execute("""
-            INSERT INTO production (sku, production_volumes, manufacturing_lead_time,
-                                  manufacturing_costs, inspection_results, defect_rates)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, tuple(row))
-    print(f"   ✅ {len(production_df)} registros de producción cargados")
-    
-    # Commit de todas las transacciones
-    connection.commit()
-    
-    print("\n" + "=" * 60)
-    print(" ETL PIPELINE COMPLETADO EXITOSAMENTE")
+    try:
+        # Con sales/logistics particionadas por mes de carga, las particiones de los
+        # próximos meses se crean antes de que lleguen sus filas (DDL: va antes de la corrida)
+        for table in PARTITIONED_TABLES:
+            added = add_month_partitions(cursor, table)
+            if added:
+                print(f"🗓️  Particiones nuevas en {table}: {', '.join(added)}")
+
+        # Registrar la corrida (se confirma de inmediato para dejar rastro aunque falle)
+        run_id = start_run(cursor, data_path, checksum, 'incremental' if incremental else 'full')
+        connection.commit()
+
+        # En modo incremental, hashes de las filas ya cargadas por tabla
+        known_hashes = None
+        if incremental:
+            known_hashes = {table: KnownHashes(fetch_row_hashes(cursor, table)) for table in HASHED_TABLES}
+
+        if parallel:
+            loader = ParallelLoader(connection, pool, LOAD_STEPS,
+                                    mode=load_mode, chunk_size=chunk_size,
+                                    known_hashes=known_hashes, queue_size=queue_size)
+
+        rows_read = 0
+        load_start = time.perf_counter()
+        with track_stage('load', sample_memory=sample_memory, mode=load_mode, parallel=parallel) as load_info:
+            if streaming:
+                # Cada bloque del CSV se pasa a staging y se carga en la misma vuelta,
+                # en el orden del archivo (el último upsert de una clave es su última fila)
+                chunks = stage_chunks(data_path, chunk_size=read_chunk_size)
+                for chunk_number in itertools.count(1):
+                    with track_stage('extract', sample_memory=sample_memory, chunk=chunk_number) as info:
+                        chunk = next(chunks, None)
+                        info['rows'] = len(chunk) if chunk is not None else 0
+                    if chunk is None:
+                        break
+                    with track_stage('transform', sample_memory=sample_memory, chunk=chunk_number) as info:
+                        tables = split_tables(chunk)
+                        info['rows'] = len(chunk)
+                    if loader is not None:
+                        loader.submit(tables)
+                    else:
+                        load_tables(cursor, tables, load_stats, known_hashes, verbose=False)
+                    rows_read += len(chunk)
+                    print(f"   ✅ Chunk {chunk_number}: {len(chunk):,} filas procesadas "
+                          f"(acumulado: {rows_read:,})")
+                    # Liberar el chunk antes de leer el siguiente
+                    del chunk, tables
+            elif loader is not None:
+                loader.submit(tables)
+                rows_read = len(df)
+            else:
+                load_tables(cursor, tables, load_stats, known_hashes)
+                rows_read = len(df)
+
+            if loader is not None:
+                # Espera a los hilos de carga y confirma productos y sus conexiones
+                load_stats = loader.finish()
+                loader = None
+            load_info['rows'] = sum(stats['rows'] for stats in load_stats.values())
+
+        print_load_summary(load_stats.values())
+        print(f"\n⏱️  Carga {'paralela' if parallel else 'serial'} completada en "
+              f"{time.perf_counter() - load_start:.2f} s")
+
+        # Cerrar la corrida y hacer commit de todas las transacciones juntas
+        rows_loaded = load_info['rows']
+        finish_run(cursor, run_id, 'success', rows_read, rows_loaded)
+        connection.commit()
+
+        print("\n" + "=" * 60)
+        print(" ETL PIPELINE COMPLETADO EXITOSAMENTE")
+        print("=" * 60)
+
+        # Verificar datos cargados
+        cursor.execute("SELECT COUNT(*) FROM products")
+        print(f"\n📊 Resumen final:")
+        print(f"   Productos en BD: {cursor.fetchone()[0]}")
+
+        cursor.execute("SELECT COUNT(*) FROM suppliers")
+        print(f"   Proveedores en BD: {cursor.fetchone()[0]}")
+
+        cursor.execute("SELECT COUNT(*) FROM sales")
+        print(f"   Ventas en BD: {cursor.fetchone()[0]}")
+
+        cursor.execute("SELECT COUNT(*) FROM logistics")
+        print(f"   Logística en BD: {cursor.fetchone()[0]}")
+
+        cursor.execute("SELECT COUNT(*) FROM production")
+        print(f"   Producción en BD: {cursor.fetchone()[0]}")
+
+        # Snapshot para el dashboard en modo 'snapshot': los workers cambian a la
+        # versión nueva en su siguiente callback, sin reiniciarse
+        if os.getenv('DASHBOARD_SNAPSHOT', '0') == '1':
+            try:
+                pointer = publish_snapshot(pool)
+                print(f"\n📸 Snapshot del dashboard publicado: {pointer['version']} "
+                      f"({pointer['rows']:,} filas)")
+            except Exception as e:
+                # La carga ya está confirmada: un snapshot fallido no invalida la corrida
+                print(f"\n⚠️  No se pudo publicar el snapshot del dashboard: {e}")
+
+    except Exception as e:
+        print(f"\n❌ Error durante el ETL: {e}")
+        if loader is not None:
+            # Revierte productos y tablas dependientes: nada se confirmó todavía
+            loader.abort()
+        connection.rollback()
+        if run_id is not None:
+            finish_run(cursor, run_id, 'failed')
+            connection.commit()
+
+    finally:
+        cursor.close()
+        pool.release(connection)
+        print("\n🔒 Conexión cerrada")
+
+
+def main():
     print("=" * 60)
-    
-    # Verificar datos cargados
-    cursor.execute("SELECT COUNT(*) FROM products")
-    print(f"\n📊 Resumen final:")
-    print(f"   Productos en BD: {cursor.fetchone()[0]}")
-    
-    cursor.execute("SELECT COUNT(*) FROM suppliers")
-    print(f"   Proveedores en BD: {cursor.fetchone()[0]}")
-    
-    cursor.execute("SELECT COUNT(*) FROM sales")
-    print(f"   Ventas en BD: {cursor.fetchone()[0]}")
-    
-    cursor.execute("SELECT COUNT(*) FROM logistics")
-    print(f"   Logística en BD: {cursor.fetchone()[0]}")
-    
-    cursor.execute("SELECT COUNT(*) FROM production")
-    print(f"   Producción en BD: {cursor.fetchone()[0]}")
-    
-except Exception as e:
-    print(f"\n❌ Error durante el ETL: {e}")
-    connection.rollback()
-    
-finally:
-    cursor.close()
-    connection.close()
-    print("\n🔒 Conexión cerrada")
\ No newline at end of file
+    print("     INICIANDO ETL PIPELINE")
+    print("=" * 60)
+
+    # Perfil opcional de toda la corrida (PROFILE=etl); métricas por etapa en
+    # METRICS_LOG (JSON) y METRICS_TEXTFILE (Prometheus), ver instrumentation.py
+    profiler = start_profile('etl')
+
+    # Pool de conexiones MySQL (la primera conexión se abre al usarlo); en modo
+    # paralelo alcanza para la conexión principal más un hilo por tabla
+    pool = get_pool(maxsize=len(LOAD_STEPS) if parallel else None,
+                    **({'local_infile': True} if load_mode == 'infile' else {}))
+    try:
+        # Un solo muestreo de memoria para toda la corrida (las etapas solo miden tiempo y filas)
+        with track_run('etl', mode=load_mode, parallel=parallel):
+            run(pool)
+    finally:
+        # También si no había nada que cargar o el ETL falló
+        pool.close()
+        stop_profile(profiler, 'etl')
+        write_textfile()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# Tablas que guardan el hash de contenido de cada fila (columna row_hash)
+HASHED_TABLES = ('products', 'suppliers', 'sales', 'logistics', 'production')
+
+
+def file_checksum(path, block_size=1 << 20):
+    """SHA-256 del archivo, leído en bloques para no cargarlo completo en memoria."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def compute_row_hash(df):
+    """Hash de 64 bits de la clave natural y el contenido de cada fila (vectorizado).
+
+    En las tablas de hechos la clave (source_row) es una columna más, así que
+    dos filas idénticas en distintas posiciones del CSV tienen hashes
+    distintos. Las columnas numéricas se llevan a float64 y el resto a texto,
+    para que el hash no cambie si pandas infiere otro dtype en otra corrida o chunk.
+    """
+    normalized = pd.DataFrame({
+        col: df[col].astype('float64') if pd.api.types.is_numeric_dtype(df[col])
+        else df[col].astype(str)
+        for col in df.columns
+    })
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy(dtype='uint64')
+
+
+def add_row_hash(df):
+    """Devuelve una copia de `df` con la columna row_hash al final."""
+    hashed = df.copy()
+    hashed['row_hash'] = compute_row_hash(df)
+    return hashed
+
+
+def fetch_row_hashes(cursor, table):
+    """Hashes ya cargados en `table`, como arreglo ordenado de uint64."""
+    cursor.execute(f"SELECT row_hash FROM {table} WHERE row_hash IS NOT NULL")
+    hashes = np.fromiter((row[0] for row in cursor.fetchall()), dtype='uint64')
+    return np.unique(hashes)
+
+
+class KnownHashes:
+    """Hashes ya cargados en una tabla: los de la BD más los emitidos en esta corrida.
+
+    Una fila modificada tiene un hash nuevo y pasa el filtro; al cargarla,
+    bulk_loader reemplaza la versión anterior por su clave natural.
+    """
+
+    def __init__(self, db_hashes):
+        self.db_hashes = db_hashes
+        self.run_hashes = set()
+
+    def filter_new(self, df):
+        """Deja solo las filas nuevas o modificadas y las registra como conocidas."""
+        hashes = df['row_hash'].to_numpy(dtype='uint64')
+        is_new = ~np.isin(hashes, self.db_hashes)
+        if self.run_hashes:
+            is_new &= ~pd.Series(hashes).isin(self.run_hashes).to_numpy()
+        new_rows = df[is_new]
+        self.run_hashes.update(new_rows['row_hash'].tolist())
+        return new_rows
+
+
+def last_successful_checksum(cursor, source_file):
+    cursor.execute("""
+        SELECT file_checksum FROM etl_runs
+        WHERE source_file = %s AND status = 'success'
+        ORDER BY id DESC LIMIT 1
+    """, (os.path.basename(source_file),))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def start_run(cursor, source_file, checksum, mode):
+    cursor.execute("""
+        INSERT INTO etl_runs (source_file, file_checksum, mode, status)
+        VALUES (%s, %s, %s, 'running')
+    """, (os.path.basename(source_file), checksum, mode))
+    return cursor.lastrowid
+
+
+def finish_run(cursor, run_id, status, rows_read=0, rows_loaded=0):
+    cursor.execute("""
+        UPDATE etl_runs
+        SET status = %s, rows_read = %s, rows_loaded = %s, finished_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+    """, (status, rows_read, rows_loaded, run_id))
+
+
+def format_data_version(run_id, finished_at):
+    return f"run-{run_id}-{finished_at:%Y%m%d%H%M%S}"
+
+
+def version_run_id(data_version):
+    """Id de la corrida de una versión de get_data_version (0 sin cargas, None si no viene de etl_runs)."""
+    if data_version == 'sin-cargas':
+        return 0
+    if data_version.startswith('run-'):
+        return int(data_version.split('-')[1])
+    return None
+
+
+def get_data_version(cursor):
+    """Versión de los datos cargados: id y término de la última corrida exitosa del ETL."""
+    cursor.execute("""
+        SELECT id, finished_at FROM etl_runs
+        WHERE status = 'success'
+        ORDER BY id DESC LIMIT 1
+    """)
+    row = cursor.fetchone()
+    if row is None:
+        return 'sin-cargas'
+    return format_data_version(*row)
+
+
+def successful_runs_after(cursor, run_id):
+    """Corridas exitosas posteriores a `run_id`: [(id, modo, inicio, término), ...] en orden."""
+    cursor.execute("""
+        SELECT id, mode, started_at, finished_at FROM etl_runs
+        WHERE status = 'success' AND id > %s
+        ORDER BY id
+    """, (run_id,))
+    return list(cursor.fetchall())
@@ -0,0 +1,77 @@
+# Nombres del CSV original -> nombres de columnas en la base de datos
+COLUMN_MAP = {
+    'Product type': 'product_type',
+    'SKU': 'sku',
+    'Price': 'price',
+    'Availability': 'availability',
+    'Number of products sold': 'products_sold',
+    'Revenue generated': 'revenue_generated',
+    'Customer demographics': 'customer_demographics',
+    'Stock levels': 'stock_levels',
+    'Lead times': 'lead_times',
+    'Order quantities': 'order_quantities',
+    'Shipping times': 'shipping_times',
+    'Shipping carriers': 'shipping_carrier',
+    'Shipping costs': 'shipping_costs',
+    'Supplier name': 'supplier_name',
+    'Location': 'location',
+    'Lead time': 'lead_time',
+    'Production volumes': 'production_volumes',
+    'Manufacturing lead time': 'manufacturing_lead_time',
+    'Manufacturing costs': 'manufacturing_costs',
+    'Inspection results': 'inspection_results',
+    'Defect rates': 'defect_rates',
+    'Transportation modes': 'transportation_mode',
+    'Routes': 'route',
+    'Costs': 'total_costs',
+}
+
+# Posición de la fila en el CSV (la agrega staging.stage_raw): clave natural
+# de las filas de hechos, que no tienen otro identificador
+SOURCE_ROW = 'source_row'
+
+# Columnas de cada tabla (mismo orden que en create_database.py)
+TABLE_COLUMNS = {
+    'products': ['product_type', 'sku', 'price', 'availability', 'stock_levels'],
+    'suppliers': ['supplier_name', 'location', 'lead_time'],
+    'sales': [SOURCE_ROW, 'sku', 'products_sold', 'revenue_generated', 'customer_demographics'],
+    'logistics': [SOURCE_ROW, 'sku', 'shipping_times', 'shipping_carrier', 'shipping_costs',
+                  'transportation_mode', 'route', 'total_costs'],
+    'production': [SOURCE_ROW, 'sku', 'production_volumes', 'manufacturing_lead_time',
+                   'manufacturing_costs', 'inspection_results', 'defect_rates'],
+}
+
+# Tablas de dimensión que se deduplican por clave natural
+DEDUP_KEYS = {
+    'products': 'sku',
+    'suppliers': 'supplier_name',
+}
+
+
+def normalize_columns(df):
+    """Limpia los nombres de columnas del CSV y los lleva al esquema de la BD."""
+    df.columns = df.columns.str.strip()
+    return df.rename(columns=COLUMN_MAP)
+
+
+def split_tables(df):
+    """Separa el dataset plano en un DataFrame por tabla.
+
+    Las dimensiones se deduplican dentro de `df` quedándose con la última
+    fila de cada clave en el orden del CSV (source_row): el staging devuelve
+    las filas agrupadas por partición, no en el orden original. Entre chunks
+    no hace falta llevar registro: products y suppliers tienen clave única en
+    la BD y se cargan con upsert, así que una clave repetida en un chunk
+    posterior actualiza la fila (también gana la última).
+    """
+    csv_order = df[SOURCE_ROW].to_numpy().argsort(kind='stable') if SOURCE_ROW in df.columns else None
+    tables = {}
+    for table, columns in TABLE_COLUMNS.items():
+        table_df = df[columns]
+        key = DEDUP_KEYS.get(table)
+        if key is not None:
+            if csv_order is not None:
+                table_df = table_df.iloc[csv_order]
+            table_df = table_df.drop_duplicates(subset=[key], keep='last')
+        tables[table] = table_df
+    return tables
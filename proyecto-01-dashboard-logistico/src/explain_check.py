@@ -0,0 +1,82 @@
+import sys
+
+from dashboard_queries import CUBE_QUERY, FILTER_OPTIONS_QUERIES, MEDIANS_QUERY
+from db import connect
+
+
+def explain(cursor, query, params=None):
+    """Devuelve el plan de EXPLAIN como lista de dicts (una fila por tabla)."""
+    cursor.execute(f"EXPLAIN {query}", params)
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def full_scans(plan):
+    # type = ALL es un recorrido completo de la tabla; las tablas derivadas
+    # (<derivedN>) son el resultado de una CTE y no cuentan
+    return [row for row in plan
+            if row['type'] == 'ALL' and row['table'] and not row['table'].startswith('<')]
+
+
+def cube_params(category='ALL', carrier='ALL', transport='ALL'):
+    return [category, category, carrier, carrier, transport, transport]
+
+
+def build_checks(options):
+    """Consultas del dashboard a revisar: (nombre, sql, parámetros, recorridos completos permitidos).
+
+    Sin filtros la agregación tiene que leer todas las ventas, así que se
+    tolera un recorrido completo de la tabla que dirige el join; con filtros
+    y en los joins por sku no debe haber ninguno.
+    """
+    cube_sql = CUBE_QUERY.format(expected_time='NULL')
+    checks = [
+        ('cubo sin filtros', cube_sql, cube_params(), 1),
+        ('medianas OTIF', MEDIANS_QUERY, None, 1),
+    ]
+    if options['product_type']:
+        checks.append(('cubo por categoría', cube_sql, cube_params(category=options['product_type'][0]), 0))
+    if options['shipping_carrier']:
+        checks.append(('cubo por transportista', cube_sql, cube_params(carrier=options['shipping_carrier'][0]), 0))
+    if options['transportation_mode']:
+        checks.append(('cubo por transporte', cube_sql,
+                       cube_params(transport=options['transportation_mode'][0]), 0))
+    for col, query in FILTER_OPTIONS_QUERIES.items():
+        checks.append((f"opciones de {col}", query, None, 0))
+    return checks
+
+
+def run_checks(cursor):
+    options = {}
+    for col, query in FILTER_OPTIONS_QUERIES.items():
+        cursor.execute(query)
+        options[col] = [row[0] for row in cursor.fetchall()]
+
+    failures = 0
+    for name, query, params, allowed in build_checks(options):
+        plan = explain(cursor, query, params)
+        scans = full_scans(plan)
+        ok = len(scans) <= allowed
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {name}")
+        for row in plan:
+            flag = '  <- recorrido completo' if row in scans else ''
+            print(f"     {row['table'] or '-':<12} type={row['type'] or '-':<7} "
+                  f"key={row['key'] or '-':<28} rows={row['rows']}{flag}")
+    return failures
+
+
+if __name__ == '__main__':
+    print("🔍 Revisando planes de ejecución de las consultas del dashboard...\n")
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            failures = run_checks(cursor)
+    finally:
+        connection.close()
+
+    if failures:
+        print(f"\n❌ {failures} consulta(s) con recorridos completos de tabla. "
+              f"¿Faltan migraciones? Ejecuta create_database.py")
+        sys.exit(1)
+    print("\n🎉 Todas las consultas usan índices")
@@ -1,25 +1,35 @@
-import pandas as pd
 import os
+from ingest import read_raw
+from staging import stage_raw
+from stream_profile import describe, info_text, null_counts, profile_staged
 
 # Ruta al archivo CSV
 data_path = os.path.join('..', 'data', 'raw', 'supply_chain_data.csv')
 
-# Leer CSV
-df = pd.read_csv(data_path)
+# El perfil se calcula en una sola pasada por bloques, repartida en un pool de
+# procesos (EXPLORE_WORKERS, por defecto uno por núcleo): la memoria no crece
+# con el tamaño del archivo. Los cuantiles y los distintos son exactos en
+# archivos chicos y aproximados (sketches) en los grandes.
+if __name__ == '__main__':
+    # Leer el dataset tipado desde staging (el CSV solo se re-parsea si cambió)
+    stage_raw(data_path)
+    profile = profile_staged()
+    product_types = profile.columns['product_type']
 
-# Información básica
-print("=" * 50)
-print("EXPLORACIÓN INICIAL DEL DATASET")
-print("=" * 50)
-print(f"\n📊 Dimensiones: {df.shape[0]} filas x {df.shape[1]} columnas")
-print(f"\n📋 Columnas:\n{df.columns.tolist()}")
-print(f"\n🔍 Primeras 5 filas:")
-print(df.head())
-print(f"\n📈 Info del dataset:")
-print(df.info())
-print(f"\n📊 Estadísticas descriptivas:")
-print(df.describe())
-print(f"\n❓ Valores nulos por columna:")
-print(df.isnull().sum())
-print(f"\n✅ Tipos de productos únicos: {df['Product type'].nunique()}")
-print(df['Product type'].value_counts())
\ No newline at end of file
+    # Información básica
+    print("=" * 50)
+    print("EXPLORACIÓN INICIAL DEL DATASET")
+    print("=" * 50)
+    print(f"\n📊 Dimensiones: {profile.rows} filas x {len(profile.columns)} columnas")
+    print(f"\n📋 Columnas:\n{list(profile.columns)}")
+    print(f"\n🔍 Primeras 5 filas:")
+    # Las del principio del CSV (el staging está particionado y no conserva el orden)
+    print(next(read_raw(data_path, chunk_size=5)))
+    print(f"\n📈 Info del dataset:")
+    print(info_text(profile))
+    print(f"\n📊 Estadísticas descriptivas:")
+    print(describe(profile))
+    print(f"\n❓ Valores nulos por columna:")
+    print(null_counts(profile))
+    print(f"\n✅ Tipos de productos únicos: {product_types.nunique()}")
+    print(product_types.value_counts())
@@ -0,0 +1,59 @@
+import pandas as pd
+
+# Columnas de control que agrega MySQL/ETL y que no forman parte del análisis
+META_COLUMNS = ['id', 'created_at', 'updated_at', 'row_hash', 'source_row']
+# Momento en que se cargó cada venta (sales.created_at): base del OTIF por ventana
+LOADED_AT = 'loaded_at'
+
+
+def latest_per_sku(df):
+    """Una fila por SKU: la última versión cargada (mayor id, o la última del frame)."""
+    if 'id' in df.columns:
+        df = df.sort_values('id', kind='stable')
+    return df.drop_duplicates(subset='sku', keep='last')
+
+
+def sku_keys(products):
+    """Clave sustituta entera por SKU: products.id si existe, si no un código compacto."""
+    if 'id' in products.columns:
+        keys = products['id'].astype('int32')
+    else:
+        keys = pd.Series(pd.factorize(products['sku'])[0].astype('int32'), index=products.index)
+    return pd.Series(keys.to_numpy(), index=products['sku'].to_numpy())
+
+
+def check_join_cardinality(expected_rows, result, step):
+    # Un join muchos-a-muchos multiplica filas en silencio (e infla el revenue)
+    if len(result) != expected_rows:
+        raise ValueError(f"Join '{step}' cambió la cantidad de filas: "
+                         f"{expected_rows} -> {len(result)} (¿claves duplicadas?)")
+
+
+def build_fact_table(sales, products, logistics, production):
+    """Tabla de hechos: una fila por venta con los atributos más recientes de su SKU.
+
+    Las ventas se conservan todas: el ETL ya reemplaza las filas recargadas
+    por su clave natural (source_row), así que dos ventas iguales del mismo
+    SKU son dos ventas; su created_at se conserva como loaded_at. Las dimensiones (products, logistics, production) se
+    reducen a la última versión por SKU y se cruzan por una clave entera,
+    validando que cada join sea muchos-a-uno.
+    """
+    products = latest_per_sku(products)
+    keys = sku_keys(products)
+
+    fact = sales.drop(columns=META_COLUMNS, errors='ignore')
+    if 'created_at' in sales.columns:
+        fact[LOADED_AT] = sales['created_at']
+    fact['sku_id'] = fact['sku'].map(keys).astype('Int32')
+    expected_rows = len(fact)
+
+    dimensions = [('products', products), ('logistics', latest_per_sku(logistics)),
+                  ('production', latest_per_sku(production))]
+    for name, dim in dimensions:
+        dim = dim.drop(columns=META_COLUMNS, errors='ignore')
+        dim['sku_id'] = dim['sku'].map(keys).astype('Int32')
+        dim = dim.dropna(subset=['sku_id']).drop(columns='sku')
+        fact = fact.merge(dim, on='sku_id', how='left', validate='many_to_one')
+        check_join_cardinality(expected_rows, fact, name)
+
+    return fact.drop(columns='sku_id').reset_index(drop=True)
@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+import pandas as pd
+
+# Columnas DECIMAL(x,2) de MySQL: pymysql las entrega como objetos Decimal
+DECIMAL_COLUMNS = ['price', 'revenue_generated', 'shipping_costs', 'total_costs',
+                   'manufacturing_costs', 'defect_rates']
+
+# Dimensiones con pocas categorías distintas (las de los filtros y gráficos)
+CATEGORY_COLUMNS = ['product_type', 'shipping_carrier', 'transportation_mode', 'route',
+                    'customer_demographics', 'inspection_results', 'location', 'supplier_name']
+
+# Una columna de texto pasa a categórica si tiene menos valores distintos que esta fracción de filas
+MAX_CATEGORY_RATIO = 0.5
+
+
+def frame_memory_mb(df):
+    """Memoria del DataFrame en MB, contando el contenido de los strings."""
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def decimals_to_float(df, columns=DECIMAL_COLUMNS):
+    """Decimal (objeto Python por celda) -> float64 nativo.
+
+    Se mantiene float64: con float32 las sumas de revenue del cubo pierden
+    centavos a partir de ~10^5 filas.
+    """
+    for col in columns:
+        if col in df.columns and df[col].dtype == object:
+            sample = df[col].dropna()
+            if sample.empty or isinstance(sample.iloc[0], Decimal):
+                df[col] = pd.to_numeric(df[col].astype('float64'))
+    return df
+
+
+def optimize_dtypes(df, category_columns=CATEGORY_COLUMNS, max_category_ratio=MAX_CATEGORY_RATIO):
+    """Representación compacta del DataFrame del dashboard (modifica y devuelve `df`).
+
+    - Decimal -> float64
+    - enteros -> el tipo más chico que los contiene (int8/int16..., o Int8/Int16 con nulos)
+    - dimensiones de baja cardinalidad -> category (códigos int8 + diccionario)
+    - resto de los textos (sku) -> string de pyarrow, sin un objeto Python por celda
+    """
+    decimals_to_float(df)
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if col in category_columns or series.nunique() < max_category_ratio * len(series):
+                df[col] = series.astype('category')
+            else:
+                df[col] = series.astype('string[pyarrow]')
+    return df
+
+
+def match_categories(df, delta):
+    """Prepara `delta` (ya compacto) para concatenarlo a `df` sin perder las categóricas.
+
+    pd.concat solo conserva una categórica si ambos lados tienen las mismas
+    categorías: las que trae `delta` se agregan al final de las de `df` (los
+    códigos existentes no cambian) y `delta` se codifica con ese diccionario.
+    Así solo se convierte el bloque nuevo, no todo el DataFrame.
+    """
+    for col in df.columns:
+        if col not in delta.columns or not isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        new = pd.Index(delta[col].dropna().unique()).difference(df[col].cat.categories)
+        if len(new):
+            df[col] = df[col].cat.add_categories(new)
+        delta[col] = pd.Categorical(delta[col], categories=df[col].cat.categories)
+    return df, delta
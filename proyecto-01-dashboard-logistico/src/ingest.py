@@ -0,0 +1,203 @@
+import csv
+
+import numpy as np
+import pandas as pd
+
+from etl_transform import normalize_columns
+
+# Columnas decimales y su cota superior esperada. Las exportaciones con
+# configuración regional española convierten 69.80800554211571 en
+# "6.980.800.554.211.570": se pierde la posición del punto decimal y hay que
+# reubicarla usando la magnitud conocida de cada columna. Si la columna abarca
+# más de un orden de magnitud bajo la cota (p. ej. precios de 1 y de 2 dígitos)
+# se asume el mayor, por lo que 1.699 y 16.99 no se pueden distinguir.
+FLOAT_COLUMNS = {
+    'price': 100,
+    'revenue_generated': 10_000,
+    'shipping_costs': 10,
+    'manufacturing_costs': 100,
+    'defect_rates': 5,
+    'total_costs': 1_000,
+}
+
+INT_COLUMNS = [
+    'availability', 'products_sold', 'stock_levels', 'lead_times', 'order_quantities',
+    'shipping_times', 'lead_time', 'production_volumes', 'manufacturing_lead_time',
+]
+
+# Tamaño de chunk por defecto para la lectura en streaming
+DEFAULT_READ_CHUNK_SIZE = 100_000
+
+# dtypes explícitos de la salida (el resto de las columnas queda como texto)
+DTYPES = {
+    **{col: 'float64' for col in FLOAT_COLUMNS},
+    **{col: 'Int64' for col in INT_COLUMNS},
+}
+
+# Patrón de miles con punto: 1.234 / 6.980.800.554.211.570
+GROUPED_PATTERN = r'\d{1,3}(?:\.\d{3})+'
+# Patrón de miles con coma (configuración inglesa): 1,234 / 1,234,567
+COMMA_GROUPED_PATTERN = r'\d{1,3}(?:,\d{3})+'
+
+# Celda con un único separador seguido de exactamente 3 dígitos: "1.699" es
+# 1.699 con punto decimal o 1699 con punto de miles; lo decide la columna
+AMBIGUOUS_PATTERN = r'[-+]?\d{1,3}[.,]\d{3}'
+
+# Formato que se asume si ninguna celda de la columna lo delata
+DEFAULT_NUMBER_FORMAT = 'decimal_point'
+
+
+def detect_delimiter(path, sample_size=64 * 1024):
+    """Detecta el separador (',', ';', tab o '|') a partir de una muestra del archivo."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(sample_size)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=',;\t|').delimiter
+    except csv.Error:
+        return ','
+
+
+def to_float(text):
+    """Texto -> float64. El cast directo es varias veces más rápido que to_numeric;
+    si hay celdas inválidas se cae a to_numeric(errors='coerce')."""
+    try:
+        return text.astype('float64')
+    except (ValueError, TypeError):
+        return pd.to_numeric(text, errors='coerce').astype('float64')
+
+
+def count_char(text, char):
+    """Apariciones de `char` por celda; restar largos es más rápido que str.count."""
+    if not text.str.contains(char, regex=False).any():
+        return pd.Series(0, index=text.index)
+    return text.str.len() - text.str.replace(char, '', regex=False).str.len()
+
+
+def classify_numbers(values):
+    """Clasifica cada celda según su separador decimal (vectorizado):
+
+    - 'decimal_point'  0.2264 / 1,234.56 / 1,234,567
+    - 'decimal_comma'  0,2264 / 1.234,56
+    - 'grouped'        6.980.800.554.211.570 (varios puntos y ninguna coma)
+    - 'ambiguous'      1.699 / 1,699
+    - 'integer'        sin separadores
+    """
+    text = values.astype(str).str.strip()
+    dots = count_char(text, '.')
+    commas = count_char(text, ',')
+    both = (dots > 0) & (commas > 0)
+    # Con ambos separadores, el decimal es el último: 1.234,56 / 1,234.56
+    comma_last = both & text.str.contains(r',[^.]*$') if both.any() else both
+    ambiguous = (dots + commas == 1) & text.str.fullmatch(AMBIGUOUS_PATTERN)
+    return pd.Series(
+        np.select(
+            [comma_last, both, ambiguous, commas == 1, commas > 1, dots > 1, dots == 1],
+            ['decimal_comma', 'decimal_point', 'ambiguous',
+             'decimal_comma', 'decimal_point', 'grouped', 'decimal_point'],
+            default='integer',
+        ),
+        index=values.index,
+    )
+
+
+def detect_number_format(values):
+    """Formato de una columna a partir de sus celdas no ambiguas.
+
+    Devuelve 'decimal_point' (configuración inglesa), 'decimal_comma'
+    (española), 'grouped' (solo exportación dañada) o None si ninguna celda
+    lo indica. Si conviven ambos separadores decimales gana el mayoritario.
+    """
+    kinds = classify_numbers(values.dropna()).value_counts()
+    point, comma = kinds.get('decimal_point', 0), kinds.get('decimal_comma', 0)
+    if point or comma:
+        return 'decimal_comma' if comma > point else 'decimal_point'
+    if kinds.get('grouped', 0):
+        return 'grouped'
+    return None
+
+
+def parse_decimal(values, limit=None, number_format=None):
+    """Convierte una columna de texto a float64 sin `apply` por celda.
+
+    `number_format` es el de detect_number_format (se detecta si no se indica)
+    y decide cómo se leen todas las celdas de la columna:
+
+    - 'decimal_comma': "1.234,56" -> 1234.56 y "1.699" -> 1699
+    - 'decimal_point': "1,234.56" -> 1234.56 y "1.699" -> 1.699
+    - 'grouped':       "1.699" -> dígitos reescalados, igual que el resto
+
+    En cualquier formato sin coma decimal, "6.980.800.554.211" son dígitos
+    reescalados bajo `limit` (exportación dañada); las columnas mixtas, con
+    celdas dañadas y nativas como "0.2264", se leen celda a celda.
+    """
+    number_format = number_format or detect_number_format(values) or DEFAULT_NUMBER_FORMAT
+    text = values.astype(str).str.strip()
+
+    if number_format == 'decimal_comma':
+        return to_float(text.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+
+    if text.str.contains(',', regex=False).any():
+        text = text.str.replace(',', '', regex=False)
+    no_dots = text.str.replace('.', '', regex=False)
+    damaged = (text.str.len() - no_dots.str.len()) >= 2
+    if number_format == 'grouped':
+        damaged |= text.str.fullmatch(AMBIGUOUS_PATTERN)
+    parsed = to_float(text.where(~damaged))
+
+    if damaged.any():
+        digits = to_float(no_dots.where(damaged))
+        if limit is not None:
+            # Dividir por la menor potencia de 10 que deja el valor bajo la cota
+            exponent = np.ceil(np.log10(digits / limit)).clip(lower=0)
+            digits = digits / np.power(10.0, exponent)
+        parsed = parsed.where(~damaged, digits)
+
+    return parsed
+
+
+def parse_integer(values):
+    """Convierte una columna de texto a Int64. Un entero no tiene decimales, así
+    que el separador de miles se quita sea cual sea: 1.234 / 1,234 -> 1234."""
+    text = values.astype(str).str.strip()
+    if text.str.contains('.', regex=False).any():
+        grouped = text.str.fullmatch(GROUPED_PATTERN)
+        text = text.where(~grouped, text.str.replace('.', '', regex=False))
+    if text.str.contains(',', regex=False).any():
+        grouped = text.str.fullmatch(COMMA_GROUPED_PATTERN)
+        text = text.where(~grouped, text.str.replace(',', '', regex=False))
+    return to_float(text).round().astype('Int64')
+
+
+def parse_chunk(df, formats=None):
+    """Normaliza nombres de columnas y tipa las columnas numéricas de un bloque crudo.
+
+    `formats` (columna -> formato) guarda el formato de cada columna decimal:
+    se fija con el primer bloque que lo delata y se reutiliza en los
+    siguientes, así una celda ambigua se lee igual en todo el archivo.
+    """
+    df = normalize_columns(df)
+    formats = {} if formats is None else formats
+    for col, limit in FLOAT_COLUMNS.items():
+        if col in df.columns:
+            if formats.get(col) is None:
+                formats[col] = detect_number_format(df[col])
+            df[col] = parse_decimal(df[col], limit, formats[col] or DEFAULT_NUMBER_FORMAT)
+    for col in INT_COLUMNS:
+        if col in df.columns:
+            df[col] = parse_integer(df[col])
+    return df.astype({col: dtype for col, dtype in DTYPES.items() if col in df.columns})
+
+
+def read_raw(path, chunk_size=None, delimiter=None):
+    """Lee el CSV crudo detectando separador y formato numérico.
+
+    Devuelve un DataFrame tipado, o un iterador de DataFrames tipados si se
+    indica `chunk_size`.
+    """
+    delimiter = delimiter or detect_delimiter(path)
+    reader = pd.read_csv(path, sep=delimiter, dtype=str, keep_default_na=True,
+                         chunksize=chunk_size, encoding='utf-8-sig')
+    if chunk_size is None:
+        return parse_chunk(reader)
+    formats = {}
+    return (parse_chunk(chunk, formats) for chunk in reader)
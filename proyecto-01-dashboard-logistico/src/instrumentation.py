@@ -0,0 +1,298 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# METRICS_LOG: archivo JSONL (o '-' para stderr) con un evento por etapa/callback
+# METRICS_TEXTFILE: archivo con las métricas en formato Prometheus al terminar el ETL
+# PROFILE: nombres a perfilar con cProfile ('etl', 'callback', ... o 'all')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join('..', 'outputs', 'profiles'))
+MEMORY_SAMPLE_INTERVAL = 0.01
+
+METRIC_HELP = {
+    'stage_seconds': 'Duración de las etapas del ETL y de las cargas por tabla',
+    'stage_rows': 'Filas procesadas por etapa',
+    'stage_bytes': 'Bytes leídos o escritos por etapa',
+    'stage_peak_memory_bytes': 'RSS máximo durante la última ejecución de la etapa (carga serial)',
+    'run_seconds': 'Duración de las corridas completas (p. ej. el ETL)',
+    'run_peak_memory_bytes': 'RSS máximo del proceso durante la última corrida',
+    'callback_phase_seconds': 'Duración de cada fase de los callbacks del dashboard',
+    'callback_cache': 'Resultados de la caché de vistas del dashboard',
+    'dashboard_frame_bytes': 'Memoria del DataFrame del dashboard en modo memoria',
+}
+
+
+def escape_label(value):
+    """Escapa un valor de etiqueta para el formato de texto de Prometheus."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRegistry:
+    """Contadores, gauges y sumas (count/sum) en memoria, exportables a Prometheus.
+
+    Los contadores se exportan con el sufijo `_total` (inc('stage_rows') ->
+    supply_chain_stage_rows_total), igual que en el cliente oficial.
+    """
+
+    def __init__(self, prefix='supply_chain'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._summaries = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            count, total = self._summaries.get(key, (0, 0.0))
+            self._summaries[key] = (count + 1, total + value)
+
+    def render(self):
+        """Formato de texto de Prometheus (exposition format 0.0.4)."""
+        def fmt(name, labels, value):
+            label_text = ','.join(f'{k}="{escape_label(v)}"' for k, v in labels)
+            return f"{self.prefix}_{name}{{{label_text}}} {value}" if labels else \
+                f"{self.prefix}_{name} {value}"
+
+        lines = []
+        with self._lock:
+            groups = [('counter', self._counters), ('gauge', self._gauges), ('summary', self._summaries)]
+            for kind, metrics in groups:
+                for name in sorted({key[0] for key in metrics}):
+                    exported = f"{name}_total" if kind == 'counter' else name
+                    if name in METRIC_HELP:
+                        lines.append(f"# HELP {self.prefix}_{exported} {METRIC_HELP[name]}")
+                    lines.append(f"# TYPE {self.prefix}_{exported} {kind}")
+                    for (metric, labels), value in sorted(metrics.items()):
+                        if metric != name:
+                            continue
+                        if kind == 'summary':
+                            lines.append(fmt(f"{name}_count", labels, value[0]))
+                            lines.append(fmt(f"{name}_sum", labels, value[1]))
+                        else:
+                            lines.append(fmt(exported, labels, value))
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = MetricsRegistry()
+_log_lock = threading.Lock()
+
+
+def log_event(event, **fields):
+    """Escribe un evento como una línea JSON en METRICS_LOG (si está configurado)."""
+    target = os.getenv('METRICS_LOG')
+    if not target:
+        return
+    line = json.dumps({'ts': datetime.now().isoformat(timespec='milliseconds'), 'event': event,
+                       **fields}, default=str)
+    with _log_lock:
+        if target == '-':
+            print(line, file=sys.stderr)
+        else:
+            with open(target, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+def current_rss_bytes():
+    """RSS actual del proceso (Linux); en otros sistemas, el máximo histórico."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return peak_rss_bytes() if resource is not None else 0
+
+
+def peak_rss_bytes():
+    """RSS máximo del proceso desde que arrancó; sin `resource` (Windows), el RSS actual."""
+    if resource is None:
+        return current_rss_bytes()
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class MemorySampler:
+    """Hilo que muestrea el RSS mientras dura una corrida o etapa y guarda el máximo."""
+
+    def __init__(self, interval=MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+        return self.peak
+
+
+@contextmanager
+def track_run(name, **labels):
+    """Mide una corrida completa (duración y RSS máximo) con un único hilo de muestreo.
+
+    La memoria se mide por corrida y no por etapa: con cargas en paralelo varias
+    etapas comparten el proceso a la vez y un pico por etapa no las distingue.
+    """
+    status = 'ok'
+    start = time.perf_counter()
+    sampler = MemorySampler().start()
+    try:
+        yield
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        peak_memory = sampler.stop()
+        METRICS.observe('run_seconds', seconds, run=name, status=status, **labels)
+        METRICS.set('run_peak_memory_bytes', peak_memory, run=name, **labels)
+        log_event('run', run=name, status=status, seconds=round(seconds, 6),
+                  peak_memory_mb=peak_memory / 2**20, **labels)
+
+
+@contextmanager
+def track_stage(stage, sample_memory=False, **labels):
+    """Mide una etapa: duración, filas, filas/s, bytes y, con `sample_memory`, RSS pico.
+
+    El bloque completa `info['rows']` y `info['bytes']` cuando los conoce; al
+    salir, `info['peak_memory']` tiene el pico (None si no se muestreó):
+
+        with track_stage('extract', sample_memory=True) as info:
+            df = read_staged()
+            info['rows'] = len(df)
+
+    El pico es del proceso entero: solo distingue etapas si corren de a una
+    (carga serial). Con ETL_PARALLEL=1 las cargas por tabla se solapan y se
+    mide únicamente el pico de la corrida (track_run).
+    """
+    info = {'rows': None, 'bytes': None, 'peak_memory': None}
+    status = 'ok'
+    start = time.perf_counter()
+    sampler = MemorySampler().start() if sample_memory else None
+    try:
+        yield info
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        if sampler is not None:
+            info['peak_memory'] = sampler.stop()
+        record_stage(stage, seconds, info['rows'], info['bytes'], info['peak_memory'], status, **labels)
+
+
+def record_stage(stage, seconds, rows=None, bytes_=None, peak_memory=None, status='ok', **labels):
+    METRICS.observe('stage_seconds', seconds, stage=stage, status=status, **labels)
+    if rows is not None:
+        METRICS.inc('stage_rows', rows, stage=stage, **labels)
+    if bytes_ is not None:
+        METRICS.inc('stage_bytes', bytes_, stage=stage, **labels)
+    if peak_memory is not None:
+        METRICS.set('stage_peak_memory_bytes', peak_memory, stage=stage, **labels)
+    log_event('stage', stage=stage, status=status, seconds=round(seconds, 6), rows=rows,
+              rows_per_sec=rows / seconds if rows and seconds > 0 else None,
+              bytes=bytes_, peak_memory_mb=peak_memory / 2**20 if peak_memory else None, **labels)
+
+
+class PhaseTimer:
+    """Cronómetro por fases para un callback: timer.phase('filter'), ..."""
+
+    def __init__(self):
+        self.phases = {}
+        self._last = time.perf_counter()
+
+    def phase(self, name):
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self._last
+        self._last = now
+
+    def record(self, event, **fields):
+        for name, seconds in self.phases.items():
+            METRICS.observe('callback_phase_seconds', seconds, phase=name)
+        log_event(event, **fields, **{f"{name}_ms": round(seconds * 1000, 3)
+                                      for name, seconds in self.phases.items()})
+
+
+def profiling_enabled(name):
+    names = {n.strip() for n in os.getenv('PROFILE', '').split(',') if n.strip()}
+    return name in names or 'all' in names
+
+
+def start_profile(name):
+    """Activa cProfile si PROFILE incluye `name`; devuelve el perfilador o None."""
+    if not profiling_enabled(name):
+        return None
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def stop_profile(profiler, name, top=20, verbose=True):
+    """Detiene el perfilador y guarda el .prof en PROFILE_DIR (ver con snakeviz/pstats)."""
+    if profiler is None:
+        return None
+    profiler.disable()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{name}_{datetime.now():%Y%m%d_%H%M%S_%f}.prof")
+    profiler.dump_stats(path)
+    log_event('profile', name=name, path=path)
+    if verbose:
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(top)
+        print(f"\n🔬 Perfil de '{name}' guardado en {path}\n{out.getvalue()}")
+    return path
+
+
+@contextmanager
+def profile(name, top=20, verbose=True):
+    """Perfila el bloque con cProfile si PROFILE lo incluye."""
+    profiler = start_profile(name)
+    try:
+        yield profiler
+    finally:
+        stop_profile(profiler, name, top, verbose)
+
+
+def write_textfile(path=None):
+    """Vuelca las métricas en formato Prometheus (p. ej. para el textfile collector)."""
+    path = path or os.getenv('METRICS_TEXTFILE')
+    if not path:
+        return None
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(METRICS.render())
+    os.replace(tmp_path, path)
+    return path
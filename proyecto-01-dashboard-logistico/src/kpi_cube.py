@@ -0,0 +1,85 @@
+import pandas as pd
+
+# Dimensiones del cubo: las mismas de los filtros del dashboard
+CUBE_KEYS = ['product_type', 'shipping_carrier', 'transportation_mode']
+
+# Parciales aditivos por celda: (columna origen, agregación)
+CUBE_MEASURES = {
+    'revenue_sum': ('revenue_generated', 'sum'),
+    'products_sold_sum': ('products_sold', 'sum'),
+    'otif_count': ('otif', 'sum'),
+    'row_count': ('otif', 'size'),
+    'defect_sum': ('defect_rates', 'sum'),
+    'defect_count': ('defect_rates', 'count'),
+    'shipping_cost_sum': ('shipping_costs', 'sum'),
+    'shipping_cost_count': ('shipping_costs', 'count'),
+}
+# Columnas del dataset que necesita el cubo (además de las dimensiones)
+CUBE_SOURCE_COLUMNS = sorted({col for col, _ in CUBE_MEASURES.values()})
+
+
+def build_cube(df):
+    """Agrega el dataset (con la columna otif) a una fila por combinación de filtros."""
+    return df.groupby(CUBE_KEYS, dropna=False, observed=True) \
+             .agg(**CUBE_MEASURES) \
+             .reset_index()
+
+
+def merge_cube(cube, delta):
+    """Suma dos cubos celda a celda (todos los parciales son aditivos)."""
+    merged = pd.concat([cube, delta], ignore_index=True)
+    return merged.groupby(CUBE_KEYS, dropna=False, observed=True, as_index=False).sum()
+
+
+def update_cube(cube, new_rows, removed_rows=None):
+    """Incorpora filas nuevas al cubo sin volver a recorrer las ya agregadas.
+
+    `removed_rows` son filas que dejan de estar (p. ej. la versión anterior de
+    un SKU recargado): sus parciales se restan y las celdas vacías se eliminan.
+    """
+    delta = build_cube(new_rows)
+    if removed_rows is not None and len(removed_rows):
+        removed = build_cube(removed_rows)
+        removed[list(CUBE_MEASURES)] *= -1
+        delta = pd.concat([delta, removed], ignore_index=True)
+    merged = merge_cube(cube, delta)
+    return merged[merged['row_count'] > 0].reset_index(drop=True)
+
+
+def select_cells(cube, category='ALL', carrier='ALL', transport='ALL'):
+    mask = pd.Series(True, index=cube.index)
+    for key, value in zip(CUBE_KEYS, (category, carrier, transport)):
+        if value != 'ALL':
+            mask &= cube[key] == value
+    return cube[mask]
+
+
+def _ratio(numerator, denominator, scale=1):
+    return numerator / denominator * scale if denominator else float('nan')
+
+
+def rollup(cube, category='ALL', carrier='ALL', transport='ALL'):
+    """KPIs y series de los gráficos para una combinación de filtros.
+
+    Solo recorre las celdas del cubo (decenas), no las filas del dataset.
+    """
+    cells = select_cells(cube, category, carrier, transport)
+    totals = cells[list(CUBE_MEASURES)].sum()
+
+    by_category = cells.groupby('product_type', observed=True)[list(CUBE_MEASURES)].sum()
+    by_carrier = cells.groupby('shipping_carrier', observed=True)[list(CUBE_MEASURES)].sum()
+
+    return {
+        'total_revenue': totals['revenue_sum'],
+        'total_products': int(totals['products_sold_sum']),
+        'otif_pct': _ratio(totals['otif_count'], totals['row_count'], 100) if totals['row_count'] else 0,
+        'avg_defects': _ratio(totals['defect_sum'], totals['defect_count']),
+        'revenue_by_cat': by_category['revenue_sum']
+            .rename('revenue_generated').reset_index(),
+        'otif_by_cat': (by_category['otif_count'] / by_category['row_count'] * 100)
+            .rename('otif').reset_index(),
+        'carrier_eff': (by_carrier['shipping_cost_sum'] / by_carrier['shipping_cost_count'])
+            .rename('shipping_costs').reset_index(),
+        'defects_by_cat': (by_category['defect_sum'] / by_category['defect_count'])
+            .rename('defect_rates').reset_index(),
+    }
@@ -0,0 +1,164 @@
+import os
+import threading
+
+import pandas as pd
+import pymysql
+
+from dashboard_data import FACT_TABLES, prepare_frame, read_fact_tables
+from etl_state import format_data_version, successful_runs_after
+from fact_model import build_fact_table
+from frame_dtypes import match_categories, optimize_dtypes
+from kpi_cube import build_cube, update_cube
+from instrumentation import METRICS, log_event
+from otif_engine import OTIFEngine
+
+# Cada cuántos segundos se buscan corridas nuevas del ETL (0 = sin refresco en vivo)
+REFRESH_SECONDS = float(os.getenv('DASHBOARD_REFRESH_SECONDS', 30))
+
+
+def changed_skus(cursor, since, tables=FACT_TABLES):
+    """SKU con filas escritas desde `since` en alguna tabla (índice idx_<tabla>_updated_at).
+
+    updated_at cambia también cuando el upsert de products modifica una fila
+    existente (el id se mantiene). Se compara con >=: la resolución es de un
+    segundo y reaplicar un SKU no cambia el resultado.
+    """
+    cursor.execute(" UNION ".join(f"SELECT sku FROM {table} WHERE updated_at >= %s" for table in tables),
+                   [since] * len(tables))
+    return [row[0] for row in cursor.fetchall() if row[0] is not None]
+
+
+def sku_row_counts(cursor, table='sales'):
+    """Filas por SKU en `table` (recorre el índice que empieza por sku)."""
+    cursor.execute(f"SELECT sku, COUNT(*) FROM {table} GROUP BY sku")
+    return {sku: count for sku, count in cursor.fetchall() if sku is not None}
+
+
+def shrunk_skus(df, counts):
+    """SKU del dataset con menos ventas que en MySQL: perdieron filas sin que cambie su updated_at.
+
+    Pasa cuando delete_replaced borra un source_row que vuelve con otro SKU
+    (o no vuelve): el SKU nuevo aparece en changed_skus, pero el viejo no.
+    """
+    current = df['sku'].value_counts()
+    current = current[current > 0]
+    stored = pd.Series(counts, dtype='int64').reindex(current.index, fill_value=0)
+    return current.index[current.to_numpy() != stored.to_numpy()].tolist()
+
+
+def read_fact(connection, skus=None):
+    tables = read_fact_tables(connection, skus)
+    return build_fact_table(tables['sales'], tables['products'], tables['logistics'], tables['production'])
+
+
+class LiveDataset:
+    """Tabla de hechos del dashboard que incorpora las corridas nuevas del ETL sin recargar todo.
+
+    Con cada corrida incremental se vuelven a leer y cruzar solo los SKU que
+    cambiaron, se reemplazan sus filas en la tabla de hechos y el cubo se
+    actualiza restando las filas viejas y sumando las nuevas. Las medianas de
+    tiempo de envío se mantienen en un OTIFEngine: si una cambia, solo se
+    reevalúan las filas cuyo on_time puede cambiar.
+    """
+
+    def __init__(self, df, data_version, run_id, compact=True):
+        self.otif = OTIFEngine(df)
+        # Flags con las medianas del motor (con OTIF_MEDIAN_ERROR > 0 son aproximadas)
+        self.df = self.otif.flag(df)
+        self.cube = build_cube(self.df)
+        self.data_version = data_version
+        self.run_id = run_id
+        self.compact = compact
+
+    def reload(self, fact, data_version, run_id):
+        """Recarga completa a partir de una tabla de hechos nueva."""
+        self.__init__(prepare_frame(fact, self.compact), data_version, run_id, self.compact)
+
+    def apply(self, delta, skus, data_version, run_id):
+        """Reemplaza las filas de `skus` por `delta` (su tabla de hechos recién leída); devuelve cuántos SKU cambiaron."""
+        self.data_version, self.run_id = data_version, run_id
+        if not len(skus):
+            return 0
+
+        kept = self.df.copy(deep=False)  # los callbacks pueden estar leyendo self.df
+        if delta is None or not len(delta):
+            # Los SKU ya no tienen ventas: solo se quitan (read_sql vacío no trae los tipos)
+            delta = kept.iloc[:0].copy()
+        if self.compact:
+            # Solo se convierte el bloque nuevo; sus categóricas usan el diccionario del dataset
+            kept, delta = match_categories(kept, optimize_dtypes(delta))
+
+        replaced = kept['sku'].isin(skus)
+        removed = kept[replaced]
+        kept = kept[~replaced]
+        changes = self.otif.update(delta, removed)
+        delta = self.otif.flag(delta)
+        added, dropped = [delta], [removed]
+        if changes:
+            # Mediana nueva: solo cambian las filas con tiempo entre la anterior y la nueva
+            flipped = self.otif.affected_rows(kept, changes)
+            if flipped.any():
+                dropped.append(kept[flipped])
+                added.append(self.otif.flag(kept[flipped].copy()))
+                kept = pd.concat([kept[~flipped], added[-1]]).sort_index()
+        self.df = pd.concat([kept, delta], ignore_index=True)
+        self.cube = update_cube(self.cube, pd.concat(added, ignore_index=True),
+                                pd.concat(dropped, ignore_index=True))
+        return len(skus)
+
+
+class LiveRefresher:
+    """Hilo que sigue las corridas exitosas del ETL (etl_runs) y las aplica a un LiveDataset.
+
+    Cada ciclo hace una sola consulta barata sobre etl_runs. Las corridas
+    nuevas (incrementales o completas: las dos reemplazan por source_row y
+    actualizan updated_at) se aplican leyendo solo los SKU con updated_at
+    posterior a su inicio, más los que perdieron ventas que pasaron a otro SKU.
+    Después se llama a `on_update(live)` con el dataset actualizado.
+    """
+
+    def __init__(self, live, pool, interval=REFRESH_SECONDS, on_update=None):
+        self.live = live
+        self.pool = pool
+        self.interval = interval
+        self.on_update = on_update
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='live-refresh', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except pymysql.err.MySQLError as e:
+                # MySQL caído o reiniciándose: se reintenta en el próximo ciclo
+                print(f"⚠️  Refresco en vivo: {e}")
+
+    def poll(self):
+        """Revisa y aplica corridas nuevas; devuelve True si el dataset cambió."""
+        live = self.live
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                runs = successful_runs_after(cursor, live.run_id)
+                if not runs:
+                    return False
+                run_id, _, _, finished_at = runs[-1]
+                version = format_data_version(run_id, finished_at)
+                skus = changed_skus(cursor, min(started_at for _, _, started_at, _ in runs))
+                skus = list(dict.fromkeys(skus + shrunk_skus(live.df, sku_row_counts(cursor))))
+
+            delta = read_fact(connection, skus) if skus else None
+            changed = live.apply(delta, skus, version, run_id)
+
+        METRICS.inc('live_refresh_skus', changed)
+        log_event('live_refresh', skus=changed, rows=len(live.df), data_version=version)
+        if self.on_update is not None:
+            self.on_update(live)
+        return True
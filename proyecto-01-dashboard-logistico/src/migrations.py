@@ -0,0 +1,220 @@
+import re
+from datetime import date
+
+from etl_state import HASHED_TABLES
+
+# Índices para los patrones de acceso del dashboard y del ETL:
+# (tabla, nombre, columnas). Los compuestos que empiezan por sku sirven al
+# join con sales y además cubren las columnas que lee la agregación.
+DASHBOARD_INDEXES = [
+    ('products', 'idx_products_sku_type', ['sku', 'product_type', 'stock_levels']),
+    ('products', 'idx_products_type', ['product_type']),
+    ('sales', 'idx_sales_sku_cover', ['sku', 'products_sold', 'revenue_generated']),
+    ('sales', 'idx_sales_demographics', ['customer_demographics']),
+    ('logistics', 'idx_logistics_sku_cover',
+     ['sku', 'transportation_mode', 'shipping_carrier', 'shipping_times', 'shipping_costs']),
+    ('logistics', 'idx_logistics_mode_carrier', ['transportation_mode', 'shipping_carrier']),
+    ('logistics', 'idx_logistics_carrier', ['shipping_carrier']),
+    ('logistics', 'idx_logistics_mode_times', ['transportation_mode', 'shipping_times']),
+    ('production', 'idx_production_sku_cover', ['sku', 'defect_rates']),
+]
+
+# Tablas particionadas por mes de carga (DB_PARTITION_BY_LOAD_DATE=1) y meses
+# hacia adelante que deben tener siempre su partición creada
+PARTITIONED_TABLES = ['sales', 'logistics']
+PARTITION_MONTHS_AHEAD = 12
+
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def index_exists(cursor, table, index_name):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, index_name))
+    return cursor.fetchone()[0] > 0
+
+
+def add_row_hash_columns(cursor):
+    # Bases creadas antes de la carga incremental no tienen row_hash
+    for table in HASHED_TABLES:
+        if not column_exists(cursor, table, 'row_hash'):
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                ADD COLUMN row_hash BIGINT UNSIGNED,
+                ADD INDEX idx_{table}_row_hash (row_hash)
+            """)
+
+
+def add_source_row_columns(cursor):
+    # Clave natural de las filas de hechos: las recargas reemplazan por source_row
+    # en vez de duplicar. Las filas cargadas antes no la tienen (quedan en NULL):
+    # para limpiarlas hay que vaciar esas tablas y recargar una vez
+    for table in ['sales', 'logistics', 'production']:
+        if not column_exists(cursor, table, 'source_row'):
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                ADD COLUMN source_row INT AFTER id,
+                ADD INDEX idx_{table}_source_row (source_row)
+            """)
+
+
+def unique_supplier_names(cursor):
+    # Las recargas anteriores insertaban los proveedores otra vez: se deja la
+    # última fila de cada nombre antes de crear el índice único
+    cursor.execute("""
+        DELETE s FROM suppliers s
+        JOIN suppliers newer ON newer.supplier_name = s.supplier_name AND newer.id > s.id
+    """)
+    if not index_exists(cursor, 'suppliers', 'supplier_name'):
+        cursor.execute("CREATE UNIQUE INDEX supplier_name ON suppliers (supplier_name)")
+
+
+def add_updated_at_columns(cursor):
+    # El refresco en vivo del dashboard busca los SKU escritos desde la última
+    # corrida; el upsert de products conserva el id, así que hace falta updated_at
+    for table in ['products', 'sales', 'logistics', 'production']:
+        if not column_exists(cursor, table, 'updated_at'):
+            cursor.execute(f"""
+                ALTER TABLE {table}
+                ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                ADD INDEX idx_{table}_updated_at (updated_at)
+            """)
+
+
+def add_dashboard_indexes(cursor):
+    for table, index_name, columns in DASHBOARD_INDEXES:
+        if not index_exists(cursor, table, index_name):
+            cursor.execute(f"CREATE INDEX {index_name} ON {table} ({', '.join(columns)})")
+
+
+# Migraciones en orden: (id, descripción, función que recibe el cursor)
+MIGRATIONS = [
+    ('001_row_hash', "Columna row_hash para la carga incremental", add_row_hash_columns),
+    ('002_dashboard_indexes', "Índices compuestos y de cobertura para el dashboard", add_dashboard_indexes),
+    ('003_source_row', "Clave natural (fila del CSV) de las tablas de hechos", add_source_row_columns),
+    ('004_unique_suppliers', "Clave única de suppliers.supplier_name (upsert)", unique_supplier_names),
+    ('005_updated_at', "updated_at de las tablas de hechos (refresco en vivo)", add_updated_at_columns),
+]
+
+
+def ensure_migrations_table(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        id VARCHAR(100) PRIMARY KEY,
+        description VARCHAR(255),
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def apply_migrations(cursor):
+    """Aplica las migraciones pendientes y devuelve la lista de ids aplicados."""
+    ensure_migrations_table(cursor)
+    cursor.execute("SELECT id FROM schema_migrations")
+    applied = {row[0] for row in cursor.fetchall()}
+
+    newly_applied = []
+    for migration_id, description, migrate in MIGRATIONS:
+        if migration_id in applied:
+            continue
+        migrate(cursor)
+        cursor.execute("INSERT INTO schema_migrations (id, description) VALUES (%s, %s)",
+                       (migration_id, description))
+        newly_applied.append(migration_id)
+    return newly_applied
+
+
+def month_partitions(months_ahead, start=None):
+    """Límites mensuales para PARTITION BY RANGE: [(nombre, 'YYYY-MM-01'), ...]."""
+    start = start or date.today().replace(day=1)
+    bounds = []
+    year, month = start.year, start.month
+    for _ in range(months_ahead):
+        name = f"p{year}{month:02d}"
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+        bounds.append((name, f"{year}-{month:02d}-01"))
+    return bounds
+
+
+def partition_by_load_date(cursor, table, months_ahead=PARTITION_MONTHS_AHEAD):
+    """Particiona `table` por mes de carga (created_at). Opcional.
+
+    MySQL no admite claves foráneas en tablas particionadas y exige que la
+    clave primaria incluya la columna de partición, así que se eliminan las
+    FK hacia products y la PK pasa a ser (id, created_at). La integridad de
+    sku queda a cargo del ETL (products siempre se carga primero).
+    """
+    cursor.execute("""
+        SELECT constraint_name FROM information_schema.referential_constraints
+        WHERE constraint_schema = DATABASE() AND table_name = %s
+    """, (table,))
+    for (constraint_name,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {table} DROP FOREIGN KEY {constraint_name}")
+
+    cursor.execute(f"""
+        ALTER TABLE {table}
+        MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        DROP PRIMARY KEY,
+        ADD PRIMARY KEY (id, created_at)
+    """)
+
+    partitions = ',\n'.join(
+        f"PARTITION {name} VALUES LESS THAN (UNIX_TIMESTAMP('{bound}'))"
+        for name, bound in month_partitions(months_ahead)
+    )
+    cursor.execute(f"""
+        ALTER TABLE {table}
+        PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+            PARTITION p_hist VALUES LESS THAN (UNIX_TIMESTAMP('{date.today().replace(day=1)}')),
+            {partitions},
+            PARTITION p_max VALUES LESS THAN MAXVALUE
+        )
+    """)
+
+
+def add_month_partitions(cursor, table, months_ahead=PARTITION_MONTHS_AHEAD, today=None):
+    """Crea por adelantado las particiones mensuales que faltan hasta `months_ahead` meses.
+
+    Divide p_max con REORGANIZE PARTITION; como las particiones se agregan antes
+    de que llegue su mes, p_max está vacía y no se mueven filas. Si el ETL no
+    corrió en meses, las filas que cayeron en p_max pasan a su mes. No hace
+    nada si la tabla no está particionada. Devuelve los nombres agregados.
+    """
+    cursor.execute("""
+        SELECT partition_name FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+    """, (table,))
+    monthly = sorted(name for (name,) in cursor.fetchall() if re.fullmatch(r'p\d{6}', name))
+    if not monthly:
+        return []
+
+    # Primer mes sin partición: el siguiente a la última (pYYYYMM cubre ese mes)
+    year, month = int(monthly[-1][1:5]), int(monthly[-1][5:7]) + 1
+    if month > 12:
+        year, month = year + 1, 1
+    current = (today or date.today()).replace(day=1)
+    missing = (current.year - year) * 12 + current.month - month + months_ahead
+    if missing <= 0:
+        return []
+
+    bounds = month_partitions(missing, start=date(year, month, 1))
+    partitions = ',\n'.join(
+        f"PARTITION {name} VALUES LESS THAN (UNIX_TIMESTAMP('{bound}'))" for name, bound in bounds
+    )
+    cursor.execute(f"""
+        ALTER TABLE {table}
+        REORGANIZE PARTITION p_max INTO (
+            {partitions},
+            PARTITION p_max VALUES LESS THAN MAXVALUE
+        )
+    """)
+    return [name for name, _ in bounds]
@@ -0,0 +1,292 @@
+import heapq
+import math
+import os
+from collections import Counter, deque
+
+import pandas as pd
+
+from dashboard_data import add_otif_flags
+from fact_model import LOADED_AT
+
+# Error máximo de la mediana de tiempo de envío, en días: 0 = mediana exacta
+# (dos heaps); mayor que 0 = histograma de ancho 2*error (memoria acotada)
+MEDIAN_ERROR = float(os.getenv('OTIF_MEDIAN_ERROR', 0))
+
+
+class RunningMedian:
+    """Mediana exacta con altas y bajas: dos heaps con borrado diferido.
+
+    La mitad inferior es un max-heap (valores negados) y la superior un
+    min-heap; un valor borrado se descarta recién cuando llega a la cima.
+    Con cantidad par la mediana es el promedio de los dos centrales, igual
+    que pandas.
+    """
+
+    def __init__(self, values=()):
+        self._rebuild(sorted(values))
+
+    def _rebuild(self, values):
+        half = (len(values) + 1) // 2
+        self._low = [-value for value in values[:half]]
+        heapq.heapify(self._low)
+        self._high = list(values[half:])  # una lista ordenada ya es un min-heap
+        self._low_size, self._high_size = half, len(values) - half
+        self._low_deleted, self._high_deleted = Counter(), Counter()
+
+    def __len__(self):
+        return self._low_size + self._high_size
+
+    def _prune(self):
+        while self._low and self._low_deleted[-self._low[0]]:
+            self._low_deleted[-heapq.heappop(self._low)] -= 1
+        while self._high and self._high_deleted[self._high[0]]:
+            self._high_deleted[heapq.heappop(self._high)] -= 1
+
+    def _rebalance(self):
+        self._prune()
+        if self._low_size > self._high_size + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size, self._high_size = self._low_size - 1, self._high_size + 1
+        elif self._high_size > self._low_size:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._low_size, self._high_size = self._low_size + 1, self._high_size - 1
+        self._prune()
+        # Demasiados borrados pendientes: se reconstruye con los valores vigentes
+        if len(self._low) + len(self._high) > 2 * len(self) + 64:
+            low = Counter(-value for value in self._low) - self._low_deleted
+            high = Counter(self._high) - self._high_deleted
+            self._rebuild(sorted((low + high).elements()))
+
+    def add(self, value):
+        self._prune()
+        if self._low_size and value > -self._low[0]:
+            heapq.heappush(self._high, value)
+            self._high_size += 1
+        else:
+            heapq.heappush(self._low, -value)
+            self._low_size += 1
+        self._rebalance()
+
+    def remove(self, value):
+        """Quita una ocurrencia de `value` (debe haberse agregado antes)."""
+        self._prune()
+        # Todo valor de la mitad inferior es <= que cualquiera de la superior
+        if self._low_size and value <= -self._low[0]:
+            self._low_deleted[value] += 1
+            self._low_size -= 1
+        else:
+            self._high_deleted[value] += 1
+            self._high_size -= 1
+        self._rebalance()
+
+    def median(self):
+        if not len(self):
+            return math.nan
+        if self._low_size > self._high_size:
+            return float(-self._low[0])
+        return (-self._low[0] + self._high[0]) / 2
+
+
+class HistogramMedian:
+    """Mediana aproximada con altas y bajas: conteos por intervalo de ancho 2*error.
+
+    Devuelve el centro del intervalo que contiene la mediana, así que se
+    equivoca a lo sumo en `error`; la memoria depende del rango de valores,
+    no de la cantidad de registros.
+    """
+
+    def __init__(self, error, values=()):
+        self.width = 2 * error
+        self.counts = Counter(math.floor(value / self.width) for value in values)
+        self._size = sum(self.counts.values())
+
+    def __len__(self):
+        return self._size
+
+    def add(self, value):
+        self.counts[math.floor(value / self.width)] += 1
+        self._size += 1
+
+    def remove(self, value):
+        bin_ = math.floor(value / self.width)
+        self.counts[bin_] -= 1
+        if not self.counts[bin_]:
+            del self.counts[bin_]
+        self._size -= 1
+
+    def median(self):
+        if not self._size:
+            return math.nan
+        # Posiciones centrales (una si la cantidad es impar, dos si es par)
+        targets = [(self._size - 1) // 2, self._size // 2]
+        centers, seen = [], 0
+        for bin_ in sorted(self.counts):
+            seen += self.counts[bin_]
+            while targets and targets[0] < seen:
+                targets.pop(0)
+                centers.append((bin_ + 0.5) * self.width)
+        return sum(centers) / 2
+
+
+def median_tracker(values=(), error=MEDIAN_ERROR):
+    return HistogramMedian(error, values) if error > 0 else RunningMedian(values)
+
+
+def _values_by_mode(rows):
+    valid = rows[['transportation_mode', 'shipping_times']].dropna()
+    for mode, times in valid.groupby('transportation_mode', observed=True)['shipping_times']:
+        yield mode, times.astype('float64').tolist()
+
+
+class OTIFEngine:
+    """Flags OTIF con la mediana de tiempo de envío por modo mantenida en streaming.
+
+    `update` incorpora filas nuevas y quita las reemplazadas sin volver a
+    recorrer el dataset; devuelve los modos cuya mediana cambió. Con eso
+    `affected_rows` marca solo las filas cuyo on_time puede cambiar: las del
+    modo con tiempo de envío entre la mediana anterior y la nueva.
+    """
+
+    def __init__(self, df=None, error=MEDIAN_ERROR):
+        self.error = error
+        self.trackers = {}
+        if df is not None:
+            for mode, times in _values_by_mode(df):
+                self.trackers[mode] = median_tracker(times, error)
+
+    def medians(self):
+        return pd.Series({mode: tracker.median() for mode, tracker in self.trackers.items() if len(tracker)},
+                         dtype='float64')
+
+    def update(self, new_rows=None, removed_rows=None):
+        """Aplica altas y bajas; devuelve {modo: (mediana anterior, mediana nueva)} de las que cambiaron."""
+        before = {mode: tracker.median() for mode, tracker in self.trackers.items()}
+        if removed_rows is not None:
+            for mode, times in _values_by_mode(removed_rows):
+                for value in times:
+                    self.trackers[mode].remove(value)
+        if new_rows is not None:
+            for mode, times in _values_by_mode(new_rows):
+                tracker = self.trackers.setdefault(mode, median_tracker(error=self.error))
+                for value in times:
+                    tracker.add(value)
+        changes = {}
+        for mode, tracker in self.trackers.items():
+            old, new = before.get(mode, math.nan), tracker.median()
+            if not (old == new or (math.isnan(old) and math.isnan(new))):
+                changes[mode] = (old, new)
+        return changes
+
+    def windowed(self, span=None, size=None):
+        """OTIF por ventana deslizante (últimos `span`, p. ej. '30D', o últimos `size` envíos)
+        con el mismo tipo de mediana que este motor."""
+        return WindowedOTIF(span=span, size=size, error=self.error)
+
+    def flag(self, rows):
+        """Flags OTIF de `rows` con las medianas vigentes."""
+        return add_otif_flags(rows, self.medians())
+
+    @staticmethod
+    def affected_rows(df, changes):
+        """Máscara de las filas cuyo on_time cambia con las medianas nuevas.
+
+        on_time = tiempo <= mediana, así que solo cambian las filas del modo
+        con tiempo en (min(anterior, nueva), max(anterior, nueva)]; si el modo
+        no tenía mediana se reevalúan todas sus filas.
+        """
+        mask = pd.Series(False, index=df.index)
+        for mode, (old, new) in changes.items():
+            in_mode = df['transportation_mode'] == mode
+            if math.isnan(old) or math.isnan(new):
+                mask |= in_mode
+            else:
+                low, high = sorted((old, new))
+                mask |= in_mode & (df['shipping_times'] > low) & (df['shipping_times'] <= high)
+        return mask.fillna(False).astype(bool)
+
+
+class WindowedOTIF:
+    """OTIF sobre una ventana deslizante de envíos (últimos `span` o últimos `size`).
+
+    Los envíos entran en orden de llegada y salen de la ventana por tiempo o
+    por cantidad: cada salida se quita de la mediana de su modo con el mismo
+    remove() del motor global (borrado diferido en RunningMedian) y de un
+    histograma de tiempos de los envíos in-full. El KPI se calcula sobre esos
+    histogramas, así que el costo por envío no crece con el volumen de datos.
+    """
+
+    def __init__(self, span=None, size=None, error=MEDIAN_ERROR):
+        if span is None and size is None:
+            raise ValueError("WindowedOTIF necesita span (p. ej. '30D') o size (envíos)")
+        self.span = pd.Timedelta(span) if span is not None else None
+        self.size = size
+        self.error = error
+        self.window = deque()
+        self.trackers = {}
+        self.in_full_times = {}
+        self.in_full_count = 0
+
+    def __len__(self):
+        return len(self.window)
+
+    def add(self, timestamp, mode, shipping_time, in_full):
+        """Agrega un envío; `timestamp` no puede ser anterior al último agregado."""
+        timestamp = pd.Timestamp(timestamp)
+        if self.window and timestamp < self.window[-1][0]:
+            raise ValueError("WindowedOTIF recibe los envíos en orden de llegada")
+        record = (timestamp, mode, shipping_time, bool(in_full))
+        self.window.append(record)
+        self._count(record, 1)
+        self.expire(timestamp)
+
+    def add_rows(self, rows, time_column=LOADED_AT):
+        """Agrega envíos de la tabla de hechos en orden de `time_column` (loaded_at)."""
+        rows = rows.sort_values(time_column, kind='stable')
+        in_full = (rows['stock_levels'] >= rows['products_sold']).fillna(False)
+        for record in zip(rows[time_column], rows['transportation_mode'], rows['shipping_times'], in_full):
+            self.add(*record)
+
+    def expire(self, now):
+        """Saca los envíos fuera de la ventana a la hora `now` (también sin envíos nuevos)."""
+        now = pd.Timestamp(now)
+        while self.size is not None and len(self.window) > self.size:
+            self._count(self.window.popleft(), -1)
+        while self.span is not None and self.window and self.window[0][0] <= now - self.span:
+            self._count(self.window.popleft(), -1)
+
+    def _count(self, record, sign):
+        _, mode, shipping_time, in_full = record
+        self.in_full_count += sign * in_full
+        if pd.isna(mode) or pd.isna(shipping_time):
+            return  # sin modo o sin tiempo nunca es on-time (igual que add_otif_flags)
+        shipping_time = float(shipping_time)
+        tracker = self.trackers.setdefault(mode, median_tracker(error=self.error))
+        if sign > 0:
+            tracker.add(shipping_time)
+        else:
+            tracker.remove(shipping_time)
+        if in_full:
+            times = self.in_full_times.setdefault(mode, Counter())
+            times[shipping_time] += sign
+            if not times[shipping_time]:
+                del times[shipping_time]
+
+    def medians(self):
+        return pd.Series({mode: tracker.median() for mode, tracker in self.trackers.items() if len(tracker)},
+                         dtype='float64')
+
+    def otif_count(self):
+        count = 0
+        for mode, times in self.in_full_times.items():
+            median = self.trackers[mode].median()
+            count += sum(n for shipping_time, n in times.items() if shipping_time <= median)
+        return count
+
+    def kpis(self):
+        rows = len(self.window)
+        return {
+            'rows': rows,
+            'otif_pct': self.otif_count() / rows * 100 if rows else 0.0,
+            'in_full_pct': self.in_full_count / rows * 100 if rows else 0.0,
+            'expected_shipping_time': self.medians(),
+        }
@@ -0,0 +1,149 @@
+import queue
+import threading
+
+from bulk_loader import accumulate_stats, load_table
+from etl_state import add_row_hash
+
+# Tabla padre: se carga antes que las demás y se confirma primero al terminar
+PARENT_TABLE = 'products'
+DEFAULT_QUEUE_SIZE = 2
+
+_DONE = object()
+
+
+class ParallelLoader:
+    """Carga por tablas en paralelo, solapada con la transformación del siguiente chunk.
+
+    Productos se carga en la conexión principal y cada tabla dependiente en
+    un hilo con su propia conexión (del `pool`) y una cola acotada; si la
+    carga se atrasa, `submit` bloquea (backpressure). Nada se confirma hasta
+    `finish`: si falla cualquier hilo se revierten todas las conexiones,
+    productos incluido. Como una FK no ve filas sin commit de otra conexión,
+    los hilos cargan con foreign_key_checks = 0; la integridad la da el ETL
+    (cada chunk trae los productos de sus filas) y el orden de confirmación:
+    productos primero y después las dependientes.
+    """
+
+    def __init__(self, connection, pool, steps, mode='bulk', chunk_size=None,
+                 known_hashes=None, queue_size=DEFAULT_QUEUE_SIZE):
+        self.connection = connection
+        self.pool = pool
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.known_hashes = known_hashes
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+        self._errors = []
+        self._failed = threading.Event()
+        self._parent_step = next(step for step in steps if step[1] == PARENT_TABLE)
+
+        self._workers = []
+        for _, table, update_columns in steps:
+            if table == PARENT_TABLE:
+                continue
+            worker = {
+                'table': table,
+                'update_columns': update_columns,
+                'queue': queue.Queue(maxsize=queue_size),
+                'connection': None,
+            }
+            worker['thread'] = threading.Thread(target=self._run_worker, args=(worker,),
+                                                name=f"load-{table}", daemon=True)
+            self._workers.append(worker)
+
+        for worker in self._workers:
+            worker['thread'].start()
+
+    def _load(self, cursor, table, df, update_columns):
+        df = add_row_hash(df)
+        if self.known_hashes is not None:
+            df = self.known_hashes[table].filter_new(df)
+        stats = load_table(cursor, table, df, mode=self.mode,
+                           chunk_size=self.chunk_size, update_columns=update_columns)
+        with self._stats_lock:
+            accumulate_stats(self.stats, stats)
+
+    def _run_worker(self, worker):
+        done = False
+        try:
+            worker['connection'] = self.pool.acquire()
+            with worker['connection'].cursor() as cursor:
+                # Los productos de este chunk todavía no están confirmados (ver docstring)
+                cursor.execute("SET SESSION foreign_key_checks = 0")
+                while not done:
+                    df = worker['queue'].get()
+                    done = df is _DONE
+                    if not done and not self._failed.is_set():
+                        self._load(cursor, worker['table'], df, worker['update_columns'])
+        except Exception as e:
+            self._errors.append((worker['table'], e))
+            self._failed.set()
+            # Vaciar la cola hasta el fin para no dejar bloqueado al productor
+            while not done:
+                done = worker['queue'].get() is _DONE
+
+    def _raise_if_failed(self):
+        if self._errors:
+            table, error = self._errors[0]
+            raise RuntimeError(f"Falló la carga de '{table}': {error}") from error
+
+    def submit(self, tables):
+        """Carga productos (sin commit) y encola las tablas dependientes de un chunk."""
+        self._raise_if_failed()
+        _, table, update_columns = self._parent_step
+        with self.connection.cursor() as cursor:
+            self._load(cursor, table, tables[table], update_columns)
+
+        for worker in self._workers:
+            while True:
+                self._raise_if_failed()
+                try:
+                    worker['queue'].put(tables[worker['table']], timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+
+    def finish(self, commit=True):
+        """Espera a los hilos y confirma (o revierte) productos y todas las conexiones de carga.
+
+        Solo se confirma si todos los hilos terminaron bien: primero productos
+        (las filas dependientes nunca quedan sin su SKU) y después cada hilo.
+        """
+        for worker in self._workers:
+            worker['queue'].put(_DONE)
+        for worker in self._workers:
+            worker['thread'].join()
+
+        ok = commit and not self._failed.is_set()
+        if ok:
+            self.connection.commit()
+        else:
+            self.connection.rollback()
+        for worker in self._workers:
+            conn = worker['connection']
+            if conn is None:
+                continue
+            broken = False
+            try:
+                if ok:
+                    conn.commit()
+                else:
+                    conn.rollback()
+                with conn.cursor() as cursor:
+                    cursor.execute("SET SESSION foreign_key_checks = 1")
+            except Exception as e:
+                broken = True
+                self._errors.append((worker['table'], e))
+            finally:
+                worker['connection'] = None
+                self.pool.release(conn, broken=broken)
+        self._raise_if_failed()
+        return self.stats
+
+    def abort(self):
+        """Detiene los hilos y revierte productos y tablas dependientes (usar ante un error)."""
+        self._failed.set()
+        try:
+            self.finish(commit=False)
+        except RuntimeError:
+            pass
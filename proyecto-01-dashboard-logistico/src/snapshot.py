@@ -0,0 +1,193 @@
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Snapshot del DataFrame del dashboard en formato Arrow IPC (sin comprimir), para
+# que varios workers lo mapeen en memoria en vez de consultar MySQL cada uno
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', os.path.join('..', 'data', 'processed', 'dashboard_snapshot'))
+POINTER_NAME = 'CURRENT.json'
+# Snapshots anteriores que se conservan (workers que aún no cambiaron de versión)
+KEEP_SNAPSHOTS = 2
+# Lock de archivo que serializa las publicaciones (ETL y workers que arrancan a la vez)
+LOCK_NAME = 'publish.lock'
+
+
+def _write_atomic(path, write):
+    # Se escribe en un temporal y se reemplaza: los lectores ven el archivo viejo o el nuevo
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def snapshot_file_name(version):
+    safe_version = re.sub(r'[^\w.-]', '_', version)
+    return f"snapshot_{safe_version}.arrow"
+
+
+def read_pointer(snapshot_dir=SNAPSHOT_DIR):
+    path = os.path.join(snapshot_dir, POINTER_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_snapshot(df, version, snapshot_dir=SNAPSHOT_DIR, keep=KEEP_SNAPSHOTS):
+    """Materializa `df` como archivo Arrow y publica la versión en CURRENT.json.
+
+    Primero se escribe el archivo de datos y después el puntero, ambos con
+    reemplazo atómico: un worker nunca abre un snapshot a medio escribir.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    file_name = snapshot_file_name(version)
+
+    def write_table(path):
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    _write_atomic(os.path.join(snapshot_dir, file_name), write_table)
+
+    pointer = {
+        'version': version,
+        'file': file_name,
+        'rows': table.num_rows,
+        'bytes': os.path.getsize(os.path.join(snapshot_dir, file_name)),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+    def write_pointer(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(pointer, f, indent=2)
+
+    _write_atomic(os.path.join(snapshot_dir, POINTER_NAME), write_pointer)
+    remove_old_snapshots(snapshot_dir, file_name, keep)
+    return pointer
+
+
+def remove_old_snapshots(snapshot_dir, current_file, keep=KEEP_SNAPSHOTS):
+    files = sorted((name for name in os.listdir(snapshot_dir)
+                    if name.endswith('.arrow') and name != current_file),
+                   key=lambda name: os.path.getmtime(os.path.join(snapshot_dir, name)), reverse=True)
+    for name in files[max(keep - 1, 0):]:
+        try:
+            # En Linux los workers que lo tienen mapeado lo siguen leyendo hasta soltarlo
+            os.remove(os.path.join(snapshot_dir, name))
+        except OSError:
+            pass
+
+
+def open_snapshot(pointer, snapshot_dir=SNAPSHOT_DIR):
+    """Tabla Arrow mapeada en memoria: no copia los datos ni los lee del disco por adelantado.
+
+    Las páginas del archivo quedan en el page cache del sistema operativo y se
+    comparten entre todos los procesos que abren el mismo snapshot.
+    """
+    source = pa.memory_map(os.path.join(snapshot_dir, pointer['file']), 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+@contextmanager
+def publish_lock(snapshot_dir=SNAPSHOT_DIR):
+    """Lock exclusivo entre procesos sobre LOCK_NAME; espera hasta obtenerlo."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    with open(os.path.join(snapshot_dir, LOCK_NAME), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            # LK_LOCK reintenta unos 10 s y después falla: se sigue esperando
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def snapshot_to_pandas(table, columns=None):
+    """Columnas pedidas del snapshot como DataFrame (las numéricas sin nulos no se copian)."""
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
+    return table.to_pandas(split_blocks=True)
+
+
+class SnapshotReader:
+    """Sigue el puntero CURRENT.json y reabre el snapshot cuando cambia la versión."""
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR):
+        self.snapshot_dir = snapshot_dir
+        self.pointer = None
+        self.table = None
+        self._pointer_mtime = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self.pointer['version'] if self.pointer else None
+
+    def refresh(self):
+        """Abre el snapshot vigente si cambió; devuelve True si hay una versión nueva.
+
+        Solo hace un stat() del puntero, así que se puede llamar en cada callback.
+        """
+        try:
+            mtime = os.stat(os.path.join(self.snapshot_dir, POINTER_NAME)).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._pointer_mtime:
+            return False
+        with self._lock:
+            if mtime == self._pointer_mtime:
+                return False
+            pointer = read_pointer(self.snapshot_dir)
+            self._pointer_mtime = mtime
+            if self.pointer is not None and pointer['version'] == self.version:
+                return False
+            self.table = open_snapshot(pointer, self.snapshot_dir)
+            self.pointer = pointer
+            return True
+
+
+def publish_snapshot(pool=None, snapshot_dir=SNAPSHOT_DIR, if_missing=False):
+    """Lee y prepara el dataset del dashboard (MySQL o staging) y lo publica como snapshot.
+
+    Las publicaciones se serializan con publish_lock. Con `if_missing` solo se
+    publica si todavía no hay snapshot: si varios workers arrancan a la vez, el
+    primero lo genera y el resto espera el lock y usa el mismo.
+    """
+    from dashboard_data import load_dataset, prepare_frame
+
+    with publish_lock(snapshot_dir):
+        if if_missing:
+            pointer = read_pointer(snapshot_dir)
+            if pointer is not None:
+                return pointer
+        df, version = load_dataset(pool)
+        df = prepare_frame(df, compact=os.getenv('DASHBOARD_COMPACT', '1') != '0')
+        return write_snapshot(df, version, snapshot_dir)
+
+
+if __name__ == '__main__':
+    print("📸 Generando snapshot del dashboard...")
+    pointer = publish_snapshot()
+    print(f"✅ Snapshot {pointer['version']}: {pointer['rows']:,} filas, "
+          f"{pointer['bytes'] / 2**20:.2f} MB en {os.path.join(SNAPSHOT_DIR, pointer['file'])}")
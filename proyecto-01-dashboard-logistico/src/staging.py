@@ -0,0 +1,208 @@
+import itertools
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from etl_state import file_checksum
+from etl_transform import SOURCE_ROW
+from ingest import DEFAULT_READ_CHUNK_SIZE, FLOAT_COLUMNS, INT_COLUMNS, read_raw
+
+# Dataset limpio y tipado, en Parquet particionado por categoría y modo de transporte
+# (STAGING_DIR permite apuntar a otro staging, p. ej. el de los benchmarks)
+STAGING_DIR = os.getenv('STAGING_DIR', os.path.join('..', 'data', 'processed', 'supply_chain'))
+PARTITION_COLUMNS = ['product_type', 'transportation_mode']
+MANIFEST_NAME = '_manifest.json'
+# Versión del formato del staging: un staging de otra versión se regenera
+# aunque el CSV no haya cambiado (2 = columna source_row)
+STAGING_FORMAT = 2
+# Sufijo del staging anterior mientras se reemplaza por el nuevo
+BACKUP_SUFFIX = '.old'
+
+
+def read_manifest(staging_dir=STAGING_DIR):
+    path = os.path.join(staging_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def staging_schema(columns):
+    """Esquema Arrow del staging según los dtypes de ingest, no según el primer bloque.
+
+    Inferido de un bloque, una columna toda nula o entera en el primero y
+    decimal en otro rompería la escritura de los siguientes.
+    """
+    types = {SOURCE_ROW: pa.int64(),
+             **{col: pa.float64() for col in FLOAT_COLUMNS},
+             **{col: pa.int64() for col in INT_COLUMNS}}
+    return pa.schema([pa.field(col, types.get(col, pa.string())) for col in columns])
+
+
+def number_rows(chunks):
+    """Agrega a cada bloque la posición de sus filas en el CSV (source_row, desde 0)."""
+    offset = 0
+    for chunk in chunks:
+        chunk.insert(0, SOURCE_ROW, np.arange(offset, offset + len(chunk), dtype='int64'))
+        offset += len(chunk)
+        yield chunk
+
+
+def _recover_backup(staging_dir):
+    backup_dir = staging_dir + BACKUP_SUFFIX
+    if not os.path.exists(staging_dir) and os.path.exists(backup_dir):
+        # Un reemplazo anterior se cortó entre los dos renombres: vuelve el respaldo
+        os.replace(backup_dir, staging_dir)
+
+
+def _is_current(manifest, checksum, force=False):
+    return (not force and manifest is not None and manifest['checksum'] == checksum
+            and manifest.get('format') == STAGING_FORMAT)
+
+
+def _first_chunk(chunks, raw_path):
+    first_chunk = next(chunks, None)
+    if first_chunk is None or first_chunk.empty:
+        raise ValueError(f"El CSV {raw_path} no tiene filas: no hay nada que pasar a staging")
+    return first_chunk
+
+
+def _write_chunks(tables, tmp_dir, schema, basename_template=None):
+    ds.write_dataset(
+        data=tables,
+        base_dir=tmp_dir,
+        schema=schema,
+        format='parquet',
+        basename_template=basename_template,
+        partitioning=ds.partitioning(pa.schema([schema.field(col) for col in PARTITION_COLUMNS]),
+                                     flavor='hive'),
+        existing_data_behavior='overwrite_or_ignore',
+    )
+
+
+def _publish(tmp_dir, staging_dir, raw_path, checksum, schema):
+    """Escribe el manifiesto del staging temporal y lo pone en lugar del vigente."""
+    rows = ds.dataset(tmp_dir, format='parquet', partitioning='hive').count_rows()
+    manifest = {
+        'source_file': os.path.basename(raw_path),
+        'checksum': checksum,
+        'format': STAGING_FORMAT,
+        'rows': rows,
+        'columns': schema.names,
+        'partitions': PARTITION_COLUMNS,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    swap_dirs(tmp_dir, staging_dir)
+    return manifest
+
+
+def stage_raw(raw_path, staging_dir=STAGING_DIR, chunk_size=DEFAULT_READ_CHUNK_SIZE, force=False):
+    """Escribe el CSV crudo en staging, solo si cambió desde la última vez.
+
+    El CSV se parsea de a bloques y se escribe en un directorio temporal que
+    reemplaza al anterior al terminar (ver swap_dirs), así los lectores nunca
+    ven un staging a medio escribir. Devuelve el manifiesto del staging vigente.
+    """
+    _recover_backup(staging_dir)
+    checksum = file_checksum(raw_path)
+    manifest = read_manifest(staging_dir)
+    if _is_current(manifest, checksum, force):
+        return manifest
+
+    tmp_dir = staging_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    chunks = number_rows(read_raw(raw_path, chunk_size))
+    first_chunk = _first_chunk(chunks, raw_path)
+    schema = staging_schema(first_chunk.columns)
+
+    def batches():
+        # Table y no RecordBatch: las columnas de texto pueden venir en varios trozos
+        for chunk in itertools.chain([first_chunk], chunks):
+            yield from pa.Table.from_pandas(chunk, schema=schema, preserve_index=False).to_batches()
+
+    _write_chunks(batches(), tmp_dir, schema)
+    return _publish(tmp_dir, staging_dir, raw_path, checksum, schema)
+
+
+def stage_chunks(raw_path, staging_dir=STAGING_DIR, chunk_size=DEFAULT_READ_CHUNK_SIZE, force=False):
+    """Como stage_raw, pero entrega cada bloque del CSV (en su orden) a medida que lo escribe.
+
+    Para la carga en streaming: el CSV se recorre una sola vez y cada bloque
+    se pasa a staging y se carga en la misma vuelta, sin esperar al archivo
+    entero. Si el staging ya está al día solo se entregan los bloques. El
+    staging nuevo reemplaza al vigente recién cuando se consumió el último.
+    """
+    _recover_backup(staging_dir)
+    checksum = file_checksum(raw_path)
+    chunks = number_rows(read_raw(raw_path, chunk_size))
+    first_chunk = _first_chunk(chunks, raw_path)
+    if _is_current(read_manifest(staging_dir), checksum, force):
+        yield from itertools.chain([first_chunk], chunks)
+        return
+
+    tmp_dir = staging_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    schema = staging_schema(first_chunk.columns)
+    for number, chunk in enumerate(itertools.chain([first_chunk], chunks)):
+        _write_chunks(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False), tmp_dir, schema,
+                      basename_template=f'part-{number}-{{i}}.parquet')
+        yield chunk
+    _publish(tmp_dir, staging_dir, raw_path, checksum, schema)
+
+
+def swap_dirs(new_dir, target):
+    """Reemplaza el directorio `target` por `new_dir` sin borrar antes el anterior.
+
+    El anterior se renombra a un respaldo y solo se elimina cuando el nuevo ya
+    está en su lugar; si el segundo renombre falla se restaura. Un corte entre
+    ambos renombres deja el respaldo, que stage_raw recupera en la próxima corrida.
+    """
+    backup = target + BACKUP_SUFFIX
+    shutil.rmtree(backup, ignore_errors=True)
+    if os.path.exists(target):
+        os.replace(target, backup)
+    try:
+        os.replace(new_dir, target)
+    except OSError:
+        if os.path.exists(backup):
+            os.replace(backup, target)
+        raise
+    shutil.rmtree(backup, ignore_errors=True)
+
+
+def _dataset(staging_dir=STAGING_DIR):
+    if read_manifest(staging_dir) is None:
+        raise FileNotFoundError(f"No hay datos en staging ({staging_dir}); ejecuta stage_raw primero")
+    return ds.dataset(staging_dir, format='parquet', partitioning='hive')
+
+
+def _to_pandas(table):
+    df = table.to_pandas()
+    # Las particiones vuelven como categorías: se dejan como texto igual que el resto
+    for col in PARTITION_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    return df
+
+
+def read_staged(columns=None, filter=None, staging_dir=STAGING_DIR):
+    """Lee el staging leyendo solo las columnas y particiones pedidas."""
+    table = _dataset(staging_dir).to_table(columns=columns, filter=filter)
+    return _to_pandas(table)
+
+
+def iter_staged(columns=None, filter=None, batch_size=DEFAULT_READ_CHUNK_SIZE, staging_dir=STAGING_DIR):
+    """Igual que read_staged, pero entregando DataFrames de a `batch_size` filas."""
+    scanner = _dataset(staging_dir).scanner(columns=columns, filter=filter, batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield _to_pandas(pa.Table.from_batches([batch]))
@@ -0,0 +1,360 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from ingest import DEFAULT_READ_CHUNK_SIZE
+from etl_transform import SOURCE_ROW
+from staging import STAGING_DIR, read_manifest
+
+# Tamaños de los resúmenes por columna (memoria acotada sin importar las filas)
+QUANTILE_SKETCH_SIZE = 4_096     # valores por nivel del sketch de cuantiles
+TOP_K_CAPACITY = 200             # contadores de Misra-Gries para value_counts
+DISTINCT_EXACT_LIMIT = 10_000    # hasta aquí los distintos se cuentan exactos; luego HyperLogLog
+HLL_PRECISION = 14               # 2^14 registros: error típico ~0.8%
+
+
+class QuantileSketch:
+    """Sketch de cuantiles por niveles (estilo KLL), combinable entre procesos.
+
+    Cada nivel guarda a lo sumo `size` valores; al llenarse se ordena y sube
+    uno de cada dos valores al nivel siguiente, donde cada valor pesa el
+    doble. Mientras todo cabe en el nivel 0 los cuantiles son exactos.
+    """
+
+    def __init__(self, size=QUANTILE_SKETCH_SIZE):
+        self.size = size
+        self.levels = [np.empty(0)]
+        self._compactions = 0
+
+    def update(self, values):
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        for level, values in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], values])
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self.size:
+                items = np.sort(self.levels[level])
+                # Un valor queda en el nivel si la cantidad es impar
+                keep, items = items[len(items) - len(items) % 2:], items[:len(items) - len(items) % 2]
+                # Alternar qué mitad sube evita sesgar los cuantiles hacia arriba o abajo
+                promoted = items[self._compactions % 2::2]
+                self._compactions += 1
+                self.levels[level] = keep
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q):
+        if len(self.levels) == 1:
+            # Exacto, con la misma interpolación lineal que pandas
+            return float(np.quantile(self.levels[0], q)) if len(self.levels[0]) else float('nan')
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(v), 2.0 ** level) for level, v in enumerate(self.levels)])
+        order = np.argsort(values)
+        values, weights = values[order], weights[order]
+        centers = np.cumsum(weights) - weights / 2
+        return float(np.interp(q * weights.sum(), centers, values))
+
+
+class HyperLogLog:
+    """Cardinalidad aproximada con 2^precision registros de un byte, combinable con max()."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # Posición del primer bit en 1 de los bits restantes (1 = el más significativo)
+        rank = np.full(len(rest), bits + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        rank[nonzero] = bits - np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Corrección para cardinalidades bajas (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+def misra_gries_merge(counters, counts, capacity=TOP_K_CAPACITY):
+    """Suma dos resúmenes de frecuencias y los reduce a `capacity` contadores.
+
+    Devuelve (contadores, recortado). Si nunca hubo que recortar los conteos
+    son exactos; si no, cada conteo subestima el real en a lo sumo n/capacity.
+    """
+    merged = dict(counters)
+    for value, count in counts.items():
+        merged[value] = merged.get(value, 0) + count
+    if len(merged) <= capacity:
+        return merged, False
+    threshold = sorted(merged.values(), reverse=True)[capacity]
+    return {value: count - threshold for value, count in merged.items() if count > threshold}, True
+
+
+class ColumnProfile:
+    """Agregados parciales de una columna; se combinan con merge() en cualquier orden."""
+
+    def __init__(self, name, dtype, numeric):
+        self.name = name
+        self.dtype = dtype
+        self.numeric = numeric
+        self.count = 0
+        self.nulls = 0
+        self.nbytes = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.quantiles = QuantileSketch() if numeric else None
+        self.top = {}
+        self.top_truncated = False
+        self.distinct = set()
+        self.hll = HyperLogLog()
+
+    def update(self, array):
+        self.nulls += array.null_count
+        self.nbytes += array.nbytes
+        array = pc.drop_null(array)
+        n = len(array)
+        if n == 0:
+            return
+        values = array.to_pandas()
+
+        if self.numeric:
+            x = values.to_numpy(dtype='float64')
+            mean = x.mean()
+            self._merge_moments(n, mean, float(((x - mean) ** 2).sum()))
+            self.total += float(x.sum())
+            self.min = x.min() if self.min is None else min(self.min, x.min())
+            self.max = x.max() if self.max is None else max(self.max, x.max())
+            self.quantiles.update(x)
+        else:
+            self.count += n
+            self.top, truncated = misra_gries_merge(self.top, values.value_counts().to_dict())
+            self.top_truncated |= truncated
+
+        self.hll.update(pd.util.hash_pandas_object(values, index=False).to_numpy())
+        if self.distinct is not None:
+            self.distinct.update(values.unique().tolist())
+            if len(self.distinct) > DISTINCT_EXACT_LIMIT:
+                self.distinct = None
+
+    def _merge_moments(self, n, mean, m2):
+        # Welford/Chan: combina media y suma de cuadrados de dos particiones
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    def merge(self, other):
+        self.nulls += other.nulls
+        self.nbytes += other.nbytes
+        if self.numeric:
+            if other.count:
+                self._merge_moments(other.count, other.mean, other.m2)
+                self.total += other.total
+                self.min = other.min if self.min is None else min(self.min, other.min)
+                self.max = other.max if self.max is None else max(self.max, other.max)
+                self.quantiles.merge(other.quantiles)
+        else:
+            self.count += other.count
+            self.top, truncated = misra_gries_merge(self.top, other.top)
+            self.top_truncated |= truncated or other.top_truncated
+        self.hll.merge(other.hll)
+        if self.distinct is not None and other.distinct is not None:
+            self.distinct |= other.distinct
+            if len(self.distinct) > DISTINCT_EXACT_LIMIT:
+                self.distinct = None
+        else:
+            self.distinct = None
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else float('nan')
+
+    def nunique(self):
+        return len(self.distinct) if self.distinct is not None else self.hll.estimate()
+
+    def value_counts(self):
+        """Como Series.value_counts(); aproximado (cota inferior) si hubo que recortar."""
+        counts = pd.Series(self.top, name='count', dtype='int64').sort_values(ascending=False, kind='stable')
+        counts.index.name = self.name
+        return counts
+
+
+class DatasetProfile:
+    def __init__(self, schema):
+        self.rows = 0
+        self.dtypes = _pandas_dtypes(schema)
+        self.columns = {field.name: ColumnProfile(field.name, self.dtypes[field.name],
+                                                  pa.types.is_integer(field.type)
+                                                  or pa.types.is_floating(field.type))
+                        for field in schema}
+
+    def update(self, table):
+        self.rows += table.num_rows
+        for name, profile in self.columns.items():
+            profile.update(table.column(name))
+
+    def merge(self, other):
+        self.rows += other.rows
+        for name, profile in self.columns.items():
+            profile.merge(other.columns[name])
+
+
+def _to_pandas(table):
+    df = table.to_pandas()
+    # Las particiones se dejan como texto, igual que staging.read_staged
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str)
+    return df
+
+
+def _pandas_dtypes(schema):
+    return _to_pandas(schema.empty_table()).dtypes.to_dict()
+
+
+def staged_tasks(staging_dir=STAGING_DIR):
+    """Unidades de trabajo: (archivo, row group, valores de partición) de cada fragmento."""
+    if read_manifest(staging_dir) is None:
+        raise FileNotFoundError(f"No hay datos en staging ({staging_dir}); ejecuta stage_raw primero")
+    dataset = ds.dataset(staging_dir, format='parquet', partitioning='hive')
+    # source_row la agrega el staging (posición en el CSV): no es una columna del dataset
+    schema = dataset.schema
+    if SOURCE_ROW in schema.names:
+        schema = schema.remove(schema.get_field_index(SOURCE_ROW))
+    tasks = []
+    for fragment in dataset.get_fragments():
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        for row_group in range(fragment.metadata.num_row_groups):
+            tasks.append((fragment.path, row_group, keys))
+    return schema, tasks
+
+
+def profile_task(args):
+    """Perfila un row group de a lotes de `batch_size` filas (se ejecuta en un proceso del pool)."""
+    path, row_group, keys, schema, batch_size = args
+    profile = DatasetProfile(schema)
+    parquet_file = pq.ParquetFile(path)
+    batches = parquet_file.iter_batches(batch_size=batch_size, row_groups=[row_group])
+    for batch in batches:
+        table = pa.Table.from_batches([batch])
+        for col, value in keys.items():
+            table = table.append_column(schema.field(col), pa.array([value] * table.num_rows,
+                                                                   schema.field(col).type))
+        profile.update(table.select(schema.names))
+    return profile
+
+
+def profile_staged(staging_dir=STAGING_DIR, workers=None, batch_size=DEFAULT_READ_CHUNK_SIZE):
+    """Perfil completo del staging en una sola pasada, repartida en un pool de procesos.
+
+    Cada proceso lee sus row groups de a lotes y devuelve agregados parciales
+    (conteos, Welford, min/max, sketches) que se combinan aquí: la memoria no
+    depende del tamaño del archivo, solo del lote y de los sketches.
+    """
+    schema, tasks = staged_tasks(staging_dir)
+    args = [(path, row_group, keys, schema, batch_size) for path, row_group, keys in tasks]
+    workers = workers or int(os.getenv('EXPLORE_WORKERS', os.cpu_count() or 1))
+
+    profile = DatasetProfile(schema)
+    if workers <= 1 or len(args) <= 1:
+        for partial in map(profile_task, args):
+            profile.merge(partial)
+        return profile
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(args))) as executor:
+        for partial in executor.map(profile_task, args):
+            profile.merge(partial)
+    return profile
+
+
+def describe(profile):
+    """Equivalente a DataFrame.describe() (columnas numéricas)."""
+    stats = {}
+    for name, col in profile.columns.items():
+        if not col.numeric:
+            continue
+        stats[name] = [col.count, col.mean if col.count else float('nan'), col.std,
+                       col.min if col.count else float('nan'),
+                       col.quantiles.quantile(0.25), col.quantiles.quantile(0.5),
+                       col.quantiles.quantile(0.75), col.max if col.count else float('nan')]
+    result = pd.DataFrame(stats, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'],
+                          dtype='float64')
+    # Como pandas: las columnas de enteros con nulos (Int64) se describen como Float64
+    for name in result.columns:
+        if isinstance(profile.columns[name].dtype, pd.api.extensions.ExtensionDtype):
+            result[name] = result[name].astype('Float64')
+    return result
+
+
+def null_counts(profile):
+    """Equivalente a DataFrame.isnull().sum()."""
+    return pd.Series({name: col.nulls for name, col in profile.columns.items()}, dtype='int64')
+
+
+def format_bytes(num):
+    # Mismo formato que DataFrame.info(): "12.6 MB"
+    for unit in ['bytes', 'KB', 'MB', 'GB', 'TB']:
+        if num < 1024:
+            return f"{num:3.1f} {unit}"
+        num /= 1024
+    return f"{num:3.1f} PB"
+
+
+def info_text(profile):
+    """Mismo formato que DataFrame.info(); la memoria se estima por tipo (texto: bytes de Arrow)."""
+    names = list(profile.columns)
+    dtypes = [str(col.dtype) for col in profile.columns.values()]
+    name_width = max(len('Column'), *map(len, names)) + 2
+    count_width = len('Non-Null Count') + 2
+    dtype_width = max(len('Dtype'), *map(len, dtypes))
+    lines = [str(pd.DataFrame),
+             f"RangeIndex: {profile.rows} entries, 0 to {profile.rows - 1}",
+             f"Data columns (total {len(names)} columns):",
+             f" #   {'Column':<{name_width}}{'Non-Null Count':<{count_width}}{'Dtype':<{dtype_width}}",
+             f"---  {'------':<{name_width}}{'--------------':<{count_width}}{'-----':<{dtype_width}}"]
+    memory = 132
+    for i, (name, col) in enumerate(profile.columns.items()):
+        non_null = f"{profile.rows - col.nulls} non-null"
+        lines.append(f" {i:<3} {name:<{name_width}}{non_null:<{count_width}}{str(col.dtype):<{dtype_width}}")
+        if col.numeric:
+            # Los enteros con nulos de pandas (Int64) llevan además una máscara de 1 byte por fila
+            masked = isinstance(col.dtype, pd.api.extensions.ExtensionDtype)
+            memory += (col.dtype.itemsize + masked) * profile.rows
+        else:
+            memory += col.nbytes
+    counts = pd.Series(dtypes).value_counts()
+    lines.append(f"dtypes: {', '.join(f'{dtype}({n})' for dtype, n in sorted(counts.items()))}")
+    lines.append(f"memory usage: {format_bytes(memory)}")
+    return '\n'.join(lines)
@@ -0,0 +1,145 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from etl_transform import COLUMN_MAP
+from ingest import FLOAT_COLUMNS
+
+# Tamaños de referencia para los benchmarks
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+SYNTHETIC_DIR = os.path.join('..', 'data', 'raw', 'synthetic')
+GENERATE_CHUNK_ROWS = 500_000
+
+# Categorías del dataset original (cardinalidades reales)
+PRODUCT_TYPES = ['haircare', 'skincare', 'cosmetics']
+DEMOGRAPHICS = ['Non-binary', 'Female', 'Unknown', 'Male']
+LOCATIONS = ['Mumbai', 'Kolkata', 'Delhi', 'Bangalore', 'Chennai']
+INSPECTION_RESULTS = ['Pending', 'Fail', 'Pass']
+TRANSPORTATION_MODES = ['Road', 'Air', 'Rail', 'Sea']
+ROUTES = ['Route A', 'Route B', 'Route C']
+
+# Rangos (mínimo, máximo) observados en el CSV original
+INT_RANGES = {
+    'availability': (1, 100),
+    'products_sold': (8, 996),
+    'stock_levels': (0, 100),
+    'lead_times': (1, 30),
+    'order_quantities': (1, 96),
+    'shipping_times': (1, 10),
+    'lead_time': (1, 30),
+    'production_volumes': (104, 985),
+    'manufacturing_lead_time': (1, 30),
+}
+FLOAT_RANGES = {
+    'price': (1.0, 99.99),
+    'revenue_generated': (1_000.0, 9_999.0),
+    'shipping_costs': (1.0, 9.99),
+    'manufacturing_costs': (1.0, 99.99),
+    'defect_rates': (0.01, 4.99),
+    'total_costs': (100.0, 999.0),
+}
+
+
+def parse_size(value):
+    """'10k' / '1m' / '10m' / '250000' -> cantidad de filas."""
+    value = value.lower().replace('_', '')
+    if value in SIZES:
+        return SIZES[value]
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    if value[-1] in multipliers:
+        return int(float(value[:-1]) * multipliers[value[-1]])
+    return int(value)
+
+
+def generate_frame(rows, rng, start=0, n_suppliers=5, n_carriers=3):
+    """Bloque de `rows` filas tipadas (nombres de la BD), con SKU únicos desde `start`."""
+    df = pd.DataFrame({
+        'product_type': rng.choice(PRODUCT_TYPES, rows),
+        'sku': 'SKU' + pd.Series(np.arange(start, start + rows)).astype(str),
+        'customer_demographics': rng.choice(DEMOGRAPHICS, rows),
+        'shipping_carrier': rng.choice([f"Carrier {chr(65 + i)}" for i in range(n_carriers)], rows),
+        'supplier_name': rng.choice([f"Supplier {i}" for i in range(1, n_suppliers + 1)], rows),
+        'location': rng.choice(LOCATIONS, rows),
+        'inspection_results': rng.choice(INSPECTION_RESULTS, rows),
+        'transportation_mode': rng.choice(TRANSPORTATION_MODES, rows),
+        'route': rng.choice(ROUTES, rows),
+    })
+    for col, (low, high) in INT_RANGES.items():
+        df[col] = rng.integers(low, high + 1, rows)
+    for col, (low, high) in FLOAT_RANGES.items():
+        df[col] = rng.uniform(low, high, rows)
+    return df[list(COLUMN_MAP.values())]
+
+
+def mangle_decimal(values, limit):
+    """Reproduce la exportación dañada del CSV original, vectorizado con pyarrow.
+
+    Los valores con tantos dígitos enteros como la cota pierden el punto
+    decimal y quedan con punto de miles (69.808 -> '698.082.441.968.300');
+    el resto se escribe normal, así ingest.parse_decimal los recupera todos.
+    """
+    int_digits = len(str(int(limit - 1)))
+    arr = pa.array(values.to_numpy(dtype='float64'))
+    full = pc.greater_equal(arr, 10 ** (int_digits - 1))
+
+    # 15 dígitos significativos -> cinco grupos de 3 separados por punto
+    scaled = pc.round(pc.multiply(arr, 10 ** (15 - int_digits)))
+    digits = pc.cast(pc.min_element_wise(scaled, 10 ** 15 - 1), pa.int64()).cast(pa.string())
+    pieces = [pc.utf8_slice_codeunits(digits, i, i + 3) for i in range(0, 15, 3)]
+    grouped = pc.binary_join_element_wise(*pieces, '.')
+
+    text = pc.if_else(full, grouped, pc.cast(arr, pa.string()))
+    return pd.Series(pd.arrays.ArrowExtensionArray(text), index=values.index)
+
+
+def to_raw(df):
+    """Bloque tipado -> columnas y formato del CSV crudo original."""
+    raw = df.copy()
+    for col, limit in FLOAT_COLUMNS.items():
+        raw[col] = mangle_decimal(raw[col], limit)
+    return raw.rename(columns={db: original for original, db in COLUMN_MAP.items()})
+
+
+def generate_file(path, rows, seed=42, raw=True, chunk_rows=GENERATE_CHUNK_ROWS, **cardinalities):
+    """Escribe un CSV sintético de `rows` filas por bloques (memoria acotada).
+
+    raw=True imita el archivo original (';' y decimales dañados); raw=False
+    escribe un CSV limpio con ',' y decimales normales.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk_rows):
+        chunk = generate_frame(min(chunk_rows, rows - start), rng, start, **cardinalities)
+        chunk = to_raw(chunk) if raw else chunk.rename(
+            columns={db: original for original, db in COLUMN_MAP.items()})
+        chunk.to_csv(path, sep=';' if raw else ',', index=False,
+                     mode='w' if start == 0 else 'a', header=start == 0)
+    return path
+
+
+def synthetic_path(label, raw=True):
+    return os.path.join(SYNTHETIC_DIR, f"supply_chain_{label}{'' if raw else '_clean'}.csv")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genera CSV sintéticos con el esquema del dataset original')
+    parser.add_argument('--sizes', nargs='+', default=['10k'],
+                        help="tamaños a generar: 10k, 1m, 10m o un número de filas")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--suppliers', type=int, default=5)
+    parser.add_argument('--carriers', type=int, default=3)
+    parser.add_argument('--clean', action='store_true',
+                        help="CSV limpio (',' y decimales normales) en vez del formato original")
+    args = parser.parse_args()
+
+    for label in args.sizes:
+        rows = parse_size(label)
+        path = synthetic_path(label, raw=not args.clean)
+        print(f"🛠️  Generando {rows:,} filas en {path}...")
+        generate_file(path, rows, seed=args.seed, raw=not args.clean,
+                      n_suppliers=args.suppliers, n_carriers=args.carriers)
+        print(f"✅ {os.path.getsize(path) / 1e6:,.1f} MB")
@@ -0,0 +1,115 @@
+import csv
+import os
+import re
+import sqlite3
+import sys
+
+import pytest
+
+# Los módulos de src/ se importan por nombre (igual que al ejecutarlos desde src/)
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+# CSV de ejemplo versionado en la raíz del repositorio (formato de la exportación original)
+SAMPLE_CSV = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..',
+                                          'supply_chain_data_analizado.csv'))
+
+
+@pytest.fixture(scope='session')
+def sample_csv():
+    return SAMPLE_CSV
+
+
+# SQL de MySQL que usan los módulos de src/ y su equivalente en sqlite3
+LOAD_DATA_PATTERN = re.compile(r"LOAD DATA LOCAL INFILE %s INTO TABLE (\w+).*\(([^()]*)\)\s*$", re.S)
+SQLITE_REWRITES = [
+    (re.compile(r'ON DUPLICATE KEY UPDATE'), 'ON CONFLICT DO UPDATE SET'),
+    (re.compile(r'VALUES\((\w+)\)'), r'excluded.\1'),
+    (re.compile(r'SET SESSION foreign_key_checks = 0'), 'PRAGMA foreign_keys = OFF'),
+    (re.compile(r'SET SESSION foreign_key_checks = 1'), 'PRAGMA foreign_keys = ON'),
+    (re.compile(r'%s'), '?'),
+]
+
+
+# row_hash es BIGINT UNSIGNED en MySQL; sqlite3 solo tiene enteros de 64 bits con signo
+SQLITE_MAX_INT = 2**63 - 1
+
+
+def to_sqlite(sql):
+    for pattern, replacement in SQLITE_REWRITES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def to_sqlite_params(params):
+    return tuple(str(value) if isinstance(value, int) and value > SQLITE_MAX_INT else value
+                 for value in params or ())
+
+
+class MySQLCursor:
+    """Cursor de sqlite3 que acepta el SQL de pymysql/MySQL de src/ (y sirve de context manager).
+
+    Traduce los placeholders %s, el upsert ON DUPLICATE KEY UPDATE y
+    foreign_key_checks; LOAD DATA LOCAL INFILE se emula leyendo el CSV.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def execute(self, sql, params=()):
+        load_data = LOAD_DATA_PATTERN.search(sql)
+        if load_data:
+            return self._load_data(load_data.group(1), load_data.group(2), params[0])
+        return self._cursor.execute(to_sqlite(sql), to_sqlite_params(params))
+
+    def executemany(self, sql, rows):
+        return self._cursor.executemany(to_sqlite(sql), [to_sqlite_params(row) for row in rows])
+
+    def _load_data(self, table, columns, path):
+        # Mismo formato que lee MySQL: sin escape, NULL sin comillas es NULL
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = [[None if value == 'NULL' else value for value in row] for row in csv.reader(f)]
+        placeholders = ', '.join(['?'] * len(columns.split(',')))
+        return self._cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", rows)
+
+
+class MySQLConnection:
+    """Conexión sqlite3 en memoria con la interfaz que usan los módulos de src/ (cursor() de pymysql)."""
+
+    def __init__(self):
+        self._connection = sqlite3.connect(':memory:', detect_types=sqlite3.PARSE_DECLTYPES,
+                                           check_same_thread=False)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self):
+        return MySQLCursor(self._connection.cursor())
+
+
+@pytest.fixture
+def mysql_connect():
+    """Fábrica de conexiones MySQLConnection (cada una con su propia base en memoria)."""
+    connections = []
+
+    def connect():
+        connections.append(MySQLConnection())
+        return connections[-1]
+
+    yield connect
+    for connection in connections:
+        connection.close()
+
+
+@pytest.fixture
+def mysql_connection(mysql_connect):
+    return mysql_connect()
@@ -0,0 +1,27 @@
+import os
+
+import pandas as pd
+
+from analytics import (RESULT_FRAMES, RESULTS_FILE, compute_analytics, prepare_analysis_frame,
+                       read_results, save_cached, version_dir)
+from etl_transform import SOURCE_ROW, split_tables
+from fact_model import build_fact_table
+from ingest import read_raw
+
+
+def test_results_cache_round_trip(tmp_path, sample_csv):
+    df = read_raw(sample_csv)
+    df.insert(0, SOURCE_ROW, range(len(df)))
+    tables = split_tables(df)
+    fact = build_fact_table(tables['sales'], tables['products'], tables['logistics'], tables['production'])
+    results = {'version': 'run-1', **compute_analytics(prepare_analysis_frame(fact))}
+
+    save_cached('run-1', results=results, cache_dir=str(tmp_path))
+    path = os.path.join(version_dir('run-1', str(tmp_path)), RESULTS_FILE)
+    cached = read_results(path)
+
+    for name in RESULT_FRAMES:
+        pd.testing.assert_frame_equal(cached[name], results[name])
+    assert cached['version'] == 'run-1'
+    assert cached['kpis'] == results['kpis']
+    assert cached['filter_options'] == results['filter_options']
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bulk_loader import LOAD_MODES, load_table
+
+
+@pytest.fixture
+def cursor(mysql_connection):
+    with mysql_connection.cursor() as cursor:
+        cursor.execute("CREATE TABLE items (sku TEXT PRIMARY KEY, price REAL, stock INTEGER)")
+        cursor.execute("CREATE TABLE facts (id INTEGER PRIMARY KEY, source_row INTEGER, sku TEXT, qty INTEGER)")
+        yield cursor
+
+
+def fetch(cursor, sql):
+    cursor.execute(sql)
+    return cursor.fetchall()
+
+
+def facts(source_rows, qty):
+    return pd.DataFrame({'source_row': source_rows, 'sku': [f"SKU{row}" for row in source_rows],
+                         'qty': pd.array(qty, dtype='Int64')})
+
+
+@pytest.mark.parametrize('mode', LOAD_MODES)
+def test_every_mode_loads_rows_and_nulls(cursor, mode):
+    items = pd.DataFrame({'sku': ['SKU0', 'SKU1', 'SKU2'], 'price': [1.5, np.nan, 3.0],
+                          'stock': pd.array([10, 20, None], dtype='Int64')})
+
+    stats = load_table(cursor, 'items', items, mode=mode, chunk_size=2)
+
+    assert (stats['table'], stats['mode'], stats['rows']) == ('items', mode, 3)
+    assert fetch(cursor, "SELECT sku, price, stock FROM items ORDER BY sku") == \
+        [('SKU0', 1.5, 10), ('SKU1', None, 20), ('SKU2', 3.0, None)]
+
+
+@pytest.mark.parametrize('mode', LOAD_MODES)
+def test_reloaded_source_rows_replace_previous_version(cursor, mode):
+    load_table(cursor, 'facts', facts(range(5), [1, 2, 3, 4, 5]), mode=mode)
+
+    load_table(cursor, 'facts', facts([1, 3], [20, 40]), mode=mode, chunk_size=1)
+
+    assert fetch(cursor, "SELECT source_row, qty FROM facts ORDER BY source_row") == \
+        [(0, 1), (1, 20), (2, 3), (3, 40), (4, 5)]
+
+
+def test_update_columns_upsert_on_unique_key(cursor):
+    items = pd.DataFrame({'sku': ['SKU0', 'SKU1'], 'price': [1.0, 2.0], 'stock': [10, 20]})
+    load_table(cursor, 'items', items, update_columns=['price'])
+
+    changed = pd.DataFrame({'sku': ['SKU1', 'SKU2'], 'price': [2.5, 3.0], 'stock': [99, 30]})
+    stats = load_table(cursor, 'items', changed, mode='infile', update_columns=['price'])
+
+    # LOAD DATA no admite upsert: cae a lotes; stock no está entre las columnas a actualizar
+    assert stats['mode'] == 'bulk'
+    assert fetch(cursor, "SELECT sku, price, stock FROM items ORDER BY sku") == \
+        [('SKU0', 1.0, 10), ('SKU1', 2.5, 20), ('SKU2', 3.0, 30)]
+
+
+def test_unknown_mode_is_rejected(cursor):
+    with pytest.raises(ValueError, match='Modo de carga desconocido'):
+        load_table(cursor, 'items', pd.DataFrame({'sku': ['SKU0']}), mode='copy')
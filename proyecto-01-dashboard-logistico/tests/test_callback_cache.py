@@ -0,0 +1,39 @@
+import time
+
+from callback_cache import LRUTTLCache
+
+
+def test_get_or_compute_computes_once():
+    cache = LRUTTLCache(maxsize=4, ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'vista'
+
+    assert cache.get_or_compute('k', compute) == ('vista', False)
+    assert cache.get_or_compute('k', compute) == ('vista', True)
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_cached_none_is_a_hit():
+    cache = LRUTTLCache()
+    cache.set('k', None)
+    assert cache.get_or_compute('k', lambda: 'otro') == (None, True)
+
+
+def test_lru_eviction_and_expiration():
+    cache = LRUTTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1
+    assert cache.evictions == 1
+
+    cache.ttl = 0
+    cache.set('d', 4)
+    time.sleep(0.001)
+    assert cache.get('d') is None
+    assert cache.expirations == 1
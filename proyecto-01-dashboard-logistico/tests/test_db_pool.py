@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+
+import pymysql
+import pytest
+
+import db
+from db import ConnectionPool, get_pool
+
+
+def sqlite_pool(**kwargs):
+    return ConnectionPool(lambda: sqlite3.connect(':memory:'), **kwargs)
+
+
+def test_released_connection_is_reused():
+    pool = sqlite_pool(maxsize=2)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+    assert pool.created == 1
+
+
+def test_connection_context_returns_connection_to_pool():
+    pool = sqlite_pool(maxsize=1, timeout=0.05)
+    with pool.connection() as conn:
+        conn.execute('SELECT 1')
+    with pool.connection() as again:
+        assert again is conn
+
+
+def test_connection_context_rolls_back_and_keeps_connection_on_app_error():
+    pool = sqlite_pool(maxsize=1, timeout=0.05)
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.execute('CREATE TABLE t (x INTEGER)')
+            conn.commit()
+            conn.execute('INSERT INTO t VALUES (1)')
+            raise RuntimeError('falla en el bloque')
+
+    # Error de la aplicación: la transacción se revirtió y la conexión se reutiliza
+    with pool.connection() as again:
+        assert again is conn
+        assert again.execute('SELECT COUNT(*) FROM t').fetchone() == (0,)
+    assert pool.created == 1
+
+
+@pytest.mark.parametrize('error', [pymysql.err.OperationalError(2013, 'Lost connection'),
+                                   pymysql.err.InterfaceError(0, '')])
+def test_connection_context_discards_connection_on_connection_error(error):
+    pool = sqlite_pool(maxsize=1, timeout=0.05)
+    with pytest.raises(type(error)):
+        with pool.connection() as conn:
+            raise error
+
+    # El slot se liberó, pero la conexión se cerró y se abre otra
+    with pool.connection() as again:
+        assert again is not conn
+    assert pool.created == 2
+
+
+def test_counters_are_exact_under_concurrent_checkouts():
+    pool = ConnectionPool(lambda: sqlite3.connect(':memory:', check_same_thread=False), maxsize=16)
+    start = threading.Barrier(16)
+    connections = []
+
+    def take():
+        start.wait()
+        connections.append(pool.acquire())
+
+    workers = [threading.Thread(target=take) for _ in range(16)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert pool.created == len(connections) == 16
+
+
+def test_acquire_times_out_when_pool_is_exhausted():
+    pool = sqlite_pool(maxsize=2, timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+
+    pool.release(first)
+    assert pool.acquire() is first
+    pool.release(second)
+
+
+def test_failed_health_check_reconnects():
+    pool = sqlite_pool(maxsize=1, check_after=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    # Conexión caída mientras estaba ociosa: el SELECT 1 del chequeo falla
+    conn.close()
+
+    fresh = pool.acquire()
+    assert fresh is not conn
+    assert fresh.execute('SELECT 1').fetchone() == (1,)
+    assert pool.reconnects == 1
+    assert pool.created == 2
+
+
+def test_recently_used_connection_skips_health_check():
+    checks = []
+    pool = sqlite_pool(maxsize=1, check_after=60, health_check=checks.append)
+    pool.release(pool.acquire())
+    pool.acquire()
+
+    assert checks == []
+
+
+@pytest.fixture
+def clean_pools(monkeypatch):
+    monkeypatch.setattr(db, '_pools', {})
+
+
+def test_get_pool_honours_maxsize(clean_pools, monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '5')
+
+    default = get_pool()
+    larger = get_pool(maxsize=10)
+
+    assert default.maxsize == 5
+    assert larger.maxsize == 10
+    assert get_pool(maxsize=5) is default
+    assert get_pool(maxsize=10) is larger
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from etl_state import KnownHashes, add_row_hash, compute_row_hash
+
+
+def sales(source_rows, qty):
+    return pd.DataFrame({'source_row': source_rows, 'sku': ['SKU0'] * len(source_rows), 'qty': qty})
+
+
+def test_row_hash_ignores_inferred_dtype():
+    as_int = sales([0, 1], [5, 7])
+    as_float = as_int.astype({'qty': 'float64'})
+    as_nullable = as_int.astype({'qty': 'Int64', 'source_row': 'int32'})
+
+    expected = compute_row_hash(as_int)
+    assert (compute_row_hash(as_float) == expected).all()
+    assert (compute_row_hash(as_nullable) == expected).all()
+    assert compute_row_hash(as_int).dtype == np.uint64
+
+
+def test_identical_rows_at_other_csv_positions_hash_differently():
+    hashes = compute_row_hash(sales([0, 1], [5, 5]))
+    assert hashes[0] != hashes[1]
+
+
+def test_filter_new_skips_loaded_and_already_emitted_rows():
+    loaded = add_row_hash(sales([0, 1], [5, 7]))
+    known = KnownHashes(np.unique(loaded['row_hash'].to_numpy()))
+
+    first_chunk = add_row_hash(sales([0, 1, 2], [5, 8, 9]))
+    new_rows = known.filter_new(first_chunk)
+    # Fila 0 sin cambios; fila 1 modificada y fila 2 nueva
+    assert new_rows['source_row'].tolist() == [1, 2]
+
+    # Un chunk posterior con las mismas filas no vuelve a emitirlas
+    assert known.filter_new(first_chunk).empty
+    assert known.filter_new(add_row_hash(sales([3], [1])))['source_row'].tolist() == [3]
@@ -0,0 +1,25 @@
+import staging
+from etl_transform import split_tables
+from ingest import read_raw
+from staging import read_staged, stage_raw
+
+
+def test_dimension_keeps_last_csv_row_across_partitions(tmp_path, sample_csv, monkeypatch):
+    # El mismo SKU en dos particiones: la fila posterior del CSV (Air) se lee primero
+    rows = read_raw(sample_csv).head(3).assign(
+        product_type='haircare', sku=['SKU0', 'SKU1', 'SKU0'], price=[10.5, 20.5, 30.5],
+        supplier_name=['Supplier 1', 'Supplier 1', 'Supplier 2'],
+        location=['Mumbai', 'Delhi', 'Kolkata'], transportation_mode=['Road', 'Road', 'Air'])
+    monkeypatch.setattr(staging, 'read_raw', lambda path, chunk_size: iter([rows[:2], rows[2:]]))
+    staging_dir = str(tmp_path / 'supply_chain')
+    stage_raw(sample_csv, staging_dir=staging_dir, chunk_size=2)
+
+    staged = read_staged(staging_dir=staging_dir)
+    assert staged['source_row'].tolist() == [2, 0, 1]
+    tables = split_tables(staged)
+
+    products = tables['products'].set_index('sku')
+    suppliers = tables['suppliers'].set_index('supplier_name')
+    assert products.loc['SKU0', 'price'] == 30.5
+    assert suppliers.loc['Supplier 1', 'location'] == 'Delhi'
+    assert len(tables['sales']) == 3
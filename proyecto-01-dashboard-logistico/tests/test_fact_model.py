@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+from fact_model import build_fact_table, check_join_cardinality
+
+
+def test_check_join_cardinality_rejects_multiplied_rows():
+    sales = pd.DataFrame({'sku': ['SKU0', 'SKU0', 'SKU1']})
+    products = pd.DataFrame({'sku': ['SKU0', 'SKU0', 'SKU1'], 'price': [1.0, 2.0, 3.0]})
+    joined = sales.merge(products, on='sku')
+
+    check_join_cardinality(len(sales), sales, 'sin join')
+    with pytest.raises(ValueError, match="Join 'products' cambió la cantidad de filas: 3 -> 5"):
+        check_join_cardinality(len(sales), joined, 'products')
+
+
+def test_fact_table_keeps_one_row_per_sale_with_latest_dimensions():
+    sales = pd.DataFrame({'id': [1, 2, 3], 'source_row': [0, 1, 2], 'sku': ['SKU0', 'SKU0', 'SKU1'],
+                          'revenue_generated': [10.0, 10.0, 5.0]})
+    # SKU0 recargado: dos versiones en products y logistics, gana la de mayor id
+    products = pd.DataFrame({'id': [2, 1, 3], 'sku': ['SKU0', 'SKU0', 'SKU1'], 'price': [2.0, 1.0, 3.0]})
+    logistics = pd.DataFrame({'id': [1, 2, 3], 'sku': ['SKU0', 'SKU0', 'SKU1'], 'shipping_times': [4, 6, 8]})
+    production = pd.DataFrame({'id': [1], 'sku': ['SKU1'], 'defect_rates': [0.5]})
+
+    fact = build_fact_table(sales, products, logistics, production)
+
+    assert len(fact) == 3
+    assert fact['revenue_generated'].sum() == 25.0
+    assert fact['price'].tolist() == [2.0, 2.0, 3.0]
+    assert fact['shipping_times'].tolist() == [6, 6, 8]
+    assert fact['defect_rates'].isna().tolist() == [True, True, False]
+    assert 'source_row' not in fact.columns
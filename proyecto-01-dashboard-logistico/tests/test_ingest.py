@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import detect_number_format, parse_chunk, parse_decimal, parse_integer, read_raw
+
+
+def parsed(values, **kwargs):
+    return parse_decimal(pd.Series(values, dtype=object), **kwargs).tolist()
+
+
+def test_parse_decimal_english_locale():
+    values = ['0.2264', '1,234.56', '1,234,567', '12', '1.699']
+    assert detect_number_format(pd.Series(values)) == 'decimal_point'
+    assert parsed(values) == [0.2264, 1234.56, 1234567.0, 12.0, 1.699]
+
+
+def test_parse_decimal_spanish_locale():
+    values = ['0,2264', '1.234,56', '1.234.567,5', '12', '1.699']
+    assert detect_number_format(pd.Series(values)) == 'decimal_comma'
+    assert parsed(values) == [0.2264, 1234.56, 1234567.5, 12.0, 1699.0]
+
+
+@pytest.mark.parametrize('number_format, expected', [
+    ('decimal_point', 1.234),
+    ('decimal_comma', 1234.0),
+    ('grouped', 12.34),
+])
+def test_ambiguous_cell_follows_column_format(number_format, expected):
+    assert parsed(['1.234'], limit=100, number_format=number_format) == [expected]
+
+
+def test_damaged_export_is_rescaled_below_limit():
+    values = ['6.980.800.554.211.570', '1.699', None]
+    assert detect_number_format(pd.Series(values)) == 'grouped'
+    result = parsed(values, limit=100)
+    assert result[:2] == pytest.approx([69.8080055421157, 16.99])
+    assert np.isnan(result[2])
+
+
+def test_mixed_column_keeps_native_cells():
+    # Como defect_rates en el CSV de ejemplo: celdas dañadas junto a otras nativas
+    assert parsed(['0.22641036084992516', '4.854.068.026.423.720'], limit=5) == \
+        pytest.approx([0.22641036084992516, 4.85406802642372])
+
+
+def test_parse_integer_strips_thousands_separators():
+    result = parse_integer(pd.Series(['1.234', '1,234', '12', None], dtype=object))
+    assert result.tolist() == [1234, 1234, 12, pd.NA]
+    assert str(result.dtype) == 'Int64'
+
+
+def test_format_is_fixed_by_first_chunk_that_shows_it():
+    formats = {}
+    parse_chunk(pd.DataFrame({'Price': ['1.699']}), formats)
+    assert formats['price'] is None
+    parse_chunk(pd.DataFrame({'Price': ['2,5']}), formats)
+    later = parse_chunk(pd.DataFrame({'Price': ['1.699']}), formats)
+    assert formats['price'] == 'decimal_comma'
+    assert later['price'].tolist() == [1699.0]
+
+
+def test_chunked_read_matches_full_read(sample_csv):
+    full = read_raw(sample_csv)
+    chunked = pd.concat(read_raw(sample_csv, chunk_size=7), ignore_index=True)
+    pd.testing.assert_frame_equal(chunked, full)
+    assert full['price'].between(0, 100).all()
+    assert full['defect_rates'].between(0, 5).all()
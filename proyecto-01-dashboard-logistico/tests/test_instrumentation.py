@@ -0,0 +1,55 @@
+import json
+import threading
+
+from instrumentation import METRICS, MetricsRegistry, track_run, track_stage
+
+
+def test_counters_are_exported_with_total_suffix():
+    registry = MetricsRegistry()
+    registry.inc('stage_rows', 5, stage='extract')
+    registry.set('dashboard_frame_bytes', 10)
+
+    lines = registry.render().splitlines()
+    assert '# TYPE supply_chain_stage_rows_total counter' in lines
+    assert 'supply_chain_stage_rows_total{stage="extract"} 5' in lines
+    assert 'supply_chain_dashboard_frame_bytes 10' in lines
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.set('gauge', 1, table='a"b\\c\nd')
+
+    assert 'supply_chain_gauge{table="a\\"b\\\\c\\nd"} 1' in registry.render().splitlines()
+
+
+def test_only_the_run_samples_memory_by_default():
+    before = threading.active_count()
+    with track_run('test_run'):
+        during = threading.active_count()
+        with track_stage('test_stage') as info:
+            assert threading.active_count() == during
+            info['rows'] = 3
+
+    assert during == before + 1
+    assert threading.active_count() == before
+    assert info['peak_memory'] is None
+    text = METRICS.render()
+    assert 'supply_chain_run_peak_memory_bytes{run="test_run"}' in text
+    assert 'supply_chain_stage_rows_total{stage="test_stage"} 3' in text
+    assert 'supply_chain_stage_peak_memory_bytes{stage="test_stage"}' not in text
+
+
+def test_serial_stage_records_its_memory_peak(tmp_path, monkeypatch):
+    log_path = tmp_path / 'metrics.jsonl'
+    monkeypatch.setenv('METRICS_LOG', str(log_path))
+    before = threading.active_count()
+    with track_stage('serial_stage', sample_memory=True, table='sales') as info:
+        assert threading.active_count() == before + 1
+
+    assert threading.active_count() == before
+    assert info['peak_memory'] > 0
+    assert (f'supply_chain_stage_peak_memory_bytes{{stage="serial_stage",table="sales"}} '
+            f'{info["peak_memory"]}') in METRICS.render().splitlines()
+    event = json.loads(log_path.read_text().splitlines()[-1])
+    assert event['event'] == 'stage'
+    assert event['peak_memory_mb'] == info['peak_memory'] / 2**20
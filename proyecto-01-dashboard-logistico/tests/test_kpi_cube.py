@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from dashboard_data import prepare_frame
+from ingest import read_raw
+from kpi_cube import CUBE_KEYS, build_cube, merge_cube, rollup, update_cube
+
+
+@pytest.fixture(scope='module')
+def frame(sample_csv):
+    return prepare_frame(read_raw(sample_csv))
+
+
+def sorted_cube(cube):
+    return cube.astype({key: str for key in CUBE_KEYS}).sort_values(CUBE_KEYS).reset_index(drop=True)
+
+
+def direct_kpis(df):
+    """Los KPIs recorriendo las filas, como los calculaba el dashboard antes del cubo."""
+    return {
+        'total_revenue': df['revenue_generated'].sum(),
+        'total_products': int(df['products_sold'].sum()),
+        'otif_pct': df['otif'].mean() * 100 if len(df) else 0,
+        'avg_defects': df['defect_rates'].mean(),
+        'revenue_by_cat': df.groupby('product_type', observed=True)['revenue_generated'].sum(),
+        'otif_by_cat': df.groupby('product_type', observed=True)['otif'].mean() * 100,
+        'carrier_eff': df.groupby('shipping_carrier', observed=True)['shipping_costs'].mean(),
+        'defects_by_cat': df.groupby('product_type', observed=True)['defect_rates'].mean(),
+    }
+
+
+@pytest.mark.parametrize('category, carrier, transport', [
+    ('ALL', 'ALL', 'ALL'),
+    ('haircare', 'ALL', 'ALL'),
+    ('ALL', 'Carrier B', 'Road'),
+    ('skincare', 'Carrier A', 'Air'),
+])
+def test_rollup_matches_groupby_over_rows(frame, category, carrier, transport):
+    mask = pd.Series(True, index=frame.index)
+    for key, value in zip(CUBE_KEYS, (category, carrier, transport)):
+        if value != 'ALL':
+            mask &= frame[key] == value
+    expected = direct_kpis(frame[mask])
+
+    kpis = rollup(build_cube(frame), category, carrier, transport)
+
+    for name in ('total_revenue', 'total_products', 'otif_pct', 'avg_defects'):
+        assert kpis[name] == pytest.approx(expected[name]), name
+    for name in ('revenue_by_cat', 'otif_by_cat', 'carrier_eff', 'defects_by_cat'):
+        series = kpis[name].set_index(kpis[name].columns[0]).iloc[:, 0]
+        pd.testing.assert_series_equal(series.sort_index(), expected[name].sort_index(),
+                                       check_names=False, check_index_type=False)
+
+
+def test_merged_partial_cubes_equal_cube_of_all_rows(frame):
+    half = len(frame) // 2
+    merged = merge_cube(build_cube(frame.iloc[:half]), build_cube(frame.iloc[half:]))
+
+    pd.testing.assert_frame_equal(sorted_cube(merged), sorted_cube(build_cube(frame)), check_dtype=False)
+
+
+def test_update_cube_removes_rows_and_empty_cells(frame):
+    removed = frame[frame['product_type'] == 'haircare']
+    updated = update_cube(build_cube(frame), frame.iloc[:0], removed)
+
+    assert 'haircare' not in set(updated['product_type'].astype(str))
+    pd.testing.assert_frame_equal(sorted_cube(updated), sorted_cube(build_cube(frame.drop(removed.index))),
+                                  check_dtype=False)
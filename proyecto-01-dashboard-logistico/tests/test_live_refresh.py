@@ -0,0 +1,133 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from dashboard_data import FACT_TABLES, prepare_frame
+from etl_transform import SOURCE_ROW, split_tables
+from ingest import read_raw
+from kpi_cube import CUBE_KEYS
+import live_refresh
+from live_refresh import LiveDataset, LiveRefresher, read_fact
+
+# pd.read_sql avisa que solo soporta SQLAlchemy o sqlite3 (acá es un envoltorio de sqlite3)
+pytestmark = pytest.mark.filterwarnings('ignore:pandas only supports SQLAlchemy')
+
+FIRST_LOAD = datetime(2024, 1, 1, 8, 0, 0)
+
+
+class OneConnectionPool:
+    def __init__(self, connection):
+        self._connection = connection
+
+    @contextmanager
+    def connection(self):
+        yield self._connection
+
+
+@pytest.fixture
+def loaded_db(mysql_connection, sample_csv):
+    """Las tablas de hechos del CSV de ejemplo tal como las deja la primera corrida del ETL."""
+    df = read_raw(sample_csv)
+    df.insert(0, SOURCE_ROW, range(len(df)))
+    tables = split_tables(df)
+    for table in FACT_TABLES:
+        rows = tables[table].copy()
+        rows.insert(0, 'id', range(1, len(rows) + 1))
+        rows['created_at'] = rows['updated_at'] = FIRST_LOAD
+        rows.to_sql(table, mysql_connection._connection, index=False)
+    with mysql_connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE TABLE etl_runs (id INTEGER PRIMARY KEY, mode TEXT, status TEXT,
+                                   started_at TIMESTAMP, finished_at TIMESTAMP)
+        """)
+        cursor.execute("INSERT INTO etl_runs VALUES (1, 'full', 'success', %s, %s)",
+                       (FIRST_LOAD, FIRST_LOAD + timedelta(minutes=1)))
+    return mysql_connection
+
+
+def finish_run(connection, run_id, mode, started_at):
+    with connection.cursor() as cursor:
+        cursor.execute("INSERT INTO etl_runs VALUES (%s, %s, 'success', %s, %s)",
+                       (run_id, mode, started_at, started_at + timedelta(minutes=1)))
+
+
+def sorted_cube(cube):
+    cube = cube.astype({key: str for key in CUBE_KEYS})
+    return cube.sort_values(CUBE_KEYS).reset_index(drop=True)
+
+
+def assert_matches_full_read(live, connection):
+    fresh = LiveDataset(prepare_frame(read_fact(connection)), live.data_version, live.run_id)
+    assert len(live.df) == len(fresh.df)
+    assert live.df['sku'].astype(str).value_counts().sort_index().equals(
+        fresh.df['sku'].astype(str).value_counts().sort_index())
+    pd.testing.assert_frame_equal(sorted_cube(live.cube), sorted_cube(fresh.cube), check_dtype=False)
+
+
+def test_apply_replaces_sku_rows_and_reflags_shifted_median(loaded_db):
+    live = LiveDataset(prepare_frame(read_fact(loaded_db)), 'run-1', 1)
+    sku = live.df['sku'].iloc[0]
+    with loaded_db.cursor() as cursor:
+        # Envíos muy lentos en un SKU: la mediana de su modo sube
+        cursor.execute("UPDATE logistics SET shipping_times = 100 WHERE sku = %s", (sku,))
+
+    assert live.apply(read_fact(loaded_db, [sku]), [sku], 'run-2', 2) == 1
+    assert live.data_version == 'run-2'
+    assert_matches_full_read(live, loaded_db)
+
+
+def test_apply_without_skus_only_moves_the_version(loaded_db):
+    live = LiveDataset(prepare_frame(read_fact(loaded_db)), 'run-1', 1)
+    rows = len(live.df)
+
+    assert live.apply(None, [], 'run-2', 2) == 0
+    assert (live.data_version, live.run_id, len(live.df)) == ('run-2', 2, rows)
+
+
+def test_poll_without_new_runs_changes_nothing(loaded_db):
+    live = LiveDataset(prepare_frame(read_fact(loaded_db)), 'run-1', 1)
+
+    assert not LiveRefresher(live, OneConnectionPool(loaded_db)).poll()
+    assert live.run_id == 1
+
+
+def test_full_run_is_applied_as_a_delta(loaded_db, monkeypatch):
+    live = LiveDataset(prepare_frame(read_fact(loaded_db)), 'run-1', 1)
+    reloads = []
+    monkeypatch.setattr(live, 'reload', lambda *args: reloads.append(args))
+    read_skus = []
+    monkeypatch.setattr(live_refresh, 'read_fact',
+                        lambda connection, skus=None: read_skus.append(skus) or read_fact(connection, skus))
+
+    second_load = FIRST_LOAD + timedelta(days=1)
+    with loaded_db.cursor() as cursor:
+        cursor.execute("SELECT sku FROM sales WHERE source_row = 0")
+        old_sku = cursor.fetchone()[0]
+        cursor.execute("SELECT sku FROM sales WHERE sku <> %s LIMIT 1", (old_sku,))
+        new_sku = cursor.fetchone()[0]
+        # La fila 0 del CSV pasó a otro SKU: delete_replaced borró la vieja y se insertó la nueva
+        for table in ('sales', 'logistics', 'production'):
+            cursor.execute(f"UPDATE {table} SET sku = %s, updated_at = %s WHERE source_row = 0",
+                           (new_sku, second_load))
+    finish_run(loaded_db, 2, 'full', second_load)
+
+    assert LiveRefresher(live, OneConnectionPool(loaded_db)).poll()
+    assert reloads == []
+    assert sorted(read_skus[0]) == sorted([new_sku, old_sku])
+    assert live.run_id == 2
+    assert_matches_full_read(live, loaded_db)
+
+
+def test_sku_that_lost_all_its_sales_leaves_the_dataset(loaded_db):
+    live = LiveDataset(prepare_frame(read_fact(loaded_db)), 'run-1', 1)
+    sku = live.df['sku'].iloc[0]
+    with loaded_db.cursor() as cursor:
+        for table in ('sales', 'logistics', 'production'):
+            cursor.execute(f"DELETE FROM {table} WHERE sku = %s", (sku,))
+    finish_run(loaded_db, 2, 'incremental', FIRST_LOAD + timedelta(days=1))
+
+    assert LiveRefresher(live, OneConnectionPool(loaded_db)).poll()
+    assert sku not in set(live.df['sku'].astype(str))
+    assert_matches_full_read(live, loaded_db)
@@ -0,0 +1,60 @@
+from datetime import date
+
+from migrations import add_month_partitions, month_partitions
+
+
+class FakeCursor:
+    """Cursor que devuelve las particiones indicadas y guarda las sentencias ejecutadas."""
+
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(' '.join(sql.split()))
+
+    def fetchall(self):
+        return [(name,) for name in self.partitions]
+
+
+def created_partitions(start, months):
+    return ['p_hist'] + [name for name, _ in month_partitions(months, start=start)] + ['p_max']
+
+
+def test_month_partitions_cross_year():
+    assert month_partitions(3, start=date(2026, 11, 1)) == [
+        ('p202611', '2026-12-01'), ('p202612', '2027-01-01'), ('p202701', '2027-02-01')]
+
+
+def test_reorganizes_p_max_to_keep_months_ahead():
+    cursor = FakeCursor(created_partitions(date(2026, 1, 1), 12))
+
+    added = add_month_partitions(cursor, 'sales', months_ahead=12, today=date(2026, 3, 15))
+
+    assert added == ['p202701', 'p202702']
+    statement = cursor.statements[-1]
+    assert statement.startswith('ALTER TABLE sales REORGANIZE PARTITION p_max INTO (')
+    assert "PARTITION p202702 VALUES LESS THAN (UNIX_TIMESTAMP('2027-03-01'))" in statement
+    assert statement.endswith('PARTITION p_max VALUES LESS THAN MAXVALUE )')
+
+
+def test_nothing_to_add_when_months_are_covered():
+    cursor = FakeCursor(created_partitions(date(2026, 3, 1), 12))
+
+    assert add_month_partitions(cursor, 'sales', months_ahead=12, today=date(2026, 3, 31)) == []
+    assert len(cursor.statements) == 1
+
+
+def test_catches_up_after_months_without_runs():
+    cursor = FakeCursor(created_partitions(date(2025, 1, 1), 12))
+
+    added = add_month_partitions(cursor, 'logistics', months_ahead=2, today=date(2026, 2, 1))
+
+    assert added == ['p202601', 'p202602', 'p202603']
+
+
+def test_table_without_partitions_is_left_alone():
+    cursor = FakeCursor([])
+
+    assert add_month_partitions(cursor, 'sales') == []
+    assert len(cursor.statements) == 1
@@ -0,0 +1,194 @@
+import random
+import statistics
+
+import pandas as pd
+import pytest
+
+from dashboard_data import add_otif_flags
+from fact_model import LOADED_AT, build_fact_table
+from otif_engine import HistogramMedian, OTIFEngine, RunningMedian, WindowedOTIF
+
+
+def random_operations(rng, steps, values):
+    """Secuencia de altas y bajas: devuelve [(op, valor, valores vigentes)]."""
+    current, operations = [], []
+    for _ in range(steps):
+        if current and rng.random() < 0.4:
+            value = current.pop(rng.randrange(len(current)))
+            operations.append(('remove', value, list(current)))
+        else:
+            value = values(rng)
+            current.append(value)
+            operations.append(('add', value, list(current)))
+    return operations
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_running_median_matches_statistics_median(seed):
+    rng = random.Random(seed)
+    tracker = RunningMedian()
+    # Pocos valores distintos: muchos empates y borrados diferidos del mismo valor
+    for op, value, current in random_operations(rng, 300, lambda r: r.randint(1, 10)):
+        getattr(tracker, op)(value)
+        assert len(tracker) == len(current)
+        if current:
+            assert tracker.median() == statistics.median(current)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_running_median_from_initial_values(seed):
+    rng = random.Random(seed)
+    values = [rng.randint(1, 10) for _ in range(rng.randint(1, 50))]
+    assert RunningMedian(values).median() == statistics.median(values)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_running_median_with_floats(seed):
+    rng = random.Random(seed)
+    tracker = RunningMedian()
+    for op, value, current in random_operations(rng, 300, lambda r: r.uniform(-50, 50)):
+        getattr(tracker, op)(value)
+        if current:
+            assert tracker.median() == pytest.approx(statistics.median(current))
+
+
+@pytest.mark.parametrize('error', [0.25, 0.5, 2.0])
+@pytest.mark.parametrize('seed', range(10))
+def test_histogram_median_within_error(seed, error):
+    rng = random.Random(seed)
+    tracker = HistogramMedian(error)
+    for op, value, current in random_operations(rng, 300, lambda r: r.uniform(0, 30)):
+        getattr(tracker, op)(value)
+        if current:
+            assert abs(tracker.median() - statistics.median(current)) <= error + 1e-9
+
+
+def test_empty_trackers_return_nan():
+    assert pd.isna(RunningMedian().median())
+    assert pd.isna(HistogramMedian(0.5).median())
+
+
+def random_shipments(rng, count, first_sku=0):
+    return pd.DataFrame({
+        'sku': [f"SKU{first_sku + i}" for i in range(count)],
+        'transportation_mode': [rng.choice(['Air', 'Road', 'Rail', None]) for _ in range(count)],
+        'shipping_times': [rng.choice([rng.randint(1, 10), None]) if rng.random() < 0.1
+                           else rng.randint(1, 10) for _ in range(count)],
+        'stock_levels': [rng.randint(0, 100) for _ in range(count)],
+        'products_sold': [rng.randint(0, 100) for _ in range(count)],
+    }).astype({'shipping_times': 'Float64'})
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_engine_updates_match_full_recompute(seed):
+    rng = random.Random(seed)
+    df = random_shipments(rng, 200)
+    engine = OTIFEngine(df)
+    df = engine.flag(df.copy())
+
+    for step in range(5):
+        removed = df.sample(20, random_state=seed * 10 + step)
+        added = random_shipments(rng, 20, first_sku=1000 * (step + 1))
+        kept = df.drop(removed.index)
+
+        changes = engine.update(added, removed)
+        flipped = engine.affected_rows(kept, changes)
+        kept = pd.concat([kept[~flipped], engine.flag(kept[flipped].copy())]).sort_index()
+        df = pd.concat([kept, engine.flag(added.copy())], ignore_index=True)
+
+        expected = add_otif_flags(df.drop(columns=['expected_shipping_time', 'on_time', 'in_full', 'otif']))
+        pd.testing.assert_series_equal(engine.medians().sort_index(),
+                                       expected.groupby('transportation_mode')['shipping_times']
+                                       .median().astype('float64').sort_index(),
+                                       check_names=False)
+        pd.testing.assert_series_equal(df['otif'], expected['otif'])
+
+
+def random_arrivals(rng, count):
+    """Envíos con hora de llegada creciente (a veces varios en el mismo instante)."""
+    start = pd.Timestamp('2026-01-01')
+    offsets = pd.Series([rng.choice([0, 0, 1, 3, 7]) for _ in range(count)]).cumsum()
+    rows = random_shipments(rng, count)
+    rows[LOADED_AT] = start + pd.to_timedelta(offsets, unit='h')
+    return rows
+
+
+def window_expected(rows, now, span):
+    window = rows[rows[LOADED_AT] > now - pd.Timedelta(span)]
+    return window, add_otif_flags(window.copy())
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_windowed_medians_match_recompute_over_window(seed):
+    rng = random.Random(seed)
+    rows = random_arrivals(rng, 300)
+    windowed = OTIFEngine(error=0).windowed(span='12h')
+    records = list(zip(rows[LOADED_AT], rows['transportation_mode'], rows['shipping_times'],
+                       rows['stock_levels'] >= rows['products_sold']))
+
+    for end, (now, mode, shipping_time, in_full) in enumerate(records, start=1):
+        windowed.add(now, mode, shipping_time, in_full)
+        window = [r for r in records[:end] if r[0] > now - pd.Timedelta('12h')]
+        assert len(windowed) == len(window)
+        for current in {r[1] for r in window if not pd.isna(r[1])}:
+            times = [float(r[2]) for r in window if r[1] == current and not pd.isna(r[2])]
+            if times:
+                assert windowed.trackers[current].median() == statistics.median(times)
+
+        if end % 25 == 0:
+            _, expected = window_expected(rows.iloc[:end], now, '12h')
+            kpis = windowed.kpis()
+            assert kpis['otif_pct'] == pytest.approx(expected['otif'].mean() * 100)
+            assert kpis['in_full_pct'] == pytest.approx(expected['in_full'].mean() * 100)
+
+
+def test_windowed_expire_without_new_rows():
+    rng = random.Random(3)
+    rows = random_arrivals(rng, 100)
+    windowed = WindowedOTIF(span='2D')
+    windowed.add_rows(rows)
+
+    later = rows[LOADED_AT].max() + pd.Timedelta('1D')
+    windowed.expire(later)
+    window, expected = window_expected(rows, later, '2D')
+    assert len(windowed) == len(window)
+    pd.testing.assert_series_equal(windowed.medians().sort_index(),
+                                   expected.groupby('transportation_mode')['shipping_times']
+                                   .median().astype('float64').sort_index(), check_names=False)
+
+    windowed.expire(later + pd.Timedelta('30D'))
+    assert len(windowed) == 0 and windowed.medians().empty
+    assert windowed.kpis()['otif_pct'] == 0.0
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_windowed_histogram_median_within_error(seed):
+    rng = random.Random(seed)
+    rows = random_arrivals(rng, 200)
+    windowed = OTIFEngine(error=0.5).windowed(size=50)
+    records = list(zip(rows[LOADED_AT], rows['transportation_mode'], rows['shipping_times'],
+                       rows['stock_levels'] >= rows['products_sold']))
+    for end, record in enumerate(records, start=1):
+        windowed.add(*record)
+        window = [r for r in records[max(0, end - 50):end] if not pd.isna(r[1]) and not pd.isna(r[2])]
+        for mode in {r[1] for r in window}:
+            times = [float(r[2]) for r in window if r[1] == mode]
+            assert abs(windowed.trackers[mode].median() - statistics.median(times)) <= 0.5 + 1e-9
+
+
+def test_windowed_rejects_out_of_order_arrivals():
+    windowed = WindowedOTIF(span='1D')
+    windowed.add('2026-01-02', 'Air', 3, True)
+    with pytest.raises(ValueError):
+        windowed.add('2026-01-01', 'Air', 3, True)
+
+
+def test_fact_table_keeps_sales_load_time():
+    sales = pd.DataFrame({'id': [1, 2], 'sku': ['SKU1', 'SKU1'], 'products_sold': [3, 4],
+                          'created_at': pd.to_datetime(['2026-01-01', '2026-01-02'])})
+    products = pd.DataFrame({'id': [1], 'sku': ['SKU1'], 'stock_levels': [5],
+                             'created_at': pd.to_datetime(['2025-12-01'])})
+    empty = pd.DataFrame({'sku': pd.Series([], dtype=object)})
+    fact = build_fact_table(sales, products, empty, empty)
+    assert fact[LOADED_AT].tolist() == sales['created_at'].tolist()
+    assert 'created_at' not in fact.columns
@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+
+from bulk_loader import LOAD_STEPS
+from db import ConnectionPool
+from etl_transform import SOURCE_ROW, TABLE_COLUMNS, split_tables
+from ingest import read_raw
+from parallel_load import ParallelLoader
+
+UNIQUE_KEYS = {'products': 'sku', 'suppliers': 'supplier_name'}
+
+
+@pytest.fixture(scope='module')
+def chunks(sample_csv):
+    df = read_raw(sample_csv)
+    df.insert(0, SOURCE_ROW, range(len(df)))
+    return [split_tables(df.iloc[start:start + 40]) for start in range(0, len(df), 40)]
+
+
+@pytest.fixture
+def events():
+    return []
+
+
+@pytest.fixture
+def connect(mysql_connect, events):
+    """Conexiones con el esquema de carga que anotan sus commit/rollback en `events`."""
+    def open_connection(name='worker'):
+        connection = mysql_connect()
+        with connection.cursor() as cursor:
+            for table, columns in TABLE_COLUMNS.items():
+                unique = f", UNIQUE ({UNIQUE_KEYS[table]})" if table in UNIQUE_KEYS else ''
+                cursor.execute(f"CREATE TABLE {table} ({', '.join(columns)}, row_hash{unique})")
+        connection.commit()
+        for action in ('commit', 'rollback'):
+            def record(action=action, method=getattr(connection, action)):
+                events.append((name, action))
+                method()
+            setattr(connection, action, record)
+        return connection
+    return open_connection
+
+
+def committed(events):
+    return [name for name, action in events if action == 'commit']
+
+
+def count_rows(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+
+
+def test_finish_commits_parent_before_dependent_tables(connect, chunks, events):
+    parent = connect('products')
+    pool = ConnectionPool(connect, maxsize=len(LOAD_STEPS))
+    loader = ParallelLoader(parent, pool, LOAD_STEPS, chunk_size=100, queue_size=1)
+    for tables in chunks:
+        loader.submit(tables)
+    events.clear()
+
+    stats = loader.finish()
+
+    assert committed(events) == ['products'] + ['worker'] * (len(LOAD_STEPS) - 1)
+    assert {table: total['rows'] for table, total in stats.items()} == {
+        table: sum(len(tables[table]) for tables in chunks) for _, table, _ in LOAD_STEPS
+    }
+    assert count_rows(parent, 'products') == len(pd.concat([t['products'] for t in chunks])['sku'].unique())
+
+
+def test_failed_table_rolls_back_every_connection(connect, chunks, events):
+    parent = connect('products')
+    pool = ConnectionPool(connect, maxsize=len(LOAD_STEPS))
+    loader = ParallelLoader(parent, pool, LOAD_STEPS, chunk_size=100)
+    broken = dict(chunks[0], production=chunks[0]['production'].assign(unknown_column=1))
+    loader.submit(broken)
+
+    with pytest.raises(RuntimeError, match="Falló la carga de 'production'"):
+        loader.finish()
+
+    assert committed(events) == []
+    assert ('products', 'rollback') in events
+    assert count_rows(parent, 'products') == 0
+
+
+def test_abort_rolls_back_without_raising(connect, chunks, events):
+    parent = connect('products')
+    pool = ConnectionPool(connect, maxsize=len(LOAD_STEPS))
+    loader = ParallelLoader(parent, pool, LOAD_STEPS, chunk_size=100)
+    loader.submit(chunks[0])
+
+    loader.abort()
+
+    assert committed(events) == []
+    assert count_rows(parent, 'products') == 0
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import dashboard_data
+from snapshot import SnapshotReader, publish_snapshot, read_pointer
+
+
+@pytest.fixture
+def slow_dataset(monkeypatch):
+    """load_dataset lento que cuenta las lecturas (cada una sería un SELECT * completo)."""
+    calls = []
+
+    def load_dataset(pool=None):
+        calls.append(pool)
+        time.sleep(0.1)
+        return pd.DataFrame({'sku': ['SKU1', 'SKU2'], 'price': [1.0, 2.0]}), f"run-{len(calls)}"
+
+    monkeypatch.setattr(dashboard_data, 'load_dataset', load_dataset)
+    monkeypatch.setattr(dashboard_data, 'prepare_frame', lambda df, compact=True: df)
+    return calls
+
+
+def test_workers_starting_together_publish_once(tmp_path, slow_dataset):
+    snapshot_dir = str(tmp_path)
+    pointers = []
+
+    def start_worker():
+        pointers.append(publish_snapshot(snapshot_dir=snapshot_dir, if_missing=True))
+
+    workers = [threading.Thread(target=start_worker) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len(slow_dataset) == 1
+    assert [pointer['version'] for pointer in pointers] == ['run-1'] * 4
+
+    reader = SnapshotReader(snapshot_dir)
+    assert reader.refresh()
+    assert reader.table.num_rows == 2
+
+
+def test_explicit_publish_replaces_existing_snapshot(tmp_path, slow_dataset):
+    snapshot_dir = str(tmp_path)
+    publish_snapshot(snapshot_dir=snapshot_dir)
+    publish_snapshot(snapshot_dir=snapshot_dir)
+
+    assert len(slow_dataset) == 2
+    assert read_pointer(snapshot_dir)['version'] == 'run-2'
@@ -0,0 +1,97 @@
+import os
+
+import pandas as pd
+import pytest
+
+import staging
+from staging import BACKUP_SUFFIX, read_manifest, read_staged, stage_chunks, stage_raw, swap_dirs
+
+
+def write_file(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_swap_dirs_replaces_target_and_drops_backup(tmp_path):
+    target, new = str(tmp_path / 'staging'), str(tmp_path / 'staging.tmp')
+    write_file(os.path.join(target, 'old.txt'), 'viejo')
+    write_file(os.path.join(new, 'new.txt'), 'nuevo')
+
+    swap_dirs(new, target)
+
+    assert os.listdir(target) == ['new.txt']
+    assert not os.path.exists(new)
+    assert not os.path.exists(target + BACKUP_SUFFIX)
+
+
+def test_swap_dirs_restores_backup_when_replace_fails(tmp_path):
+    target = str(tmp_path / 'staging')
+    write_file(os.path.join(target, 'old.txt'), 'viejo')
+
+    with pytest.raises(OSError):
+        swap_dirs(str(tmp_path / 'no_existe'), target)
+
+    assert os.listdir(target) == ['old.txt']
+
+
+def test_stage_raw_recovers_interrupted_swap(tmp_path, sample_csv):
+    staging_dir = str(tmp_path / 'supply_chain')
+    manifest = stage_raw(sample_csv, staging_dir=staging_dir, chunk_size=40)
+    # Corte entre los dos renombres: solo queda el respaldo
+    os.replace(staging_dir, staging_dir + BACKUP_SUFFIX)
+
+    assert stage_raw(sample_csv, staging_dir=staging_dir) == manifest
+    assert read_manifest(staging_dir) == manifest
+    assert len(read_staged(staging_dir=staging_dir)) == manifest['rows']
+
+
+def test_stage_raw_rejects_csv_without_rows(tmp_path):
+    raw_path = str(tmp_path / 'vacio.csv')
+    write_file(raw_path, 'SKU;Price\n')
+
+    with pytest.raises(ValueError, match='no tiene filas'):
+        stage_raw(raw_path, staging_dir=str(tmp_path / 'supply_chain'), chunk_size=10)
+
+
+def test_schema_comes_from_ingest_dtypes_not_first_chunk(tmp_path, monkeypatch):
+    raw_path = str(tmp_path / 'tipos.csv')
+    write_file(raw_path, 'SKU\nSKU0\nSKU1\n')
+    # Como con pandas 2: el primer bloque trae la ubicación toda nula (dtype object)
+    chunks = [
+        pd.DataFrame({'product_type': ['haircare'], 'sku': ['SKU0'], 'location': [None],
+                      'transportation_mode': ['Air'], 'stock_levels': pd.array([None], dtype='Int64')}),
+        pd.DataFrame({'product_type': ['skincare'], 'sku': ['SKU1'], 'location': ['Mumbai'],
+                      'transportation_mode': ['Road'], 'stock_levels': pd.array([7], dtype='Int64')}),
+    ]
+    monkeypatch.setattr(staging, 'read_raw', lambda path, chunk_size: iter(chunks))
+    staging_dir = str(tmp_path / 'supply_chain')
+
+    manifest = stage_raw(raw_path, staging_dir=staging_dir, chunk_size=1)
+
+    df = read_staged(staging_dir=staging_dir).sort_values('source_row')
+    assert manifest['rows'] == 2
+    assert df['location'].isna().tolist() == [True, False]
+    assert df['stock_levels'].tolist()[1] == 7
+    assert str(df['source_row'].dtype) == 'int64'
+
+
+def test_stage_chunks_yields_csv_order_and_publishes_at_the_end(tmp_path, sample_csv):
+    staging_dir = str(tmp_path / 'supply_chain')
+    chunks = stage_chunks(sample_csv, staging_dir=staging_dir, chunk_size=40)
+
+    first = next(chunks)
+    assert first['source_row'].tolist() == list(range(40))
+    assert read_manifest(staging_dir) is None
+    rest = list(chunks)
+
+    loaded = pd.concat([first, *rest], ignore_index=True)
+    assert loaded['source_row'].tolist() == list(range(len(loaded)))
+    staged = read_staged(staging_dir=staging_dir).sort_values('source_row', ignore_index=True)
+    pd.testing.assert_frame_equal(staged[loaded.columns], loaded, check_dtype=False)
+
+    # Con el staging al día los bloques salen igual, sin reescribirlo
+    manifest = read_manifest(staging_dir)
+    again = pd.concat(stage_chunks(sample_csv, staging_dir=staging_dir, chunk_size=40), ignore_index=True)
+    pd.testing.assert_frame_equal(again, loaded)
+    assert read_manifest(staging_dir) == manifest
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl_transform import SOURCE_ROW
+from staging import read_staged, stage_raw
+from stream_profile import (HyperLogLog, QuantileSketch, describe, misra_gries_merge, null_counts,
+                            profile_staged)
+
+
+@pytest.fixture(scope='module')
+def staged_sample(tmp_path_factory, sample_csv):
+    staging_dir = str(tmp_path_factory.mktemp('staging') / 'supply_chain')
+    stage_raw(sample_csv, staging_dir=staging_dir, chunk_size=30)
+    return staging_dir
+
+
+@pytest.fixture(scope='module')
+def exact(staged_sample):
+    return read_staged(staging_dir=staged_sample).drop(columns=SOURCE_ROW)
+
+
+@pytest.fixture(scope='module')
+def profile(staged_sample):
+    # Lotes de 7 filas: muchos perfiles parciales que se combinan con merge()
+    return profile_staged(staged_sample, workers=1, batch_size=7)
+
+
+def test_profile_matches_pandas_on_sample(profile, exact):
+    assert profile.rows == len(exact)
+    assert sorted(profile.columns) == sorted(exact.columns)
+
+    expected = exact.describe()
+    pd.testing.assert_frame_equal(describe(profile)[expected.columns], expected,
+                                  check_dtype=False, rtol=1e-9)
+    pd.testing.assert_series_equal(null_counts(profile)[exact.columns], exact.isnull().sum())
+
+
+@pytest.mark.parametrize('column', ['product_type', 'shipping_carrier', 'location', 'sku'])
+def test_value_counts_and_nunique_are_exact_on_sample(profile, exact, column):
+    col = profile.columns[column]
+    assert col.nunique() == exact[column].nunique()
+    # Menos distintos que TOP_K_CAPACITY: Misra-Gries nunca recorta y los conteos son exactos
+    assert not col.top_truncated
+    assert col.value_counts().to_dict() == exact[column].value_counts().to_dict()
+
+
+def test_parallel_profile_equals_serial(staged_sample, profile):
+    parallel = profile_staged(staged_sample, workers=2, batch_size=7)
+    pd.testing.assert_frame_equal(describe(parallel), describe(profile), rtol=1e-9)
+
+
+def rank_error(values, estimate, q):
+    return abs(np.searchsorted(values, estimate) / len(values) - q)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_quantile_sketch_rank_error(seed):
+    rng = np.random.default_rng(seed)
+    data = rng.lognormal(size=200_000)
+    sketch = QuantileSketch(size=512)
+    for part in np.array_split(data, 50):
+        sketch.update(part)
+
+    ordered = np.sort(data)
+    for q in [0.01, 0.25, 0.5, 0.75, 0.99]:
+        assert rank_error(ordered, sketch.quantile(q), q) < 0.01
+
+
+def test_quantile_sketch_merge_keeps_error_bound():
+    rng = np.random.default_rng(7)
+    parts = [rng.normal(loc, 1, 20_000) for loc in range(8)]
+    merged = QuantileSketch(size=512)
+    for part in parts:
+        partial = QuantileSketch(size=512)
+        partial.update(part)
+        merged.merge(partial)
+
+    ordered = np.sort(np.concatenate(parts))
+    for q in [0.1, 0.5, 0.9]:
+        assert rank_error(ordered, merged.quantile(q), q) < 0.01
+
+
+def test_quantile_sketch_is_exact_while_small():
+    values = np.random.default_rng(1).normal(size=1_000)
+    sketch = QuantileSketch(size=4_096)
+    sketch.update(values[:400])
+    other = QuantileSketch(size=4_096)
+    other.update(values[400:])
+    sketch.merge(other)
+    for q in [0.25, 0.5, 0.75]:
+        assert sketch.quantile(q) == pytest.approx(float(np.quantile(values, q)))
+
+
+def hashes(values):
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+@pytest.mark.parametrize('distinct', [1_000, 50_000, 300_000])
+def test_hyperloglog_error(distinct):
+    hll = HyperLogLog()
+    hll.update(hashes(np.arange(distinct)))
+    # Error estándar ~0.8% con precisión 14: 3% es más de 3 sigmas
+    assert abs(hll.estimate() - distinct) / distinct < 0.03
+
+
+def test_hyperloglog_merge_equals_union():
+    left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    left.update(hashes(np.arange(0, 60_000)))
+    right.update(hashes(np.arange(40_000, 100_000)))
+    union.update(hashes(np.arange(0, 100_000)))
+
+    left.merge(right)
+    np.testing.assert_array_equal(left.registers, union.registers)
+
+
+def test_misra_gries_merge_bounds():
+    rng = np.random.default_rng(3)
+    stream = pd.Series(rng.zipf(1.5, 100_000) % 5_000)
+    capacity = 50
+
+    summary, truncated = {}, False
+    for start in range(0, len(stream), 5_000):
+        part = stream.iloc[start:start + 5_000]
+        summary, cut = misra_gries_merge(summary, part.value_counts().to_dict(), capacity)
+        truncated |= cut
+
+    true_counts = stream.value_counts()
+    assert truncated and len(summary) <= capacity
+    # Cota inferior con error de a lo sumo n/capacity; todo valor más frecuente que eso aparece
+    for value, count in summary.items():
+        assert true_counts[value] - len(stream) / capacity <= count <= true_counts[value]
+    for value in true_counts[true_counts > len(stream) / capacity].index:
+        assert value in summary
+
+
+def test_misra_gries_is_exact_without_truncation():
+    counts = {'a': 3, 'b': 1}
+    merged, truncated = misra_gries_merge(counts, {'b': 2, 'c': 5}, capacity=10)
+    assert merged == {'a': 3, 'b': 3, 'c': 5}
+    assert not truncated